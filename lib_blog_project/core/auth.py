@@ -0,0 +1,72 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, user_logged_out
+from django.contrib.auth.backends import ModelBackend
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import hit_rates
+
+stats = hit_rates.counter("users")
+# pk -> (истекает, база, значения полей); свой в каждом процессе.
+_users = {}
+
+
+def _ttl() -> float:
+    return getattr(settings, "USER_CACHE_SECONDS", 30)
+
+
+def _attnames(user_model) -> list:
+    return [field.attname for field in user_model._meta.concrete_fields]
+
+
+def invalidate(user_id):
+    _users.pop(user_id, None)
+
+
+def clear():
+    _users.clear()
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который помнит пользователей сессий несколько секунд.
+
+    Хранятся значения полей, а не сам объект: каждый запрос получает
+    свой экземпляр. Запись сбрасывается при сохранении пользователя
+    (смена пароля, last_login) и при выходе; изменения из других
+    процессов видны не позже чем через USER_CACHE_SECONDS.
+    """
+
+    def get_user(self, user_id):
+        user_model = get_user_model()
+        try:
+            user_id = user_model._meta.pk.to_python(user_id)
+        except Exception:
+            return None
+        entry = _users.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            stats.hit()
+            _, db, values = entry
+            return user_model.from_db(db, _attnames(user_model), values)
+        stats.miss()
+        user = super().get_user(user_id)
+        if user is not None and _ttl() > 0:
+            values = tuple(
+                getattr(user, name) for name in _attnames(user_model)
+            )
+            expires = time.monotonic() + _ttl()
+            _users[user_id] = (expires, user._state.db, values)
+        return user
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_saved_user(sender, instance, **kwargs):
+    invalidate(instance.pk)
+
+
+@receiver(user_logged_out)
+def invalidate_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate(user.pk)
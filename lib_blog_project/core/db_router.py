@@ -0,0 +1,63 @@
+import contextvars
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Флаг «читать с основной базы»: ставится после записи в текущем
+# контексте (запрос, команда) и по cookie, пока не истёк срок закрепления.
+pinned = contextvars.ContextVar("pinned_to_primary", default=False)
+# Была ли запись в текущем контексте: по нему ставится cookie.
+wrote = contextvars.ContextVar("wrote_to_primary", default=False)
+
+
+def replicas() -> list:
+    return list(getattr(settings, "DATABASE_REPLICAS", ()))
+
+
+def pin_seconds() -> float:
+    return getattr(settings, "REPLICA_PIN_SECONDS", 5)
+
+
+def reads_replica() -> bool:
+    """Пойдут ли чтения текущего контекста на реплику."""
+    return (
+        bool(replicas())
+        and not pinned.get()
+        and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+    )
+
+
+def pin():
+    pinned.set(True)
+    wrote.set(True)
+
+
+class PrimaryReplicaRouter:
+    """Пишет в основную базу, читает с реплик.
+
+    После записи чтения того же контекста идут в основную базу, чтобы
+    пользователь сразу видел свои изменения, даже если реплика отстаёт.
+    Внутри транзакции основной базы чтения тоже идут в неё.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not reads_replica():
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas())
+
+    def db_for_write(self, model, **hints):
+        pin()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему вместе с данными от основной базы.
+        if db in replicas():
+            return False
+        return None
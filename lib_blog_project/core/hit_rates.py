@@ -0,0 +1,47 @@
+import threading
+
+
+class HitCounter:
+    """Попадания и промахи одного кэша в текущем процессе."""
+
+    def __init__(self, name):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    @property
+    def rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "rate": round(self.rate, 3),
+        }
+
+
+_counters = {}
+
+
+def counter(name) -> HitCounter:
+    """Счётчик по имени; создаётся при первом обращении."""
+    return _counters.setdefault(name, HitCounter(name))
+
+
+def snapshot() -> dict:
+    return {name: item.as_dict() for name, item in _counters.items()}
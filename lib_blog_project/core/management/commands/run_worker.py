@@ -0,0 +1,100 @@
+import signal
+import time
+from multiprocessing import Process
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from core import tasks
+
+# Как часто обработчик возвращает брошенные задачи и чистит выполненные.
+MAINTENANCE_INTERVAL = 60
+
+
+def work(poll_interval, once=False):
+    """Цикл одного обработчика: берёт задачи, пока не получит SIGTERM."""
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    worker = tasks.worker_id()
+    done = 0
+    maintained = 0
+    while not stopping:
+        if time.monotonic() - maintained > MAINTENANCE_INTERVAL:
+            now = timezone.now()
+            tasks.release_stale(now)
+            tasks.purge(now)
+            maintained = time.monotonic()
+        task_obj = tasks.claim(worker)
+        if task_obj is not None:
+            tasks.run(task_obj)
+            done += 1
+        elif once:
+            break
+        else:
+            time.sleep(poll_interval)
+    return done
+
+
+def _child(poll_interval):
+    django.setup()
+    work(poll_interval)
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет фоновые задачи из очереди core.tasks. "
+        "Несколько процессов могут работать с одной базой."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Число процессов-обработчиков.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Пауза в секундах, когда очередь пуста.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить готовые задачи и выйти.",
+        )
+
+    def handle(self, *args, **options):
+        tasks.autodiscover()
+        if options["once"] or options["workers"] <= 1:
+            done = work(options["poll_interval"], once=options["once"])
+            self.stdout.write(self.style.SUCCESS(f"Выполнено задач: {done}."))
+            return
+
+        # Соединения родителя не должны достаться дочерним процессам.
+        connections.close_all()
+        children = [
+            Process(target=_child, args=(options["poll_interval"],))
+            for _ in range(options["workers"])
+        ]
+        for child in children:
+            child.start()
+
+        def forward(signum, frame):
+            for child in children:
+                child.terminate()
+
+        signal.signal(signal.SIGTERM, forward)
+        signal.signal(signal.SIGINT, forward)
+        for child in children:
+            child.join()
+        self.stdout.write(self.style.SUCCESS("Обработчики остановлены."))
@@ -0,0 +1,178 @@
+import json
+import logging
+import mimetypes
+import os
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connections
+from django.http import FileResponse, HttpResponseNotModified
+from django.urls import Resolver404, resolve
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import db_router, hit_rates, storage, throttle, timing
+
+logger = logging.getLogger("core.timing")
+
+
+class ServerTimingMiddleware:
+    """Замеряет запросы к базе, шаблоны, кэш и миниатюры.
+
+    Итог отдаётся в заголовке Server-Timing и, если включено, пишется
+    в лог одной JSON-строкой. Доля замеряемых запросов задаётся
+    SERVER_TIMING_SAMPLE_RATE и отдельно для представлений по имени
+    маршрута в SERVER_TIMING_VIEW_SAMPLE_RATES. В лог попадают и доли
+    попаданий в кэши сессий и пользователей и счётчики ограничения
+    записей с начала работы процесса.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "SERVER_TIMING_SAMPLE_RATE", 1.0)
+        self.view_sample_rates = getattr(
+            settings, "SERVER_TIMING_VIEW_SAMPLE_RATES", {}
+        )
+        self.log = getattr(settings, "SERVER_TIMING_LOG", False)
+        timing.install()
+
+    def __call__(self, request):
+        try:
+            view_name = resolve(request.path_info).view_name
+        except Resolver404:
+            view_name = None
+        rate = self.view_sample_rates.get(view_name, self.sample_rate)
+        if rate <= 0 or random.random() >= rate:
+            return self.get_response(request)
+
+        with ExitStack() as stack:
+            metrics = stack.enter_context(timing.collect())
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(timing.sql_wrapper)
+                )
+            response = self.get_response(request)
+
+        response["Server-Timing"] = metrics.server_timing()
+        if self.log:
+            logger.info(
+                json.dumps(
+                    {
+                        "method": request.method,
+                        "path": request.path,
+                        "view": view_name,
+                        "status": response.status_code,
+                        **metrics.as_dict(),
+                        "hit_rates": hit_rates.snapshot(),
+                        "throttle": throttle.snapshot(),
+                    }
+                )
+            )
+        return response
+
+
+class ReplicaPinMiddleware:
+    """Закрепляет чтения клиента за основной базой после его записи.
+
+    Срок закрепления (REPLICA_PIN_SECONDS) хранится в cookie, поэтому
+    следующая страница, например после редиректа с формы, читает уже
+    записанные данные, а не отстающую реплику.
+    """
+
+    cookie_name = "pin_primary"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_seconds = db_router.pin_seconds()
+
+    def __call__(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(self.cookie_name, 0))
+        except ValueError:
+            pinned_until = 0
+        pinned_token = db_router.pinned.set(pinned_until > time.time())
+        wrote_token = db_router.wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if db_router.wrote.get():
+                response.set_cookie(
+                    self.cookie_name,
+                    str(time.time() + self.pin_seconds),
+                    max_age=self.pin_seconds,
+                    httponly=True,
+                )
+        finally:
+            db_router.pinned.reset(pinned_token)
+            db_router.wrote.reset(wrote_token)
+        return response
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную collectstatic статику из STATIC_ROOT.
+
+    Клиенту отдаётся сжатая копия (.br или .gz), если он её принимает.
+    Файлы с хешем содержимого в имени не меняются никогда, поэтому
+    кэшируются браузером на год без перепроверки; остальные живут
+    STATIC_MAX_AGE секунд и перепроверяются по Last-Modified.
+    """
+
+    immutable_cache_control = "public, max-age=31536000, immutable"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.root = settings.STATIC_ROOT
+        self.prefix = settings.STATIC_URL
+        self.max_age = getattr(settings, "STATIC_MAX_AGE", 60)
+        self.hashed = frozenset(
+            getattr(staticfiles_storage, "hashed_files", {}).values()
+        )
+
+    def __call__(self, request):
+        if (
+            self.root
+            and request.method in ("GET", "HEAD")
+            and request.path_info.startswith(self.prefix)
+        ):
+            name = request.path_info[len(self.prefix):]
+            response = self.serve(request, name)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        if name not in self.hashed and not was_modified_since(
+            request.META.get("HTTP_IF_MODIFIED_SINCE"),
+            stat.st_mtime,
+            stat.st_size,
+        ):
+            return HttpResponseNotModified()
+
+        variant, encoding = storage.variant_path(
+            path, request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        content_type, _ = mimetypes.guess_type(path)
+        response = FileResponse(
+            open(variant, "rb"),
+            content_type=content_type or "application/octet-stream",
+        )
+        if encoding is not None:
+            response["Content-Encoding"] = encoding
+        response["Vary"] = "Accept-Encoding"
+        response["Last-Modified"] = http_date(stat.st_mtime)
+        if name in self.hashed:
+            response["Cache-Control"] = self.immutable_cache_control
+        else:
+            response["Cache-Control"] = f"public, max-age={self.max_age}"
+        return response
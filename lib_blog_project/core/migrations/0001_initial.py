@@ -0,0 +1,46 @@
+# Generated by Django 2.2.16 on 2026-10-18 15:22
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Задача')),
+                ('kwargs', models.TextField(default='{}', verbose_name='Аргументы (JSON)')),
+                ('priority', models.SmallIntegerField(default=0, help_text='Больше - раньше', verbose_name='Приоритет')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('running', 'Выполняется'), ('done', 'Выполнена'), ('failed', 'Не выполнена')], default='queued', max_length=10, verbose_name='Состояние')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5, verbose_name='Наибольшее число попыток')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Не раньше')),
+                ('idempotency_key', models.CharField(blank=True, help_text='Пока задача с ключом ждёт, такая же не ставится', max_length=200, null=True, verbose_name='Ключ идемпотентности')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='Обработчик')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Взята')),
+                ('last_error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Поставлена')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершена')),
+            ],
+            options={
+                'verbose_name': 'фоновая задача',
+                'verbose_name_plural': 'фоновые задачи',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', '-priority', 'run_at'], name='task_queue_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(condition=models.Q(status__in=('queued', 'running')), fields=('idempotency_key',), name='uq_task_pending_key'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.16 on 2026-10-18 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='task',
+            name='uq_task_pending_key',
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='idempotency_key',
+            field=models.CharField(blank=True, help_text='Пока задача с ключом ждёт в очереди, такая же не ставится', max_length=200, null=True, verbose_name='Ключ идемпотентности'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(condition=models.Q(status='queued'), fields=('idempotency_key',), name='uq_task_queued_key'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -12,3 +13,81 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class Task(models.Model):
+    """Задача фоновой очереди core.tasks."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (QUEUED, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Выполнена"),
+        (FAILED, "Не выполнена"),
+    )
+    name = models.CharField(max_length=200, verbose_name="Задача")
+    kwargs = models.TextField(default="{}", verbose_name="Аргументы (JSON)")
+    priority = models.SmallIntegerField(
+        default=0, verbose_name="Приоритет", help_text="Больше - раньше"
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+        verbose_name="Состояние",
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name="Попыток"
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=5, verbose_name="Наибольшее число попыток"
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now, verbose_name="Не раньше"
+    )
+    idempotency_key = models.CharField(
+        max_length=200,
+        blank=True,
+        null=True,
+        verbose_name="Ключ идемпотентности",
+        help_text="Пока задача с ключом ждёт в очереди, такая же "
+        "не ставится",
+    )
+    locked_by = models.CharField(
+        max_length=100, blank=True, verbose_name="Обработчик"
+    )
+    locked_at = models.DateTimeField(
+        blank=True, null=True, verbose_name="Взята"
+    )
+    last_error = models.TextField(blank=True, verbose_name="Ошибка")
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name="Поставлена"
+    )
+    finished_at = models.DateTimeField(
+        blank=True, null=True, verbose_name="Завершена"
+    )
+
+    class Meta:
+        verbose_name = "фоновая задача"
+        verbose_name_plural = "фоновые задачи"
+        # Уже начатая задача могла прочитать данные до изменения,
+        # поэтому повтор с тем же ключом ставится заново.
+        constraints = [
+            models.UniqueConstraint(
+                fields=["idempotency_key"],
+                condition=models.Q(status="queued"),
+                name="uq_task_queued_key",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["status", "-priority", "run_at"],
+                name="task_queue_idx",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.name} [{self.status}]"
@@ -0,0 +1,182 @@
+import base64
+import binascii
+import heapq
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+
+def encode_cursor(position, backwards=False) -> str:
+    """Упаковывает позицию (pub_date, pk) в непрозрачный токен."""
+    pub_date, pk = position
+    raw = json.dumps([pub_date.isoformat(), pk, int(backwards)])
+    token = base64.urlsafe_b64encode(raw.encode())
+    return token.decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Возвращает (позиция, направление); битый токен - первая страница."""
+    if not token:
+        return None, False
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        pub_date, pk, backwards = json.loads(raw.decode())
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        return None, False
+    if pub_date is None:
+        return None, False
+    return (pub_date, pk), bool(backwards)
+
+
+class CursorPage:
+    """Страница ленты со ссылками на соседние страницы в виде курсоров.
+
+    Записи выбираются при первом обращении, поэтому страница, чей
+    фрагмент уже лежит в кэше шаблонов, не делает запросов к базе.
+    """
+
+    def __init__(self, paginator, cursor):
+        self.paginator = paginator
+        self.position, self.backwards = decode_cursor(cursor)
+
+    def __repr__(self) -> str:
+        return f"<CursorPage: {len(self.object_list)} objects>"
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        if not isinstance(index, (int, slice)):
+            raise TypeError(
+                "CursorPage indices must be integers or slices, not %s."
+                % type(index).__name__
+            )
+        return self.object_list[index]
+
+    @property
+    def cursor(self) -> str:
+        """Нормализованный курсор текущей страницы, пригоден для ключей."""
+        if self.position is None:
+            return ""
+        return encode_cursor(self.position, self.backwards)
+
+    @cached_property
+    def _page(self):
+        return self.paginator.build_page(self.position, self.backwards)
+
+    @property
+    def object_list(self) -> list:
+        return self._page[0]
+
+    @property
+    def next_cursor(self):
+        return self._page[1]
+
+    @property
+    def previous_cursor(self):
+        return self._page[2]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Постраничный вывод по ключу (pub_date, pk).
+
+    Вместо COUNT(*) и OFFSET каждая страница выбирается условием
+    по ключу последней показанной записи, поэтому стоимость запроса
+    не зависит ни от номера страницы, ни от размера таблицы.
+    """
+
+    def __init__(self, object_list, per_page, keys=("pub_date", "pk")):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.keys = keys
+
+    def fetch(self, position, backwards, limit) -> list:
+        date_key, pk_key = self.keys
+        queryset = self.object_list
+        if position is not None:
+            pub_date, pk = position
+            lookup = "gt" if backwards else "lt"
+            queryset = queryset.filter(
+                Q(**{f"{date_key}__{lookup}e": pub_date}),
+                Q(**{f"{date_key}__{lookup}": pub_date})
+                | Q(**{f"{pk_key}__{lookup}": pk}),
+            )
+        if backwards:
+            ordering = (date_key, pk_key)
+        else:
+            ordering = (f"-{date_key}", f"-{pk_key}")
+        return list(queryset.order_by(*ordering)[:limit])
+
+    @staticmethod
+    def get_position(obj):
+        # Строки из values() приходят словарями.
+        if isinstance(obj, dict):
+            return obj["pub_date"], obj["id"]
+        return obj.pub_date, obj.pk
+
+    def get_page(self, cursor) -> CursorPage:
+        return CursorPage(self, cursor)
+
+    def build_page(self, position, backwards):
+        """Возвращает записи страницы и курсоры следующей и предыдущей."""
+        rows = self.fetch(position, backwards, self.per_page + 1)
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(self.get_position(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = encode_cursor(
+                self.get_position(rows[0]), backwards=True
+            )
+        return rows, next_cursor, previous_cursor
+
+
+class MergedCursorPaginator(CursorPaginator):
+    """Сливает несколько лент, упорядоченных по (pub_date, pk), в одну.
+
+    Каждый источник отдаёт не больше limit записей после курсора,
+    так что слияние стоит O(limit * число источников). Повторы
+    одной и той же записи из разных источников отбрасываются.
+    """
+
+    def __init__(self, paginators, per_page):
+        self.paginators = paginators
+        self.per_page = per_page
+
+    def fetch(self, position, backwards, limit) -> list:
+        merged = heapq.merge(
+            *(p.fetch(position, backwards, limit) for p in self.paginators),
+            key=self.get_position,
+            reverse=not backwards,
+        )
+        rows = []
+        for obj in merged:
+            if rows and self.get_position(rows[-1]) == self.get_position(obj):
+                continue
+            rows.append(obj)
+            if len(rows) == limit:
+                break
+        return rows
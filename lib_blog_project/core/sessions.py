@@ -0,0 +1,32 @@
+from django.contrib.sessions.backends import cached_db
+
+from . import hit_rates
+
+stats = hit_rates.counter("sessions")
+
+
+class SessionStore(cached_db.SessionStore):
+    """Сессии в кэше с записью в базу, с учётом попаданий в кэш.
+
+    Повторяет cached_db.SessionStore.load, чтобы не читать кэш дважды.
+    """
+
+    def load(self):
+        try:
+            data = self._cache.get(self.cache_key)
+        except Exception:
+            data = None
+        if data is not None:
+            stats.hit()
+            return data
+        stats.miss()
+        session = self._get_session_from_db()
+        if not session:
+            return {}
+        data = self.decode(session.session_data)
+        self._cache.set(
+            self.cache_key,
+            data,
+            self.get_expiry_age(expiry=session.expire_date),
+        )
+        return data
@@ -0,0 +1,105 @@
+import gzip
+import logging
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger("core.storage")
+
+# Картинки и шрифты уже сжаты, повторное сжатие их только увеличит.
+COMPRESSIBLE = (
+    ".css",
+    ".js",
+    ".map",
+    ".svg",
+    ".ico",
+    ".txt",
+    ".html",
+    ".json",
+    ".xml",
+    ".ttf",
+    ".otf",
+    ".eot",
+)
+# Мелкие файлы не сжимаются: выигрыш меньше заголовков ответа.
+MIN_SIZE = 256
+# Вариант сохраняется, только если он заметно меньше оригинала.
+MIN_RATIO = 0.95
+# Сжатые копии по убыванию предпочтения: (кодировка, суффикс файла).
+VARIANTS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def compress(data, encoding) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    # mtime=0: одинаковые файлы дают одинаковый архив при каждой сборке.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в имени и заранее сжатыми копиями.
+
+    collectstatic кладёт рядом с каждым сжимаемым файлом варианты .gz
+    и, если установлен brotli, .br. Без манифеста (collectstatic не
+    запускался: разработка, тесты) ссылки ведут на исходные имена.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        if brotli is None:
+            logger.warning(
+                "Пакет Brotli не установлен: варианты .br не создаются, "
+                "клиенты получат только .gz."
+            )
+        names = {*self.hashed_files, *self.hashed_files.values()}
+        for name in sorted(names):
+            for compressed_name in self.compress_file(name):
+                yield name, compressed_name, True
+
+    def compress_file(self, name):
+        if not name.endswith(COMPRESSIBLE) or not self.exists(name):
+            return
+        with self.open(name) as original:
+            data = original.read()
+        if len(data) < MIN_SIZE:
+            return
+        for encoding, suffix in VARIANTS:
+            if encoding == "br" and brotli is None:
+                continue
+            compressed = compress(data, encoding)
+            if len(compressed) > len(data) * MIN_RATIO:
+                continue
+            compressed_name = name + suffix
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            self._save(compressed_name, ContentFile(compressed))
+            yield compressed_name
+
+
+def variant_path(path, accept_encoding):
+    """Путь к сжатой копии, которую примет клиент, и её кодировка.
+
+    Если подходящей копии нет, возвращается исходный путь без кодировки.
+    """
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, *params = (value.strip() for value in part.split(";"))
+        if "q=0" not in params and "q=0.0" not in params:
+            accepted.add(coding.lower())
+    for encoding, suffix in VARIANTS:
+        if encoding in accepted and os.path.isfile(path + suffix):
+            return path + suffix, encoding
+    return path, None
@@ -0,0 +1,245 @@
+import functools
+import json
+import logging
+import os
+import random
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from . import db_router
+from .models import Task
+
+logger = logging.getLogger("core.tasks")
+
+# Пауза перед n-й повторной попыткой: BACKOFF_BASE * 2 ** (n - 1),
+# но не больше BACKOFF_MAX, плюс до 10% случайного разброса, чтобы
+# упавшие разом задачи не повторялись тоже разом.
+BACKOFF_BASE = timedelta(seconds=10)
+BACKOFF_MAX = timedelta(hours=1)
+# Задача, взятая дольше LEASE назад, считается брошенной упавшим
+# обработчиком и возвращается в очередь.
+LEASE = timedelta(minutes=10)
+# Сколько хранить выполненные задачи.
+KEEP_DONE = timedelta(days=1)
+
+_registry = {}
+RESULT_FIELDS = (
+    "status",
+    "attempts",
+    "run_at",
+    "last_error",
+    "locked_by",
+    "locked_at",
+    "finished_at",
+)
+
+
+def _queue():
+    # Очередь читается только с основной базы: реплика может не знать
+    # о только что поставленной или уже взятой задаче.
+    return Task.objects.db_manager(DEFAULT_DB_ALIAS)
+
+
+def task(func=None, *, priority=0, max_attempts=5):
+    """Регистрирует функцию как фоновую задачу.
+
+    Аргументы передаются по имени и должны сериализоваться в JSON.
+    У функции появляется метод enqueue с теми же аргументами плюс
+    необязательные priority, delay и idempotency_key.
+    """
+    if func is None:
+        return functools.partial(
+            task, priority=priority, max_attempts=max_attempts
+        )
+    name = f"{func.__module__}.{func.__qualname__}"
+    _registry[name] = func
+    func.enqueue = functools.partial(
+        enqueue, name, default_priority=priority, max_attempts=max_attempts
+    )
+    return func
+
+
+def enqueue(
+    name,
+    *,
+    priority=None,
+    delay=None,
+    idempotency_key=None,
+    default_priority=0,
+    max_attempts=5,
+    **kwargs,
+):
+    """Ставит задачу в очередь и сразу возвращается.
+
+    Если задача с тем же idempotency_key ещё ждёт в очереди, новая не
+    создаётся и возвращается ждущая. Уже выполняющаяся задача могла
+    прочитать данные до изменения, поэтому её ключ не мешает поставить
+    новую. С TASKS_EAGER задача выполняется сразу, в текущем процессе.
+    """
+    if getattr(settings, "TASKS_EAGER", False):
+        _registry[name](**kwargs)
+        return None
+    while True:
+        try:
+            with transaction.atomic():
+                return Task.objects.create(
+                    name=name,
+                    kwargs=json.dumps(kwargs),
+                    priority=(
+                        default_priority if priority is None else priority
+                    ),
+                    max_attempts=max_attempts,
+                    run_at=timezone.now() + (delay or timedelta()),
+                    idempotency_key=idempotency_key,
+                )
+        except IntegrityError:
+            if idempotency_key is None:
+                raise
+            waiting = _queue().filter(
+                idempotency_key=idempotency_key, status=Task.QUEUED
+            ).first()
+            # Иначе ждавшую задачу только что взял обработчик.
+            if waiting is not None:
+                return waiting
+
+
+def backoff(attempts) -> timedelta:
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay * (1 + random.random() / 10)
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim(worker, now=None):
+    """Берёт самую приоритетную готовую задачу или возвращает None.
+
+    Задачу забирает тот, чей UPDATE с условием status=queued изменил
+    строку, поэтому несколько обработчиков могут работать с одной
+    базой без блокировок строк, которых нет в SQLite.
+    """
+    now = now or timezone.now()
+    while True:
+        candidate = (
+            _queue()
+            .filter(status=Task.QUEUED, run_at__lte=now)
+            .order_by("-priority", "run_at")
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if candidate is None:
+            return None
+        claimed = _queue().filter(
+            pk=candidate, status=Task.QUEUED
+        ).update(status=Task.RUNNING, locked_by=worker, locked_at=now)
+        if claimed:
+            return _queue().get(pk=candidate)
+
+
+def run(task_obj) -> bool:
+    """Выполняет взятую задачу; при ошибке планирует повтор."""
+    task_obj.attempts += 1
+    # Задачи ставятся при записи и должны видеть её, а реплика может
+    # отставать, поэтому задача читает с основной базы.
+    pinned = db_router.pinned.set(True)
+    try:
+        func = _registry[task_obj.name]
+        func(**json.loads(task_obj.kwargs))
+    except Exception:
+        task_obj.last_error = traceback.format_exc()
+        if task_obj.attempts < task_obj.max_attempts:
+            task_obj.status = Task.QUEUED
+            task_obj.run_at = timezone.now() + backoff(task_obj.attempts)
+        else:
+            task_obj.status = Task.FAILED
+            task_obj.finished_at = timezone.now()
+        logger.warning(
+            "Задача %s (%s), попытка %s: ошибка",
+            task_obj.pk,
+            task_obj.name,
+            task_obj.attempts,
+            exc_info=True,
+        )
+        ok = False
+    else:
+        task_obj.status = Task.DONE
+        task_obj.finished_at = timezone.now()
+        ok = True
+    finally:
+        db_router.pinned.reset(pinned)
+    task_obj.locked_by = ""
+    task_obj.locked_at = None
+    try:
+        with transaction.atomic():
+            task_obj.save(update_fields=RESULT_FIELDS)
+    except IntegrityError:
+        # Пока задача выполнялась, в очередь встала такая же с тем же
+        # ключом: повтор выполнит она.
+        task_obj.status = Task.FAILED
+        task_obj.finished_at = timezone.now()
+        task_obj.save(update_fields=RESULT_FIELDS)
+    return ok
+
+
+def release_stale(now=None) -> int:
+    """Возвращает в очередь задачи, брошенные упавшими обработчиками.
+
+    Если в очереди уже ждёт задача с тем же ключом, брошенная считается
+    не выполненной: работу сделает ждущая.
+    """
+    now = now or timezone.now()
+    stale = _queue().filter(status=Task.RUNNING, locked_at__lt=now - LEASE)
+    released = 0
+    for pk in stale.values_list("pk", flat=True):
+        task_obj = _queue().filter(pk=pk, status=Task.RUNNING)
+        try:
+            with transaction.atomic():
+                released += task_obj.update(
+                    status=Task.QUEUED, locked_by="", locked_at=None
+                )
+        except IntegrityError:
+            task_obj.update(
+                status=Task.FAILED,
+                locked_by="",
+                locked_at=None,
+                finished_at=now,
+            )
+    return released
+
+
+def purge(now=None) -> int:
+    """Удаляет давно выполненные задачи; упавшие остаются для разбора."""
+    now = now or timezone.now()
+    deleted, _ = Task.objects.filter(
+        status=Task.DONE, finished_at__lt=now - KEEP_DONE
+    ).delete()
+    return deleted
+
+
+def run_pending(worker=None, limit=None) -> int:
+    """Выполняет готовые задачи в текущем процессе, пока они есть."""
+    worker = worker or worker_id()
+    done = 0
+    while limit is None or done < limit:
+        task_obj = claim(worker)
+        if task_obj is None:
+            break
+        run(task_obj)
+        done += 1
+    return done
+
+
+def autodiscover():
+    """Импортирует модули tasks всех приложений.
+
+    Обработчик знает только зарегистрированные задачи, поэтому
+    вызывается до первой из них.
+    """
+    autodiscover_modules("tasks")
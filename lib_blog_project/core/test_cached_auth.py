@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import auth, hit_rates, sessions
+
+User = get_user_model()
+
+
+class TestCachedAuth(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username="cached", password="old-password"
+        )
+        cls.url = reverse("about:author")
+
+    def setUp(self):
+        cache.clear()
+        auth.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_no_session_and_user_queries(self):
+        """Повторный запрос не читает сессию и пользователя из базы."""
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.wsgi_request.user, self.user)
+        tables = " ".join(query["sql"] for query in queries)
+        self.assertNotIn("django_session", tables)
+        self.assertNotIn("auth_user", tables)
+
+    def test_password_change_logs_out(self):
+        """После смены пароля закэшированный пользователь не используется."""
+        self.client.get(self.url)
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password("new-password")
+        user.save()
+        response = self.client.get(self.url)
+        self.assertTrue(response.wsgi_request.user.is_anonymous)
+
+    def test_logout_invalidates(self):
+        """Выход сбрасывает пользователя из кэша процесса."""
+        self.client.get(self.url)
+        self.assertIn(self.user.pk, auth._users)
+        self.client.logout()
+        self.assertNotIn(self.user.pk, auth._users)
+
+    def test_hit_rates(self):
+        """Попадания и промахи кэшей сессий и пользователей считаются."""
+        auth.stats.reset()
+        sessions.stats.reset()
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.assertEqual(auth.stats.as_dict()["misses"], 1)
+        self.assertEqual(auth.stats.as_dict()["hits"], 1)
+        self.assertEqual(sessions.stats.hits, 2)
+        self.assertEqual(hit_rates.snapshot()["users"]["rate"], 0.5)
+
+    @override_settings(SERVER_TIMING_LOG=True)
+    def test_hit_rates_logged(self):
+        """Доли попаданий пишутся в лог Server-Timing."""
+        with self.assertLogs("core.timing", "INFO") as logs:
+            self.client.get(self.url)
+        self.assertIn('"hit_rates"', logs.output[0])
+        self.assertIn('"sessions"', logs.output[0])
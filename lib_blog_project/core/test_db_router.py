@@ -0,0 +1,81 @@
+import time
+from unittest import mock
+
+from django.db import connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from core import db_router
+from core.middleware import ReplicaPinMiddleware
+from posts.models import Post
+
+
+class TestPrimaryReplicaRouter(SimpleTestCase):
+    def setUp(self):
+        self.router = db_router.PrimaryReplicaRouter()
+        self.pinned_token = db_router.pinned.set(False)
+        # Тесты идут внутри транзакции, а в ней чтения всегда основные.
+        patcher = mock.patch.object(
+            connections["default"], "in_atomic_block", False
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        db_router.pinned.reset(self.pinned_token)
+
+    def test_reads_go_to_replica_until_write(self):
+        """Чтения идут на реплику, после записи - в основную базу."""
+        self.assertEqual(self.router.db_for_read(Post), "replica")
+        self.assertEqual(self.router.db_for_write(Post), "default")
+        self.assertEqual(self.router.db_for_read(Post), "default")
+
+    def test_replica_not_migrated(self):
+        """Миграции к реплике не применяются."""
+        self.assertFalse(self.router.allow_migrate("replica", "posts"))
+        self.assertIsNone(self.router.allow_migrate("default", "posts"))
+
+
+class TestReplicaPinMiddleware(TestCase):
+    def setUp(self):
+        self.router = db_router.PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        self.reads = []
+
+    def view(self, write):
+        def get_response(request):
+            with mock.patch.object(
+                connections["default"], "in_atomic_block", False
+            ):
+                if write:
+                    self.router.db_for_write(Post)
+                self.reads.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        return ReplicaPinMiddleware(get_response)
+
+    def test_write_sets_cookie(self):
+        """Запрос с записью ставит cookie закрепления, без записи - нет."""
+        response = self.view(write=False)(self.factory.get("/"))
+        self.assertNotIn("pin_primary", response.cookies)
+        self.assertEqual(self.reads, ["replica"])
+
+        response = self.view(write=True)(self.factory.post("/"))
+        self.assertIn("pin_primary", response.cookies)
+        self.assertEqual(self.reads, ["replica", "default"])
+
+    def test_cookie_pins_reads(self):
+        """Пока cookie не истекла, чтения идут в основную базу."""
+        middleware = self.view(write=False)
+        request = self.factory.get("/")
+        request.COOKIES["pin_primary"] = str(time.time() + 5)
+        middleware(request)
+        request = self.factory.get("/")
+        request.COOKIES["pin_primary"] = str(time.time() - 1)
+        middleware(request)
+        self.assertEqual(self.reads, ["default", "replica"])
+
+    def test_transaction_reads_primary(self):
+        """Внутри транзакции чтения идут в основную базу."""
+        with transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Post), "default")
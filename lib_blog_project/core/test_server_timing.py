@@ -0,0 +1,36 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+
+class TestServerTiming(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.guest_client = Client()
+
+    def test_header(self):
+        """Ответ содержит заголовок Server-Timing со всеми метриками."""
+        response = self.guest_client.get(reverse("posts:index"))
+        header = response["Server-Timing"]
+        for metric in ("db;", "tpl;", "cache;", "thumb;", "total;"):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, header)
+        self.assertRegex(header, r'db;dur=[\d.]+;desc="\d+ queries"')
+
+    @override_settings(
+        SERVER_TIMING_VIEW_SAMPLE_RATES={"posts:index": 0}
+    )
+    def test_view_sample_rate(self):
+        """Маршрут с нулевой долей выборки не замеряется."""
+        response = Client().get(reverse("posts:index"))
+        self.assertFalse(response.has_header("Server-Timing"))
+        response = Client().get(reverse("about:author"))
+        self.assertTrue(response.has_header("Server-Timing"))
+
+    @override_settings(SERVER_TIMING_LOG=True)
+    def test_log(self):
+        """С SERVER_TIMING_LOG метрики пишутся в лог."""
+        with self.assertLogs("core.timing", "INFO") as logs:
+            Client().get(reverse("posts:index"))
+        self.assertIn('"view": "posts:index"', logs.output[0])
+        self.assertIn('"db_queries"', logs.output[0])
@@ -0,0 +1,102 @@
+import gzip
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+
+from .middleware import StaticFilesMiddleware
+
+STATIC_SOURCE = tempfile.mkdtemp(dir=settings.BASE_DIR)
+STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+CSS = b"body { margin: 0; padding: 0; }\n" * 40
+
+
+@override_settings(
+    STATICFILES_DIRS=(STATIC_SOURCE,), STATIC_ROOT=STATIC_ROOT
+)
+class TestStaticFiles(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        os.makedirs(os.path.join(STATIC_SOURCE, "css"))
+        with open(os.path.join(STATIC_SOURCE, "css", "site.css"), "wb") as f:
+            f.write(CSS)
+        with open(os.path.join(STATIC_SOURCE, "logo.png"), "wb") as f:
+            f.write(b"\x89PNG" + bytes(range(256)) * 4)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(STATIC_SOURCE, ignore_errors=True)
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        call_command("collectstatic", interactive=False, verbosity=0)
+        self.css = staticfiles_storage.stored_name("css/site.css")
+
+    def get(self, name, **headers):
+        response = Client().get(settings.STATIC_URL + name, **headers)
+        return response, b"".join(response.streaming_content)
+
+    def test_collectstatic(self):
+        """Имена получают хеш, сжимаемые файлы - копию .gz."""
+        self.assertRegex(self.css, r"^css/site\.[0-9a-f]{12}\.css$")
+        self.assertTrue(staticfiles_storage.exists(self.css + ".gz"))
+        # Картинки уже сжаты, их копии не нужны.
+        png = staticfiles_storage.stored_name("logo.png")
+        self.assertFalse(staticfiles_storage.exists(png + ".gz"))
+
+    def test_missing_brotli_is_reported(self):
+        """Без пакета Brotli collectstatic предупреждает о пропуске .br."""
+        with mock.patch("core.storage.brotli", None):
+            with self.assertLogs("core.storage", "WARNING"):
+                call_command("collectstatic", interactive=False, verbosity=0)
+        self.assertFalse(staticfiles_storage.exists(self.css + ".br"))
+
+    def test_hashed_file_is_immutable(self):
+        """Файл с хешем отдаётся сжатым и кэшируется навсегда."""
+        response, body = self.get(self.css, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(gzip.decompress(body), CSS)
+
+    def test_identity_encoding(self):
+        """Клиент без поддержки сжатия получает исходный файл."""
+        for accept in ("", "gzip;q=0"):
+            with self.subTest(accept=accept):
+                response, body = self.get(
+                    self.css, HTTP_ACCEPT_ENCODING=accept
+                )
+                self.assertFalse(response.has_header("Content-Encoding"))
+                self.assertEqual(body, CSS)
+
+    def test_unhashed_file_is_revalidated(self):
+        """Файл без хеша кэшируется ненадолго и проверяется по дате."""
+        response, _ = self.get("css/site.css")
+        self.assertEqual(
+            response["Cache-Control"],
+            f"public, max-age={settings.STATIC_MAX_AGE}",
+        )
+        response = Client().get(
+            settings.STATIC_URL + "css/site.css",
+            HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_outside_static_root(self):
+        """Файлы вне STATIC_ROOT не отдаются."""
+        passed = HttpResponse()
+        middleware = StaticFilesMiddleware(lambda request: passed)
+        for name in ("../manage.py", "missing.css"):
+            with self.subTest(name=name):
+                request = RequestFactory().get(settings.STATIC_URL + name)
+                self.assertIs(middleware(request), passed)
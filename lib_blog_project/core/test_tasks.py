@@ -0,0 +1,168 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import tasks
+from .models import Task
+
+User = get_user_model()
+
+calls = []
+
+
+@tasks.task
+def record(value):
+    calls.append(value)
+
+
+@tasks.task(max_attempts=2)
+def broken():
+    raise RuntimeError("сбой")
+
+
+class TestTasks(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_does_not_run(self):
+        """Постановка в очередь не выполняет задачу."""
+        task_obj = record.enqueue(value=1)
+        self.assertEqual(calls, [])
+        self.assertEqual(task_obj.status, Task.QUEUED)
+        self.assertEqual(tasks.run_pending(), 1)
+        self.assertEqual(calls, [1])
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, Task.DONE)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager(self):
+        """С TASKS_EAGER задача выполняется сразу."""
+        self.assertIsNone(record.enqueue(value=1))
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
+
+    def test_priority_order(self):
+        """Сначала выполняются задачи с большим приоритетом."""
+        record.enqueue(value="low")
+        record.enqueue(value="high", priority=10)
+        record.enqueue(value="later", priority=20, delay=timedelta(hours=1))
+        tasks.run_pending()
+        self.assertEqual(calls, ["high", "low"])
+
+    def test_idempotency_key(self):
+        """Пока задача ждёт, повтор с тем же ключом её не дублирует."""
+        first = record.enqueue(value=1, idempotency_key="key")
+        self.assertEqual(record.enqueue(value=2, idempotency_key="key"), first)
+        tasks.run_pending()
+        self.assertEqual(calls, [1])
+        record.enqueue(value=3, idempotency_key="key")
+        tasks.run_pending()
+        self.assertEqual(calls, [1, 3])
+
+    def test_running_task_does_not_block_key(self):
+        """Задача с ключом, которая уже выполняется, не мешает новой."""
+        record.enqueue(value=1, idempotency_key="key")
+        running = tasks.claim("worker")
+        queued = record.enqueue(value=2, idempotency_key="key")
+        self.assertNotEqual(queued.pk, running.pk)
+        self.assertEqual(queued.status, Task.QUEUED)
+
+    def test_retry_superseded_by_queued_duplicate(self):
+        """Повтор не нужен, если такая же задача уже ждёт в очереди."""
+        broken.enqueue(idempotency_key="key")
+        running = tasks.claim("worker")
+        queued = broken.enqueue(idempotency_key="key")
+        with self.assertLogs("core.tasks", "WARNING"):
+            tasks.run(running)
+        running.refresh_from_db()
+        self.assertEqual(running.status, Task.FAILED)
+        self.assertEqual(
+            Task.objects.get(status=Task.QUEUED).pk, queued.pk
+        )
+
+    def test_retry_with_backoff(self):
+        """Упавшая задача повторяется позже, а после max_attempts - failed."""
+        task_obj = broken.enqueue()
+        before = timezone.now()
+        with self.assertLogs("core.tasks", "WARNING"):
+            self.assertEqual(tasks.run_pending(), 1)
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, Task.QUEUED)
+        self.assertEqual(task_obj.attempts, 1)
+        self.assertGreaterEqual(
+            task_obj.run_at, before + tasks.BACKOFF_BASE
+        )
+        self.assertIn("RuntimeError", task_obj.last_error)
+        # Повтор ещё не наступил.
+        self.assertEqual(tasks.run_pending(), 0)
+
+        Task.objects.filter(pk=task_obj.pk).update(run_at=timezone.now())
+        with self.assertLogs("core.tasks", "WARNING"):
+            tasks.run_pending()
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, Task.FAILED)
+        self.assertEqual(task_obj.attempts, 2)
+
+    def test_backoff_grows(self):
+        """Пауза растёт вдвое с каждой попыткой и ограничена сверху."""
+        self.assertLess(tasks.backoff(1), tasks.backoff(3))
+        self.assertLessEqual(tasks.backoff(30), tasks.BACKOFF_MAX * 1.1)
+
+    def test_claim_is_exclusive(self):
+        """Взятую задачу не получит другой обработчик."""
+        record.enqueue(value=1)
+        self.assertIsNotNone(tasks.claim("first"))
+        self.assertIsNone(tasks.claim("second"))
+
+    def test_release_stale(self):
+        """Задача упавшего обработчика возвращается в очередь."""
+        task_obj = record.enqueue(value=1)
+        tasks.claim("crashed")
+        Task.objects.filter(pk=task_obj.pk).update(
+            locked_at=timezone.now() - tasks.LEASE * 2
+        )
+        self.assertEqual(tasks.release_stale(), 1)
+        self.assertEqual(tasks.run_pending(), 1)
+        self.assertEqual(calls, [1])
+
+    def test_purge(self):
+        """Старые выполненные задачи удаляются, упавшие остаются."""
+        record.enqueue(value=1)
+        with self.assertLogs("core.tasks", "WARNING"):
+            broken.enqueue(max_attempts=1)
+            tasks.run_pending()
+        later = timezone.now() + tasks.KEEP_DONE * 2
+        self.assertEqual(tasks.purge(later), 1)
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_run_worker_once(self):
+        """run_worker --once выполняет готовые задачи и выходит."""
+        record.enqueue(value=1)
+        record.enqueue(value=2)
+        out = StringIO()
+        call_command("run_worker", "--once", stdout=out)
+        self.assertIn("Выполнено задач: 2", out.getvalue())
+        self.assertEqual(sorted(calls), [1, 2])
+
+
+class TestQueuedPasswordReset(TestCase):
+    def test_reset_email_is_queued(self):
+        """Письмо сброса пароля отправляется обработчиком, а не запросом."""
+        User.objects.create_user(
+            username="reader", email="reader@test.ru", password="secret-123"
+        )
+        response = Client().post(
+            reverse("users:password_reset_form"),
+            {"email": "reader@test.ru"},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        tasks.run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["reader@test.ru"])
@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+from . import throttle
+
+User = get_user_model()
+
+RATES = {"comment": {"user": (2, 60), "ip": (3, 60)}}
+
+
+@override_settings(THROTTLE_RATES=RATES)
+class TestThrottle(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="writer")
+        cls.other = User.objects.create_user(username="other_writer")
+        cls.post = Post.objects.create(text="Тестовый пост", author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bucket(self):
+        """После серии запись разрешается по мере пополнения корзины."""
+        idents = {"user": self.user.pk}
+        self.assertEqual(throttle.take("comment", idents, now=100), 0)
+        self.assertEqual(throttle.take("comment", idents, now=100), 0)
+        self.assertAlmostEqual(
+            throttle.take("comment", idents, now=100.5), 0.5
+        )
+        self.assertEqual(throttle.take("comment", idents, now=101), 0)
+
+    def test_ip_bucket(self):
+        """Корзина адреса общая для всех пользователей с него."""
+        for user in (self.user, self.user, self.other):
+            self.assertEqual(
+                throttle.take(
+                    "comment", {"user": user.pk, "ip": "10.0.0.1"}, now=100
+                ),
+                0,
+            )
+        wait = throttle.take(
+            "comment", {"user": self.other.pk, "ip": "10.0.0.1"}, now=100
+        )
+        self.assertGreater(wait, 0)
+        # Отказ по адресу не тратит жетон пользователя.
+        self.assertEqual(
+            throttle.take("comment", {"user": self.other.pk}, now=100), 0
+        )
+
+    def test_view(self):
+        """Сверх лимита форма отвечает 429 и не пишет в базу."""
+        client = Client()
+        client.force_login(self.user)
+        url = reverse("posts:add_comment", args=(self.post.pk,))
+        before = throttle.snapshot().get("comment", {})
+        for _ in range(2):
+            response = client.post(url, {"text": "Комментарий"})
+            self.assertEqual(response.status_code, 302)
+        response = client.post(url, {"text": "Комментарий"})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertEqual(Comment.objects.count(), 2)
+        after = throttle.snapshot()["comment"]
+        self.assertEqual(after["allowed"] - before.get("allowed", 0), 2)
+        self.assertEqual(after["throttled"] - before.get("throttled", 0), 1)
+
+    def test_get_does_not_spend_tokens(self):
+        """GET формы комментария не расходует лимит записей."""
+        client = Client()
+        client.force_login(self.user)
+        url = reverse("posts:add_comment", args=(self.post.pk,))
+        for _ in range(3):
+            self.assertEqual(client.get(url).status_code, 302)
+        response = client.post(url, {"text": "Комментарий"})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Comment.objects.count(), 1)
@@ -0,0 +1,115 @@
+import functools
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+KEY = "throttle:{}:{}:{}"
+# Без настройки: серия из burst записей, затем per_minute в минуту.
+DEFAULT_RATES = {"user": (10, 6), "ip": (30, 20)}
+
+_stats = defaultdict(Counter)
+_lock = threading.Lock()
+
+
+def rates(scope) -> dict:
+    """{"user": (burst, per_minute), "ip": (...)} для области scope."""
+    return getattr(settings, "THROTTLE_RATES", {}).get(scope, DEFAULT_RATES)
+
+
+def _record(scope, outcome):
+    with _lock:
+        _stats[scope][outcome] += 1
+
+
+def snapshot() -> dict:
+    """Сколько записей пропущено и отклонено с начала работы процесса."""
+    with _lock:
+        return {scope: dict(counts) for scope, counts in _stats.items()}
+
+
+def _refill(state, burst, per_minute, now) -> float:
+    if state is None:
+        return burst
+    tokens, stamp = state
+    return min(burst, tokens + (now - stamp) * per_minute / 60)
+
+
+def take(scope, idents, now=None) -> float:
+    """Забирает по жетону из корзин пользователя и адреса.
+
+    idents - словарь вида корзины -> идентификатор ({"user": 5,
+    "ip": "127.0.0.1"}). Возвращает 0, если запись разрешена, иначе
+    через сколько секунд появится жетон. Корзина хранится в кэше парой
+    (жетоны, время) и пополняется при чтении, так что проверка - одно
+    чтение и одна запись в кэш. Между чтением и записью другой процесс
+    может успеть забрать тот же жетон: лимит приблизительный.
+    """
+    now = time.time() if now is None else now
+    limits = rates(scope)
+    keys = {
+        KEY.format(scope, kind, ident): limits[kind]
+        for kind, ident in idents.items()
+        if kind in limits and ident is not None
+    }
+    states = cache.get_many(keys)
+    tokens = {
+        key: _refill(states.get(key), burst, per_minute, now)
+        for key, (burst, per_minute) in keys.items()
+    }
+    wait = max(
+        (
+            (1 - tokens[key]) * 60 / per_minute
+            for key, (_, per_minute) in keys.items()
+            if tokens[key] < 1
+        ),
+        default=0,
+    )
+    if wait:
+        _record(scope, "throttled")
+        return wait
+    for key, (burst, per_minute) in keys.items():
+        # Полная корзина ничем не отличается от отсутствующей.
+        timeout = math.ceil(burst * 60 / per_minute)
+        cache.set(key, (tokens[key] - 1, now), timeout)
+    _record(scope, "allowed")
+    return 0
+
+
+def client_ip(request):
+    return request.META.get("REMOTE_ADDR")
+
+
+def throttle(scope, methods=None):
+    """Декоратор представления: ограничивает частоту записей.
+
+    methods - какие методы считать записью; по умолчанию все. Сверх
+    лимита отвечает 429 с Retry-After, не трогая базу.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                wait = take(
+                    scope,
+                    {"user": request.user.pk, "ip": client_ip(request)},
+                )
+                if wait:
+                    response = render(
+                        request,
+                        "core/429.html",
+                        {"retry_after": math.ceil(wait)},
+                        status=429,
+                    )
+                    response["Retry-After"] = str(math.ceil(wait))
+                    return response
+            return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,180 @@
+import contextvars
+import functools
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.base import Template
+
+# Метрики текущего запроса; None - запрос не попал в выборку.
+current = contextvars.ContextVar("request_metrics", default=None)
+_MISSING = object()
+
+
+class RequestMetrics:
+    """Счётчики и суммарное время операций одного запроса, в секундах."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_time = 0.0
+        self.thumbnails = 0
+        self.thumbnail_time = 0.0
+
+    @property
+    def total_time(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_dict(self) -> dict:
+        return {
+            "total_ms": round(self.total_time * 1000, 2),
+            "db_queries": self.db_queries,
+            "db_ms": round(self.db_time * 1000, 2),
+            "template_ms": round(self.template_time * 1000, 2),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_ms": round(self.cache_time * 1000, 2),
+            "thumbnails": self.thumbnails,
+            "thumbnail_ms": round(self.thumbnail_time * 1000, 2),
+        }
+
+    def server_timing(self) -> str:
+        """Значение заголовка Server-Timing."""
+        return ", ".join(
+            (
+                f'db;dur={self.db_time * 1000:.2f};'
+                f'desc="{self.db_queries} queries"',
+                f"tpl;dur={self.template_time * 1000:.2f}",
+                f'cache;dur={self.cache_time * 1000:.2f};'
+                f'desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+                f'thumb;dur={self.thumbnail_time * 1000:.2f};'
+                f'desc="{self.thumbnails} lookups"',
+                f"total;dur={self.total_time * 1000:.2f}",
+            )
+        )
+
+
+@contextmanager
+def collect():
+    """Включает сбор метрик для кода внутри блока."""
+    metrics = RequestMetrics()
+    token = current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        current.reset(token)
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """Обёртка для connection.execute_wrapper: время и число запросов."""
+    metrics = current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - started
+        metrics.db_queries += 1
+
+
+def _patch(cls, name, make_wrapper):
+    original = getattr(cls, name)
+    if getattr(original, "_timed", False):
+        return
+    wrapper = functools.wraps(original)(make_wrapper(original))
+    wrapper._timed = True
+    setattr(cls, name, wrapper)
+
+
+def _timed_render(render):
+    def wrapper(self, context):
+        metrics = current.get()
+        if metrics is None:
+            return render(self, context)
+        # Вложенные шаблоны ({% include %}) уже входят во время внешнего.
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_time += time.perf_counter() - started
+
+    return wrapper
+
+
+def _timed_cache_get(get):
+    def wrapper(self, key, default=None, version=None):
+        metrics = current.get()
+        if metrics is None:
+            return get(self, key, default, version)
+        started = time.perf_counter()
+        value = get(self, key, _MISSING, version)
+        metrics.cache_time += time.perf_counter() - started
+        if value is _MISSING:
+            metrics.cache_misses += 1
+            return default
+        metrics.cache_hits += 1
+        return value
+
+    return wrapper
+
+
+def _timed_cache_get_many(get_many):
+    def wrapper(self, keys, version=None):
+        metrics = current.get()
+        if metrics is None:
+            return get_many(self, keys, version)
+        keys = list(keys)
+        started = time.perf_counter()
+        values = get_many(self, keys, version)
+        metrics.cache_time += time.perf_counter() - started
+        metrics.cache_hits += len(values)
+        metrics.cache_misses += len(keys) - len(values)
+        return values
+
+    return wrapper
+
+
+def _timed_thumbnail(get_thumbnail):
+    def wrapper(self, *args, **kwargs):
+        metrics = current.get()
+        if metrics is None:
+            return get_thumbnail(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return get_thumbnail(self, *args, **kwargs)
+        finally:
+            metrics.thumbnail_time += time.perf_counter() - started
+            metrics.thumbnails += 1
+
+    return wrapper
+
+
+def install():
+    """Подключает замеры к шаблонам, кэшам и миниатюрам.
+
+    У этих подсистем нет хуков вроде execute_wrapper, поэтому методы
+    оборачиваются на уровне классов, один раз на процесс. Вне collect()
+    обёртки только проверяют contextvar.
+    """
+    _patch(Template, "render", _timed_render)
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        _patch(backend, "get", _timed_cache_get)
+        _patch(backend, "get_many", _timed_cache_get_many)
+    try:
+        from sorl.thumbnail.conf import settings as thumbnail_settings
+        from sorl.thumbnail.helpers import get_module_class
+    except ImportError:
+        return
+    backend = get_module_class(thumbnail_settings.THUMBNAIL_BACKEND)
+    _patch(backend, "get_thumbnail", _timed_thumbnail)
@@ -25,6 +25,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.StaticFilesMiddleware",
+    "core.middleware.ServerTimingMiddleware",
+    "core.middleware.ReplicaPinMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -59,8 +62,21 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
-    }
+    },
+    # Реплика только для чтения. По умолчанию - тот же файл через
+    # отдельное соединение; копию базы можно указать в REPLICA_DB_NAME.
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get(
+            "REPLICA_DB_NAME", os.path.join(BASE_DIR, "db.sqlite3")
+        ),
+        "TEST": {"MIRROR": "default"},
+    },
 }
+DATABASE_ROUTERS = ["core.db_router.PrimaryReplicaRouter"]
+DATABASE_REPLICAS = ["replica"]
+# Сколько секунд после записи чтения клиента идут в основную базу.
+REPLICA_PIN_SECONDS = 5
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -89,6 +105,12 @@ USE_TZ = True
 
 STATIC_URL = "/static/"
 STATICFILES_DIRS = (os.path.join(BASE_DIR, "static"),)
+STATIC_ROOT = os.path.join(BASE_DIR, "static_root")
+# collectstatic добавляет к именам хеш содержимого и сжатые копии;
+# такие файлы StaticFilesMiddleware отдаёт с кэшированием на год.
+STATICFILES_STORAGE = "core.storage.CompressedManifestStaticFilesStorage"
+# Сколько секунд браузер кэширует статику без хеша в имени.
+STATIC_MAX_AGE = 60
 
 LOGIN_URL = "users:login"
 LOGIN_REDIRECT_URL = "posts:index"
@@ -100,9 +122,38 @@ CSRF_FAILURE_VIEW = "core.views.csrf_failure"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# Загрузки крупнее порога пишутся во временный файл, а не в память.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+
+# Доля запросов, для которых считаются метрики Server-Timing;
+# для отдельных маршрутов задаётся по имени, например "posts:index".
+SERVER_TIMING_SAMPLE_RATE = 1.0
+SERVER_TIMING_VIEW_SAMPLE_RATES = {}
+SERVER_TIMING_LOG = False
 
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
     }
-}
\ No newline at end of file
+}
+# Сессии читаются из кэша, в базу только пишутся.
+SESSION_ENGINE = "core.sessions"
+# ModelBackend оставлен для сессий, созданных до кэширования пользователей.
+AUTHENTICATION_BACKENDS = [
+    "core.auth.CachedModelBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+# Сколько секунд процесс помнит пользователя сессии.
+USER_CACHE_SECONDS = 30
+
+# Ограничение частоты записей: (серия, жетонов в минуту) для корзины
+# пользователя и корзины IP-адреса. Адрес берётся из REMOTE_ADDR.
+THROTTLE_RATES = {
+    "post": {"user": (5, 2), "ip": (20, 10)},
+    "comment": {"user": (10, 6), "ip": (30, 20)},
+    "follow": {"user": (20, 10), "ip": (60, 30)},
+}
+
+# Фоновые задачи core.tasks выполняет manage.py run_worker; с True
+# они выполняются сразу при постановке, в том же процессе.
+TASKS_EAGER = False
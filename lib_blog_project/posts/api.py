@@ -0,0 +1,225 @@
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.paginator import Paginator
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition
+
+from core.paginator import CursorPaginator
+from . import etags, follow_graph, timeline, trending
+from .models import Comment, Group, Post
+
+User = get_user_model()
+
+POSTS_PER_PAGE = 20
+COMMENTS_PER_PAGE = 50
+USERS_PER_PAGE = 100
+# Поля поста для values(): в ответ попадают только они, без моделей.
+POST_FIELDS = (
+    "text",
+    "image",
+    "comment_count",
+    "author__username",
+    "group__slug",
+)
+COMMENT_FIELDS = ("id", "pub_date", "text", "author__username")
+USER_FIELDS = ("username", "first_name", "last_name")
+TRENDING_FIELDS = (
+    "rank",
+    "score",
+    "post__id",
+    "post__pub_date",
+    *(f"post__{field}" for field in POST_FIELDS),
+)
+JSON_OPTIONS = {"separators": (",", ":"), "ensure_ascii": False}
+
+
+def json_response(data, status=200) -> JsonResponse:
+    return JsonResponse(data, status=status, json_dumps_params=JSON_OPTIONS)
+
+
+def serialize_post(row) -> dict:
+    image = row["image"]
+    return {
+        "id": row["id"],
+        "pub_date": row["pub_date"].isoformat(),
+        "text": row["text"],
+        "image": default_storage.url(image) if image else None,
+        "comments": row["comment_count"],
+        "author": row["author__username"],
+        "group": row["group__slug"],
+    }
+
+
+def serialize_comment(row) -> dict:
+    return {
+        "id": row["id"],
+        "pub_date": row["pub_date"].isoformat(),
+        "text": row["text"],
+        "author": row["author__username"],
+    }
+
+
+def serialize_trending(row) -> dict:
+    post = {
+        key[len("post__"):]: value
+        for key, value in row.items()
+        if key.startswith("post__")
+    }
+    return {
+        "rank": row["rank"],
+        "score": round(row["score"], 3),
+        **serialize_post(post),
+    }
+
+
+def serialize_user(row) -> dict:
+    return {
+        "username": row["username"],
+        "name": f"{row['first_name']} {row['last_name']}".strip(),
+    }
+
+
+def page_response(paginator, cursor, serialize, **extra) -> JsonResponse:
+    page = paginator.get_page(cursor)
+    return json_response(
+        {
+            **extra,
+            "results": [serialize(row) for row in page],
+            "next": page.next_cursor,
+            "previous": page.previous_cursor,
+        }
+    )
+
+
+def post_page(request, queryset, **extra) -> JsonResponse:
+    paginator = CursorPaginator(
+        queryset.values("id", "pub_date", *POST_FIELDS), POSTS_PER_PAGE
+    )
+    return page_response(
+        paginator, request.GET.get("cursor"), serialize_post, **extra
+    )
+
+
+@condition(etag_func=etags.index)
+def index(request):
+    return post_page(request, Post.objects.all())
+
+
+@condition(etag_func=etags.group_posts)
+def group_posts(request, slug):
+    group = get_object_or_404(
+        Group.objects.values("id", "title", "slug", "description"), slug=slug
+    )
+    return post_page(
+        request,
+        Post.objects.filter(group=group["id"]),
+        group={key: group[key] for key in ("title", "slug", "description")},
+    )
+
+
+@condition(etag_func=etags.profile)
+def profile(request, username):
+    author = get_object_or_404(
+        User.objects.values(
+            "id",
+            "username",
+            "first_name",
+            "last_name",
+            "counters__post_count",
+            "counters__follower_count",
+            "counters__following_count",
+        ),
+        username=username,
+    )
+    return post_page(
+        request,
+        Post.objects.filter(author=author["id"]),
+        author={
+            "username": author["username"],
+            "name": f"{author['first_name']} {author['last_name']}".strip(),
+            "posts": author["counters__post_count"] or 0,
+            "followers": author["counters__follower_count"] or 0,
+            "following": author["counters__following_count"] or 0,
+        },
+    )
+
+
+def user_page(request, user_ids) -> JsonResponse:
+    """Страница списка пользователей по множеству id, одним запросом."""
+    page = Paginator(sorted(user_ids), USERS_PER_PAGE).get_page(
+        request.GET.get("page")
+    )
+    users = (
+        User.objects.filter(pk__in=page.object_list)
+        .order_by("pk")
+        .values(*USER_FIELDS)
+    )
+    return json_response(
+        {
+            "count": page.paginator.count,
+            "results": [serialize_user(row) for row in users],
+            "next": page.next_page_number() if page.has_next() else None,
+            "previous": (
+                page.previous_page_number() if page.has_previous() else None
+            ),
+        }
+    )
+
+
+@condition(etag_func=etags.follow_list)
+def followers(request, username):
+    author = get_object_or_404(User.objects.only("pk"), username=username)
+    return user_page(request, follow_graph.follower_ids(author.pk))
+
+
+@condition(etag_func=etags.follow_list)
+def following(request, username):
+    user = get_object_or_404(User.objects.only("pk"), username=username)
+    return user_page(request, follow_graph.following_ids(user.pk))
+
+
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return json_response({"detail": "Нужно войти в систему."}, 401)
+    paginator = timeline.follow_paginator(
+        request.user, POSTS_PER_PAGE, fields=POST_FIELDS
+    )
+    return page_response(paginator, request.GET.get("cursor"), serialize_post)
+
+
+def trending_response(group_id=None) -> JsonResponse:
+    rows = trending.top(group_id).values(*TRENDING_FIELDS)
+    return json_response(
+        {"results": [serialize_trending(row) for row in rows]}
+    )
+
+
+@condition(etag_func=etags.trending)
+def trending_posts(request):
+    return trending_response()
+
+
+@condition(etag_func=etags.group_trending)
+def group_trending(request, slug):
+    group = get_object_or_404(Group.objects.only("pk"), slug=slug)
+    return trending_response(group.pk)
+
+
+@condition(etag_func=etags.post_detail)
+def post_detail(request, post_id):
+    post = get_object_or_404(
+        Post.objects.values("id", "pub_date", *POST_FIELDS), pk=post_id
+    )
+    return json_response(serialize_post(post))
+
+
+@condition(etag_func=etags.post_detail)
+def post_comments(request, post_id):
+    get_object_or_404(Post.objects.only("pk"), pk=post_id)
+    comments = Comment.objects.filter(post=post_id).values(*COMMENT_FIELDS)
+    return page_response(
+        CursorPaginator(comments, COMMENTS_PER_PAGE),
+        request.GET.get("cursor"),
+        serialize_comment,
+    )
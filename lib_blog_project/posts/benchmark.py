@@ -0,0 +1,278 @@
+import random
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+from faker import Faker
+from PIL import Image
+
+from . import counters, thumbnails, timeline
+from .models import Comment, Follow, Group, Post, UserCounter
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+# Соотношения объёмов, когда задано только число постов.
+POSTS_PER_USER = 20
+POSTS_PER_GROUP = 200
+COMMENTS_PER_POST = 2
+FOLLOWS_PER_USER = 10
+IMAGE_RATIO = 0.1
+IMAGE_FILES = 5
+
+
+def volumes_for(posts) -> dict:
+    """Объёмы данных, пропорциональные числу постов."""
+    return {
+        "users": max(10, posts // POSTS_PER_USER),
+        "groups": max(3, posts // POSTS_PER_GROUP),
+        "posts": posts,
+        "comments": posts * COMMENTS_PER_POST,
+        "follows_per_user": FOLLOWS_PER_USER,
+        "image_ratio": IMAGE_RATIO,
+    }
+
+
+def _batched(objects, batch_size):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _bulk_create(model, objects, batch_size, **kwargs):
+    for batch in _batched(objects, batch_size):
+        model.objects.bulk_create(batch, **kwargs)
+
+
+def _create_images(count, fake) -> list:
+    names = []
+    for i in range(count):
+        buffer = BytesIO()
+        Image.new("RGB", (1200, 800), fake.color()).save(buffer, "JPEG")
+        name = default_storage.save(
+            f"posts/bench_{i}.jpg", ContentFile(buffer.getvalue())
+        )
+        thumbnails.generate(name)
+        names.append(name)
+    return names
+
+
+def seed(
+    users,
+    groups,
+    posts,
+    comments,
+    follows_per_user=FOLLOWS_PER_USER,
+    image_ratio=IMAGE_RATIO,
+    batch_size=BATCH_SIZE,
+    random_seed=None,
+):
+    """Добавляет в базу синтетических пользователей, посты и подписки.
+
+    Записи вставляются пачками через bulk_create, который не вызывает
+    сигналов, поэтому счётчики и ленты подписок пересчитываются в конце.
+    """
+    rng = random.Random(random_seed)
+    fake = Faker("ru_RU")
+    fake.seed_instance(random_seed)
+    password = make_password(None)
+    prefix = f"bench{rng.randrange(10 ** 6)}"
+
+    _bulk_create(
+        User,
+        (
+            User(
+                username=f"{prefix}_{i}",
+                first_name=fake.first_name(),
+                last_name=fake.last_name(),
+                password=password,
+            )
+            for i in range(users)
+        ),
+        batch_size,
+    )
+    _bulk_create(
+        Group,
+        (
+            Group(
+                title=fake.sentence(nb_words=3)[:200],
+                slug=f"{prefix}-{i}",
+                description=fake.paragraph(),
+            )
+            for i in range(groups)
+        ),
+        batch_size,
+    )
+    user_ids = list(
+        User.objects.filter(username__startswith=f"{prefix}_").values_list(
+            "pk", flat=True
+        )
+    )
+    group_ids = list(
+        Group.objects.filter(slug__startswith=f"{prefix}-").values_list(
+            "pk", flat=True
+        )
+    )
+    images = _create_images(IMAGE_FILES, fake) if image_ratio else []
+
+    _bulk_create(
+        Post,
+        (
+            Post(
+                text=fake.text(max_nb_chars=300),
+                author_id=rng.choice(user_ids),
+                group_id=rng.choice(group_ids) if rng.random() < 0.7 else None,
+                image=(
+                    rng.choice(images)
+                    if images and rng.random() < image_ratio
+                    else ""
+                ),
+            )
+            for _ in range(posts)
+        ),
+        batch_size,
+    )
+    if posts and comments:
+        # bulk_create в SQLite не возвращает id, поэтому посты этого
+        # прогона находятся по его авторам.
+        post_ids = list(
+            Post.objects.filter(author__username__startswith=f"{prefix}_")
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        _bulk_create(
+            Comment,
+            (
+                Comment(
+                    post_id=rng.choice(post_ids),
+                    author_id=rng.choice(user_ids),
+                    text=fake.sentence(),
+                )
+                for _ in range(comments)
+            ),
+            batch_size,
+        )
+    follows = min(follows_per_user, len(user_ids) - 1)
+    _bulk_create(
+        Follow,
+        (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id in user_ids
+            for author_id in [
+                pk for pk in rng.sample(user_ids, follows + 1) if pk != user_id
+            ][:follows]
+        ),
+        batch_size,
+        ignore_conflicts=True,
+    )
+    counters.rebuild()
+    timeline.rebuild()
+    cache.clear()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def bench_targets():
+    """Адреса самых нагруженных страниц при текущих данных."""
+    busiest_group = Group.objects.order_by("-post_count").first()
+    busiest_author = UserCounter.objects.order_by("-post_count").first()
+    busiest_reader = UserCounter.objects.order_by("-following_count").first()
+    busiest_post = Post.objects.order_by("-comment_count").first()
+    targets = {"index": (reverse("posts:index"), None)}
+    if busiest_group is not None:
+        targets["group_posts"] = (
+            reverse("posts:group_list", args=(busiest_group.slug,)),
+            None,
+        )
+    if busiest_author is not None:
+        targets["profile"] = (
+            reverse("posts:profile", args=(busiest_author.user.username,)),
+            None,
+        )
+    if busiest_post is not None:
+        targets["post_detail"] = (
+            reverse("posts:post_detail", args=(busiest_post.pk,)),
+            None,
+        )
+    if busiest_reader is not None:
+        targets["follow_index"] = (
+            reverse("posts:follow_index"),
+            busiest_reader.user,
+        )
+    return targets
+
+
+class QueryCounter:
+    """Обёртка execute_wrapper, считающая запросы."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(repeat=20, warm=False) -> dict:
+    """Задержка, число запросов и пик памяти для каждой страницы.
+
+    Без warm перед каждым запросом очищается кэш, то есть меряется
+    полная отрисовка страницы. Пик памяти снимается отдельным запросом:
+    tracemalloc заметно замедляет выполнение. Запросы считаются по всем
+    базам: чтения вне транзакции уходят на реплику.
+    """
+    results = {}
+    for name, (url, user) in bench_targets().items():
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        client.get(url)
+        timings = []
+        query_counts = []
+        for _ in range(repeat):
+            if not warm:
+                cache.clear()
+            counter = QueryCounter()
+            with ExitStack() as stack:
+                for alias_connection in connections.all():
+                    stack.enter_context(
+                        alias_connection.execute_wrapper(counter)
+                    )
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            query_counts.append(counter.count)
+        if not warm:
+            cache.clear()
+        tracemalloc.start()
+        client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = {
+            "url": url,
+            "status": response.status_code,
+            "p50_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(percentile(timings, 0.95), 3),
+            "queries": max(query_counts),
+            "peak_memory_kb": round(peak / 1024, 1),
+        }
+    return results
@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Group, Post, UserCounter
+
+User = get_user_model()
+
+LOOKUP_BATCH_SIZE = 500
+
+
+def for_user(user) -> UserCounter:
+    """Счётчики пользователя; если строки ещё нет - нулевые."""
+    try:
+        return user.counters
+    except UserCounter.DoesNotExist:
+        return UserCounter(user=user)
+
+
+def _add(field, delta):
+    # Разошедшийся счётчик не уходит ниже нуля: поле PositiveInteger.
+    if delta < 0:
+        return Greatest(F(field) + delta, 0)
+    return F(field) + delta
+
+
+def change_user(user_id, **deltas):
+    """Атомарно меняет счётчики пользователя на заданные величины."""
+    changes = {field: _add(field, delta) for field, delta in deltas.items()}
+    updated = UserCounter.objects.filter(user=user_id).update(**changes)
+    if not updated and all(delta > 0 for delta in deltas.values()):
+        UserCounter.objects.get_or_create(user_id=user_id)
+        UserCounter.objects.filter(user=user_id).update(**changes)
+
+
+def change_group(group_id, delta):
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            post_count=_add("post_count", delta)
+        )
+
+
+def change_post(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comment_count=_add("comment_count", delta)
+    )
+
+
+def _count(queryset, field):
+    """Подзапрос с числом строк queryset, сгруппированных по field."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def _in_batches(queryset, ids):
+    """queryset целиком или частями по pk__in, если заданы ids."""
+    if ids is None:
+        yield queryset
+        return
+    ids = list(ids)
+    # У SQLite есть предел на число параметров запроса.
+    for start in range(0, len(ids), LOOKUP_BATCH_SIZE):
+        yield queryset.filter(pk__in=ids[start:start + LOOKUP_BATCH_SIZE])
+
+
+@transaction.atomic
+def rebuild(user_ids=None, group_ids=None, post_ids=None):
+    """Пересчитывает счётчики с нуля по данным таблиц.
+
+    По умолчанию пересчитывается всё; если задан список id, только
+    эти пользователи, группы или посты (пустой список - ничего).
+    """
+    users = User.objects.values_list("pk", flat=True)
+    for batch in _in_batches(users, user_ids):
+        UserCounter.objects.bulk_create(
+            (UserCounter(user_id=pk) for pk in batch),
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+    # Первичный ключ UserCounter совпадает с id пользователя.
+    for batch in _in_batches(UserCounter.objects.all(), user_ids):
+        batch.update(
+            post_count=_count(Post.objects, "author"),
+            follower_count=_count(Follow.objects, "author"),
+            following_count=_count(Follow.objects, "user"),
+        )
+    for batch in _in_batches(Group.objects.all(), group_ids):
+        batch.update(post_count=_count(Post.objects, "group"))
+    for batch in _in_batches(Post.objects.all(), post_ids):
+        batch.update(comment_count=_count(Comment.objects, "post"))
@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+
+from . import feed_cache
+from .models import Group, Post
+
+User = get_user_model()
+
+# Функции для декоратора condition: вычисляют ETag страницы до того,
+# как представление начнёт выбирать посты. Каждой нужно не больше одного
+# запроса по индексу. None означает, что ETag не ставится: объекта нет
+# или данные реплики могут отставать (feed_cache.lagging).
+
+
+def _group_id(slug):
+    return Group.objects.filter(slug=slug).values_list("pk", flat=True).first()
+
+
+def _author_id(username):
+    return (
+        User.objects.filter(username=username)
+        .values_list("pk", flat=True)
+        .first()
+    )
+
+
+def index(request):
+    return feed_cache.etag(request, feed_cache.INDEX_SCOPE)
+
+
+def group_posts(request, slug):
+    group_id = _group_id(slug)
+    if group_id is None:
+        return None
+    return feed_cache.etag(request, feed_cache.group_scope(group_id))
+
+
+def profile(request, username):
+    author_id = _author_id(username)
+    if author_id is None:
+        return None
+    scopes = [
+        feed_cache.author_scope(author_id),
+        feed_cache.profile_scope(author_id),
+    ]
+    # В своём профиле пользователь видит рекомендации подписок.
+    if author_id == request.user.pk:
+        scopes.append(feed_cache.RECOMMENDATIONS_SCOPE)
+    return feed_cache.etag(request, *scopes)
+
+
+def follow_list(request, username):
+    author_id = _author_id(username)
+    if author_id is None:
+        return None
+    return feed_cache.etag(request, feed_cache.profile_scope(author_id))
+
+
+def trending(request):
+    # В топе видны тексты и число комментариев, поэтому ETag меняется
+    # и после пересчёта топа, и после любой правки постов.
+    return feed_cache.etag(
+        request, feed_cache.TRENDING_SCOPE, feed_cache.INDEX_SCOPE
+    )
+
+
+def group_trending(request, slug):
+    if _group_id(slug) is None:
+        return None
+    return trending(request)
+
+
+def post_detail(request, post_id):
+    author_id = (
+        Post.objects.filter(pk=post_id)
+        .values_list("author", flat=True)
+        .first()
+    )
+    if author_id is None:
+        return None
+    # На странице поста выводится число постов автора и его имя.
+    return feed_cache.etag(
+        request,
+        feed_cache.post_scope(post_id),
+        feed_cache.author_scope(author_id),
+        feed_cache.profile_scope(author_id),
+    )
+
+
+# Ленты RSS/Atom одинаковы для всех читателей.
+
+
+def index_feed(request, feed_format):
+    return feed_cache.etag(request, feed_cache.INDEX_SCOPE, per_user=False)
+
+
+def group_feed(request, slug, feed_format):
+    group_id = _group_id(slug)
+    if group_id is None:
+        return None
+    return feed_cache.etag(
+        request, feed_cache.group_scope(group_id), per_user=False
+    )
+
+
+def author_feed(request, username, feed_format):
+    author_id = _author_id(username)
+    if author_id is None:
+        return None
+    return feed_cache.etag(
+        request,
+        feed_cache.author_scope(author_id),
+        feed_cache.profile_scope(author_id),
+        per_user=False,
+    )
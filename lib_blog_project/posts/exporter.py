@@ -0,0 +1,109 @@
+import gzip
+import json
+from collections import Counter
+
+from .models import Comment, Follow, Group, Post
+
+CHUNK_SIZE = 2000
+
+
+def open_output(path):
+    """Открывает файл на запись текста, .gz - со сжатием."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+def _since(queryset, since):
+    # Нестрогое сравнение: записи с той же датой, появившиеся после
+    # прошлой выгрузки, не теряются, а повторы import_posts пропустит.
+    if since is None:
+        return queryset
+    return queryset.filter(pub_date__gte=since)
+
+
+def records(since=None, chunk_size=CHUNK_SIZE):
+    """Записи в формате import_posts, по одной, в порядке зависимостей.
+
+    Строки читаются через iterator() без кэша QuerySet, поэтому память
+    не зависит от размера базы. С since выгружаются только посты
+    и комментарии не старше этой даты; группы и подписки - всегда.
+    """
+    groups = Group.objects.order_by("pk").values_list(
+        "slug", "title", "description"
+    )
+    for slug, title, description in groups.iterator(chunk_size):
+        yield {
+            "type": "group",
+            "slug": slug,
+            "title": title,
+            "description": description,
+        }
+
+    posts = _since(Post.objects.order_by("pk"), since).values_list(
+        "pk", "pub_date", "author__username", "group__slug", "text", "image"
+    )
+    for pk, pub_date, author, group, text, image in posts.iterator(
+        chunk_size
+    ):
+        yield {
+            "type": "post",
+            "id": pk,
+            "pub_date": pub_date,
+            "author": author,
+            "group": group,
+            "text": text,
+            "image": image or None,
+        }
+
+    comments = _since(Comment.objects.order_by("pk"), since).values_list(
+        "pk", "pub_date", "post", "author__username", "text"
+    )
+    for pk, pub_date, post, author, text in comments.iterator(chunk_size):
+        yield {
+            "type": "comment",
+            "id": pk,
+            "pub_date": pub_date,
+            "post": post,
+            "author": author,
+            "text": text,
+        }
+
+    follows = Follow.objects.order_by("pk").values_list(
+        "user__username", "author__username"
+    )
+    for user, author in follows.iterator(chunk_size):
+        yield {"type": "follow", "user": user, "author": author}
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def write_jsonl(stream, rows):
+    """Пишет записи по строке; возвращает (число по типам, водяной знак).
+
+    Водяной знак - наибольшая pub_date среди записей, с неё начинается
+    следующая инкрементальная выгрузка.
+    """
+    stats = Counter()
+    watermark = None
+    for row in rows:
+        line = json.dumps(row, ensure_ascii=False, default=_isoformat)
+        stream.write(line + "\n")
+        stats[row["type"]] += 1
+        pub_date = row.get("pub_date")
+        if pub_date is not None:
+            watermark = max(pub_date, watermark or pub_date)
+    return stats, watermark
+
+
+def media_paths(since=None, chunk_size=CHUNK_SIZE):
+    """Пути картинок выгружаемых постов, без повторов."""
+    images = (
+        _since(Post.objects.exclude(image=""), since)
+        .order_by("image")
+        .values_list("image", flat=True)
+        .distinct()
+    )
+    return images.iterator(chunk_size)
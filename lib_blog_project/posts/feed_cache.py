@@ -0,0 +1,121 @@
+import time
+
+from django.core.cache import cache
+
+from core import db_router
+
+# Фрагменты лент живут долго: устаревшими их делает смена версии,
+# а не истечение срока.
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+VERSION_KEY = "feed_version:{}"
+# Метка «область только что изменилась, реплики могут отставать».
+LAGGING_KEY = "feed_lagging:{}"
+INDEX_SCOPE = "index"
+# Рекомендации подписок: меняются разом после build_recommendations.
+RECOMMENDATIONS_SCOPE = "recommendations"
+# Топы обсуждаемого: меняются разом после update_trending.
+TRENDING_SCOPE = "trending"
+
+
+def group_scope(group_id) -> str:
+    return f"group:{group_id}"
+
+
+def author_scope(author_id) -> str:
+    return f"author:{author_id}"
+
+
+def post_scope(post_id) -> str:
+    return f"post:{post_id}"
+
+
+def profile_scope(user_id) -> str:
+    """Шапка профиля: имя, счётчики и подписки, но не лента постов."""
+    return f"profile:{user_id}"
+
+
+def post_scopes(post, group_ids=()) -> list:
+    """Области кэша, в которых показывается пост."""
+    scopes = [INDEX_SCOPE, author_scope(post.author_id), post_scope(post.pk)]
+    for group_id in {post.group_id, *group_ids}:
+        if group_id is not None:
+            scopes.append(group_scope(group_id))
+    return scopes
+
+
+def _new_version() -> int:
+    # Версия от времени, а не с единицы: если ключ версии вытеснят из
+    # кэша, старые фрагменты не совпадут с новой версией.
+    return int(time.time() * 1000)
+
+
+def get_version(scope) -> int:
+    key = VERSION_KEY.format(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump(*scopes):
+    """Делает недействительными все закэшированные страницы областей.
+
+    Пока реплики догоняют запись (REPLICA_PIN_SECONDS), области помечены
+    как отстающие: страницы, прочитанные с реплики, в это время не
+    кэшируются под новой версией, см. lagging.
+    """
+    if db_router.replicas():
+        # Метка ставится до смены версии: иначе между ними успела бы
+        # закэшироваться страница со старыми данными.
+        cache.set_many(
+            {LAGGING_KEY.format(scope): True for scope in scopes},
+            db_router.pin_seconds(),
+        )
+    for scope in scopes:
+        key = VERSION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), None)
+
+
+def lagging(*scopes) -> bool:
+    """Может ли страница областей, прочитанная сейчас, быть устаревшей.
+
+    Так бывает, если чтения идут на реплику, а области изменились совсем
+    недавно. Клиенты, закреплённые за основной базой, видят свежие данные.
+    """
+    if not db_router.reads_replica():
+        return False
+    keys = [LAGGING_KEY.format(scope) for scope in scopes]
+    return bool(cache.get_many(keys))
+
+
+def feed_context(scope) -> dict:
+    """Переменные для тега {% cache %} ленты.
+
+    Пока реплика может отставать, срок фрагмента нулевой: страница
+    рендерится, но в кэш не попадает.
+    """
+    return {
+        "feed_scope": scope,
+        "feed_version": get_version(scope),
+        "feed_cache_timeout": 0 if lagging(scope) else FEED_CACHE_TIMEOUT,
+    }
+
+
+def etag(request, *scopes, per_user=True) -> str:
+    """Слабый ETag страницы по версиям её областей и пользователю.
+
+    Разметка зависит ещё и от того, кто смотрит (шапка, кнопки), поэтому
+    в метку входит id пользователя. Байтовой идентичности нет (токен CSRF
+    каждый раз маскируется заново), отсюда слабый валидатор. Пока
+    реплика может отставать, ETag не ставится (None): иначе браузер
+    запомнил бы старую страницу под новой меткой.
+    """
+    if lagging(*scopes):
+        return None
+    parts = [str(request.user.pk or 0)] if per_user else []
+    parts += [str(get_version(scope)) for scope in scopes]
+    return 'W/"{}"'.format("-".join(parts))
@@ -0,0 +1,193 @@
+from abc import ABC, abstractmethod
+from io import StringIO
+from itertools import chain
+
+from django.contrib.auth import get_user_model
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.text import Truncator
+from django.utils.xmlutils import SimplerXMLGenerator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from . import etags
+from .models import Group, Post
+
+User = get_user_model()
+
+SITE_TITLE = "LibBlog"
+FEED_ITEMS = 50
+# Читатели лент опрашивают их по расписанию: несколько минут можно
+# отвечать из кэша клиента, дальше хватает проверки ETag.
+FEED_MAX_AGE = 60 * 5
+STREAM_CHUNK_SIZE = 16 * 1024
+ITEM_FIELDS = (
+    "id",
+    "text",
+    "pub_date",
+    "author__username",
+    "author__first_name",
+    "author__last_name",
+    "group__title",
+)
+
+
+class StreamingFeedMixin(ABC):
+    """Пишет ленту частями по мере чтения записей, а не целиком в память.
+
+    Записи не копятся в self.items, поэтому дату обновления ленты
+    нужно передать в latest.
+    """
+
+    item_element = None
+    latest = None
+
+    def latest_post_date(self):
+        return self.latest or super().latest_post_date()
+
+    @abstractmethod
+    def start(self, handler):
+        """Открывает корневые элементы и пишет заголовок ленты."""
+
+    @abstractmethod
+    def end(self, handler):
+        """Закрывает корневые элементы."""
+
+    def stream(self, items):
+        buffer = StringIO()
+        handler = SimplerXMLGenerator(buffer, "utf-8")
+        handler.startDocument()
+        self.start(handler)
+        for kwargs in items:
+            self.add_item(**kwargs)
+            item = self.items.pop()
+            handler.startElement(self.item_element, self.item_attributes(item))
+            self.add_item_elements(handler, item)
+            handler.endElement(self.item_element)
+            if buffer.tell() >= STREAM_CHUNK_SIZE:
+                yield _drain(buffer)
+        self.end(handler)
+        yield _drain(buffer)
+
+
+class AtomFeed(StreamingFeedMixin, Atom1Feed):
+    item_element = "entry"
+
+    def start(self, handler):
+        handler.startElement("feed", self.root_attributes())
+        self.add_root_elements(handler)
+
+    def end(self, handler):
+        handler.endElement("feed")
+
+
+class RssFeed(StreamingFeedMixin, Rss201rev2Feed):
+    item_element = "item"
+
+    def start(self, handler):
+        handler.startElement("rss", self.rss_attributes())
+        handler.startElement("channel", self.root_attributes())
+        self.add_root_elements(handler)
+
+    def end(self, handler):
+        self.endChannelElement(handler)
+        handler.endElement("rss")
+
+
+FEED_FORMATS = {"atom": AtomFeed, "rss": RssFeed}
+
+
+def _drain(buffer) -> str:
+    chunk = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return chunk
+
+
+def feed_items(request, rows):
+    for row in rows:
+        link = request.build_absolute_uri(
+            reverse("posts:post_detail", args=(row["id"],))
+        )
+        name = f"{row['author__first_name']} {row['author__last_name']}"
+        yield {
+            "title": Truncator(row["text"]).chars(80),
+            "link": link,
+            "unique_id": link,
+            "description": row["text"],
+            "pubdate": row["pub_date"],
+            "author_name": name.strip() or row["author__username"],
+            "categories": [row["group__title"]] if row["group__title"] else (),
+        }
+
+
+def feed_response(request, feed_format, posts, title, link, description):
+    """Отдаёт последние посты ленты в формате RSS или Atom потоком."""
+    feed_class = FEED_FORMATS.get(feed_format)
+    if feed_class is None:
+        raise Http404
+    rows = (
+        posts.order_by("-pub_date", "-pk")
+        .values(*ITEM_FIELDS)[:FEED_ITEMS]
+        .iterator()
+    )
+    # Дата обновления нужна до первой записи, она же дата самого
+    # свежего поста.
+    first = next(rows, None)
+    if first is not None:
+        rows = chain((first,), rows)
+    feed = feed_class(
+        title=title,
+        link=request.build_absolute_uri(link),
+        description=description,
+        language="ru",
+        feed_url=request.build_absolute_uri(),
+    )
+    feed.latest = first["pub_date"] if first is not None else None
+    return StreamingHttpResponse(
+        feed.stream(feed_items(request, rows)),
+        content_type=feed.content_type,
+    )
+
+
+@cache_control(public=True, max_age=FEED_MAX_AGE)
+@condition(etag_func=etags.index_feed)
+def index_feed(request, feed_format):
+    return feed_response(
+        request,
+        feed_format,
+        Post.objects.all(),
+        SITE_TITLE,
+        reverse("posts:index"),
+        "Последние посты",
+    )
+
+
+@cache_control(public=True, max_age=FEED_MAX_AGE)
+@condition(etag_func=etags.group_feed)
+def group_feed(request, slug, feed_format):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(
+        request,
+        feed_format,
+        group.posts.all(),
+        f"{SITE_TITLE}: {group.title}",
+        reverse("posts:group_list", args=(group.slug,)),
+        group.description,
+    )
+
+
+@cache_control(public=True, max_age=FEED_MAX_AGE)
+@condition(etag_func=etags.author_feed)
+def author_feed(request, username, feed_format):
+    author = get_object_or_404(User, username=username)
+    return feed_response(
+        request,
+        feed_format,
+        Post.objects.filter(author=author),
+        f"{SITE_TITLE}: {author.get_full_name() or author.username}",
+        reverse("posts:profile", args=(author.username,)),
+        f"Посты пользователя {author.username}",
+    )
@@ -0,0 +1,74 @@
+from django.core.cache import cache
+
+from .models import Follow
+
+# Множества id подписок и подписчиков пользователя, общие для всех
+# процессов через кэш. Их обновляют сигналы подписки.
+FOLLOWING_KEY = "follow_graph:following:{}"
+FOLLOWERS_KEY = "follow_graph:followers:{}"
+GRAPH_TIMEOUT = 60 * 60 * 24
+
+
+def _load(key, queryset) -> frozenset:
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(queryset)
+        cache.set(key, ids, GRAPH_TIMEOUT)
+    return ids
+
+
+def following_ids(user_id) -> frozenset:
+    """id авторов, на которых подписан пользователь."""
+    return _load(
+        FOLLOWING_KEY.format(user_id),
+        Follow.objects.filter(user=user_id)
+        .order_by()
+        .values_list("author", flat=True),
+    )
+
+
+def follower_ids(author_id) -> frozenset:
+    """id подписчиков автора."""
+    return _load(
+        FOLLOWERS_KEY.format(author_id),
+        Follow.objects.filter(author=author_id)
+        .order_by()
+        .values_list("user", flat=True),
+    )
+
+
+def is_following(user, author_id) -> bool:
+    if not user.is_authenticated:
+        return False
+    return author_id in following_ids(user.pk)
+
+
+def followed_among(user, author_ids) -> set:
+    """Какие из авторов страницы есть в подписках пользователя."""
+    if not user.is_authenticated:
+        return set()
+    return following_ids(user.pk).intersection(author_ids)
+
+
+def refresh(user_id, author_id):
+    """Обновляет множества после подписки или отписки.
+
+    Подписки пользователя сразу перечитываются: он видит результат на
+    следующей же странице. Подписчиков автора бывает много, их множество
+    просто сбрасывается и загрузится при первом обращении.
+    """
+    cache.delete_many(
+        [FOLLOWING_KEY.format(user_id), FOLLOWERS_KEY.format(author_id)]
+    )
+    following_ids(user_id)
+
+
+def forget(*user_ids):
+    """Сбрасывает множества пользователей после загрузки в обход сигналов."""
+    cache.delete_many(
+        [
+            key.format(user_id)
+            for user_id in user_ids
+            for key in (FOLLOWING_KEY, FOLLOWERS_KEY)
+        ]
+    )
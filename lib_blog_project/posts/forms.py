@@ -1,5 +1,6 @@
 from django import forms
 
+from . import images
 from .models import Post, Comment
 
 
@@ -8,6 +9,9 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ("text", "group", "image")
 
+    def clean_image(self):
+        return images.ingest(self.cleaned_data.get("image"))
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
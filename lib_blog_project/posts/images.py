@@ -0,0 +1,92 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image, ImageOps
+
+ALLOWED_FORMATS = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "GIF": "image/gif",
+}
+MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+# Ограничение на число пикселей проверяется по заголовку до декодирования
+# и защищает от «бомб» - маленьких файлов с огромным растром.
+MAX_PIXELS = 24_000_000
+# JPEG уменьшается уже при декодировании, а PNG и GIF декодируются
+# целиком, поэтому для них порог ниже: 12 Мп в RGBA - около 48 МБ.
+MAX_DECODED_PIXELS = 12_000_000
+# Оригиналы крупнее уменьшаются: в лентах картинка не шире 960 точек.
+MAX_DIMENSION = 2048
+
+
+def ingest(upload):
+    """Проверяет загруженное изображение и приводит его к рабочему размеру.
+
+    Формат и размеры читаются из заголовка, без декодирования растра.
+    JPEG декодируется сразу в уменьшенном масштабе (draft); PNG и GIF
+    декодируются целиком, поэтому их предельный размер меньше.
+    Результат пишется во временный файл на диске без метаданных EXIF.
+    """
+    if not isinstance(upload, UploadedFile):
+        return upload
+    if upload.size > MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            "Файл больше %(limit)d МБ.",
+            code="file_too_large",
+            params={"limit": MAX_UPLOAD_SIZE // (1024 * 1024)},
+        )
+    upload.seek(0)
+    image = Image.open(upload)
+    if image.format not in ALLOWED_FORMATS:
+        raise ValidationError(
+            "Поддерживаются только JPEG, PNG и GIF.", code="invalid_format"
+        )
+    width, height = image.size
+    limit = MAX_PIXELS
+    if image.format != "JPEG":
+        limit = min(limit, MAX_DECODED_PIXELS)
+    if width * height > limit:
+        raise ValidationError(
+            "Изображение слишком большое: %(width)d×%(height)d.",
+            code="too_many_pixels",
+            params={"width": width, "height": height},
+        )
+    # Анимацию при пересохранении не сохранить, такие GIF остаются как есть.
+    if getattr(image, "is_animated", False):
+        upload.seek(0)
+        return upload
+
+    image_format = image.format
+    # Без явного draft thumbnail уменьшает JPEG при декодировании, только
+    # если оригинал больше удвоенного размера, то есть почти никогда.
+    # draft берёт масштаб, при котором обе стороны не меньше заданных,
+    # поэтому ему передаётся итоговый размер, а не квадрат.
+    scale = MAX_DIMENSION / max(width, height)
+    if scale < 1:
+        image.draft(
+            image.mode, (round(width * scale), round(height * scale))
+        )
+    image.thumbnail((MAX_DIMENSION, MAX_DIMENSION), reducing_gap=2.0)
+    image = ImageOps.exif_transpose(image)
+
+    name, _ = os.path.splitext(os.path.basename(upload.name))
+    extension = "jpg" if image_format == "JPEG" else image_format.lower()
+    result = File(
+        tempfile.TemporaryFile(dir=settings.FILE_UPLOAD_TEMP_DIR),
+        name=f"{name}.{extension}",
+    )
+    # PNG иначе записывает обратно image.info["exif"].
+    save_options = {"format": image_format, "exif": b""}
+    if image_format == "JPEG":
+        save_options.update(quality=85, optimize=True)
+    icc_profile = image.info.get("icc_profile")
+    if icc_profile:
+        save_options["icc_profile"] = icc_profile
+    image.save(result, **save_options)
+    result.size = result.tell()
+    result.seek(0)
+    return result
@@ -0,0 +1,77 @@
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from posts import benchmark, query_audit, trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Наполняет тестовую базу синтетическими данными, открывает все "
+        "страницы и печатает EXPLAIN QUERY PLAN каждого запроса. "
+        "Завершается ошибкой, если запрос читает таблицу целиком или "
+        "сортирует во временном B-дереве."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--posts",
+            type=int,
+            default=2000,
+            help="Число постов в тестовых данных.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Начальное значение генератора.",
+        )
+
+    def handle(self, *args, **options):
+        # Как и run_bench, работает на отдельной тестовой базе.
+        media_root = tempfile.mkdtemp()
+        media_override = override_settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            benchmark.seed(
+                random_seed=options["seed"],
+                **benchmark.volumes_for(options["posts"]),
+            )
+            trending.update()
+            results = query_audit.audit()
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+            media_override.disable()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        failures = []
+        for name, (url, status, queries) in results.items():
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(f"{name} {url} [{status}]")
+            )
+            for query in queries:
+                self.stdout.write(f"  {query['sql']}\n")
+                if query["params"]:
+                    self.stdout.write(f"  -- {list(query['params'])}\n")
+                for step in query["plan"]:
+                    line = f"    {step}"
+                    if step in query["problems"]:
+                        line = self.style.ERROR(line)
+                        failures.append(f"{name}: {step}")
+                    self.stdout.write(line + "\n")
+        if failures:
+            raise CommandError(
+                "Запросы без подходящего индекса:\n" + "\n".join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS("Все запросы идут по индексам."))
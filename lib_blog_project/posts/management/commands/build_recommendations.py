@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает рекомендации подписок по графу подписок. "
+        "Запускается по расписанию, например раз в сутки."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=recommendations.TOP_K,
+            help="Сколько кандидатов хранить для каждого пользователя.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        stats = recommendations.build(options["limit"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Рекомендаций: {stats['recommendations']} для "
+                f"{stats['users']} пользователей за "
+                f"{time.perf_counter() - started:.1f} с."
+            )
+        )
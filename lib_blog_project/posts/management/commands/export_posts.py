@@ -0,0 +1,134 @@
+import io
+import os
+import tarfile
+import tempfile
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import exporter
+
+ARCHIVE_MODES = {".tar": "w", ".tar.gz": "w:gz", ".tgz": "w:gz"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает группы, посты, комментарии и подписки в JSONL "
+        "(формат import_posts) потоком, без загрузки базы в память."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "output",
+            help=(
+                "Файл .jsonl или .jsonl.gz, архив .tar/.tar.gz "
+                "(с --with-media) или - для вывода в консоль."
+            ),
+        )
+        parser.add_argument(
+            "--since",
+            help="Выгрузить только посты и комментарии не старше даты.",
+        )
+        parser.add_argument(
+            "--watermark-file",
+            help=(
+                "Файл с датой прошлой выгрузки: она берётся как --since, "
+                "а после выгрузки туда пишется новая."
+            ),
+        )
+        parser.add_argument(
+            "--with-media",
+            action="store_true",
+            help="Положить в архив и картинки постов.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=exporter.CHUNK_SIZE,
+            help="Сколько строк читать из базы за раз.",
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        since = self.get_since(options)
+        rows = exporter.records(since, options["chunk_size"])
+        if options["with_media"]:
+            mode = next(
+                (
+                    mode
+                    for suffix, mode in ARCHIVE_MODES.items()
+                    if output.endswith(suffix)
+                ),
+                None,
+            )
+            if mode is None:
+                raise CommandError(
+                    "С --with-media нужен архив .tar или .tar.gz."
+                )
+            stats, watermark = self.write_archive(
+                output, mode, rows, since, options["chunk_size"]
+            )
+        else:
+            if output == "-":
+                stats, watermark = exporter.write_jsonl(self.stdout, rows)
+            else:
+                with exporter.open_output(output) as stream:
+                    stats, watermark = exporter.write_jsonl(stream, rows)
+
+        if options["watermark_file"] and watermark is not None:
+            with open(options["watermark_file"], "w") as watermark_file:
+                watermark_file.write(watermark.isoformat())
+        summary = ", ".join(
+            f"{name}: {count}" for name, count in sorted(stats.items())
+        )
+        self.stderr.write(
+            self.style.SUCCESS(
+                f"Выгружено: {summary or 'ничего'}. Водяной знак: "
+                f"{watermark.isoformat() if watermark else '-'}."
+            )
+        )
+
+    def get_since(self, options):
+        value = options["since"]
+        path = options["watermark_file"]
+        if value is None and path and os.path.exists(path):
+            with open(path) as watermark_file:
+                value = watermark_file.read().strip()
+        if not value:
+            return None
+        since = parse_datetime(value)
+        if since is None:
+            raise CommandError(f"Некорректная дата: {value}")
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def write_archive(self, path, mode, rows, since, chunk_size):
+        """Архив с content.jsonl и картинками в media/."""
+        with tarfile.open(path, mode) as archive:
+            # Размер члена архива нужен заранее, поэтому JSONL сначала
+            # пишется во временный файл на диске.
+            with tempfile.TemporaryFile() as content:
+                text = io.TextIOWrapper(content, encoding="utf-8")
+                stats, watermark = exporter.write_jsonl(text, rows)
+                text.flush()
+                info = tarfile.TarInfo("content.jsonl")
+                info.size = content.tell()
+                content.seek(0)
+                archive.addfile(info, content)
+                text.detach()
+            for name in exporter.media_paths(since, chunk_size):
+                try:
+                    size = default_storage.size(name)
+                    media = default_storage.open(name)
+                except OSError as error:
+                    self.stderr.write(f"{name}: {error}")
+                    continue
+                info = tarfile.TarInfo(f"media/{name}")
+                info.size = size
+                with media:
+                    archive.addfile(info, media)
+                stats["media"] += 1
+        return stats, watermark
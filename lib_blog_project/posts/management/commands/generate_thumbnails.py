@@ -0,0 +1,88 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def _init_worker():
+    django.setup()
+    # Соединения, унаследованные от родителя при fork, использовать нельзя.
+    connections.close_all()
+
+
+def _generate(name, force):
+    try:
+        thumbnails.generate(name, force=force)
+    except Exception as error:
+        return name, str(error)
+    return name, None
+
+
+class Command(BaseCommand):
+    help = "Создаёт миниатюры изображений всех постов в несколько процессов."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Число процессов (по умолчанию - по числу ядер).",
+        )
+        parser.add_argument(
+            "--chunksize",
+            type=int,
+            default=16,
+            help="Сколько изображений передавать процессу за раз.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Удалить существующие миниатюры и создать их заново.",
+        )
+
+    def handle(self, *args, **options):
+        names = (
+            Post.objects.exclude(image="")
+            .values_list("image", flat=True)
+            .distinct()
+            .iterator()
+        )
+        generate = partial(_generate, force=options["force"])
+        workers = options["workers"]
+        if workers > 1:
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker
+            ) as executor:
+                # Executor.map ставит в очередь весь вход сразу, поэтому
+                # имена подаются пачками и память не растёт с их числом.
+                batch_size = workers * options["chunksize"] * 4
+                done = failed = 0
+                for batch in iter(lambda: list(islice(names, batch_size)), []):
+                    results = executor.map(
+                        generate, batch, chunksize=options["chunksize"]
+                    )
+                    batch_done, batch_failed = self.report(results)
+                    done += batch_done
+                    failed += batch_failed
+        else:
+            done, failed = self.report(map(generate, names))
+        self.stdout.write(
+            self.style.SUCCESS(f"Обработано: {done}, с ошибками: {failed}.")
+        )
+
+    def report(self, results):
+        done = failed = 0
+        for name, error in results:
+            done += 1
+            if error is not None:
+                failed += 1
+                self.stderr.write(f"{name}: {error}")
+        return done, failed
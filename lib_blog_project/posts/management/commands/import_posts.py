@@ -0,0 +1,144 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import importer, search
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает группы, посты, комментарии и подписки из JSONL или CSV "
+        "пачками через INSERT OR IGNORE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "source", help="Путь к файлу (.jsonl, .csv, можно .gz) или -."
+        )
+        parser.add_argument(
+            "--format",
+            choices=("jsonl", "csv"),
+            help="Формат; по умолчанию определяется по расширению.",
+        )
+        parser.add_argument(
+            "--type",
+            choices=importer.RECORD_TYPES,
+            help="Тип записей, если в файле нет поля type.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=importer.BATCH_SIZE,
+            help="Сколько строк вставлять одним запросом.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=20_000,
+            help="Сколько записей загружать одной транзакцией.",
+        )
+        parser.add_argument(
+            "--defer-search-index",
+            action="store_true",
+            help=(
+                "Отключить поисковый индекс на время загрузки и построить "
+                "его заново в конце; для больших загрузок вдвое быстрее."
+            ),
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help=(
+                "Файл, куда после каждой транзакции пишется номер "
+                "последней загруженной строки и затронутые записи; с него "
+                "продолжается прерванная загрузка."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        source = options["source"]
+        source_format = options["format"] or self.guess_format(source)
+        checkpoint = options["checkpoint"]
+        state = self.read_checkpoint(checkpoint, source)
+        done = state.get("line", 0)
+        if done:
+            self.stdout.write(f"Продолжение после строки {done}.")
+
+        loader = importer.Importer(batch_size=options["batch_size"])
+        # finish() пересчитывает и то, что загрузили до обрыва.
+        loader.restore(state.get("touched", {}))
+        try:
+            stream = importer.open_source(source)
+        except OSError as error:
+            raise CommandError(error)
+        with stream:
+            if options["defer_search_index"]:
+                search.uninstall()
+            try:
+                self.load(stream, source_format, loader, done, options)
+                loader.finish()
+            finally:
+                # Индекс восстанавливается и при ошибке загрузки: без
+                # таблицы posts_post_fts поиск перестаёт работать.
+                if options["defer_search_index"]:
+                    search.rebuild()
+
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        stats = ", ".join(
+            f"{name}: {count}" for name, count in sorted(loader.stats.items())
+        )
+        self.stdout.write(self.style.SUCCESS(f"Готово. {stats}."))
+
+    def load(self, stream, source_format, loader, done, options):
+        checkpoint = options["checkpoint"]
+        records = (
+            (line, record)
+            for line, record in importer.read_records(
+                stream, source_format, options["type"]
+            )
+            if line > done
+        )
+        for chunk in importer.chunks(records, options["chunk_size"]):
+            loader.load(chunk)
+            self.write_checkpoint(
+                checkpoint, options["source"], chunk[-1][0], loader.touched()
+            )
+            self.report_errors(loader)
+            self.stdout.write(f"Загружено строк: {chunk[-1][0]}.", ending="\r")
+            self.stdout.flush()
+
+    @staticmethod
+    def guess_format(source) -> str:
+        name = source[:-3] if source.endswith(".gz") else source
+        return "csv" if name.endswith(".csv") else "jsonl"
+
+    @staticmethod
+    def read_checkpoint(path, source) -> dict:
+        if not path or not os.path.exists(path):
+            return {}
+        with open(path) as checkpoint_file:
+            state = json.load(checkpoint_file)
+        if state.get("source") != source:
+            raise CommandError(
+                f"Контрольная точка {path} относится к {state.get('source')}."
+            )
+        return state
+
+    @staticmethod
+    def write_checkpoint(path, source, line, touched):
+        if not path:
+            return
+        # Запись через временный файл: обрыв не оставит битый JSON.
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as checkpoint_file:
+            json.dump(
+                {"source": source, "line": line, "touched": touched},
+                checkpoint_file,
+            )
+        os.replace(temporary, path)
+
+    def report_errors(self, loader):
+        for line, error in loader.errors:
+            self.stderr.write(f"Строка {line}: {error}")
+        loader.errors.clear()
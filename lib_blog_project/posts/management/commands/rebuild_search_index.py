@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Восстанавливает триггеры полнотекстового индекса и строит его "
+        "заново. Запускать после миграций, пересоздающих posts_post."
+    )
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            self.stderr.write("Поисковый индекс доступен только в SQLite.")
+            return
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS("Поисковый индекс перестроен."))
@@ -0,0 +1,121 @@
+import json
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Наполняет тестовую базу синтетическими данными разного объёма "
+        "и замеряет задержку и число запросов основных страниц."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="1000,10000",
+            help="Числа постов через запятую, по прогону на каждое.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Сколько раз запрашивать каждую страницу.",
+        )
+        parser.add_argument(
+            "--warm",
+            action="store_true",
+            help="Не очищать кэш между запросами.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Начальное значение генератора.",
+        )
+        parser.add_argument("--output", help="Файл для отчёта в JSON.")
+        parser.add_argument(
+            "--baseline", help="Отчёт прошлого прогона для сравнения."
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Допустимый рост p95 относительно baseline, доля.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options["sizes"].split(",")]
+        except ValueError:
+            raise CommandError("--sizes: ожидаются целые числа через запятую.")
+        report = {"warm": options["warm"], "sizes": {}}
+
+        # Замеры идут на отдельной тестовой базе и во временном каталоге
+        # медиафайлов, рабочие данные не меняются.
+        media_root = tempfile.mkdtemp()
+        media_override = override_settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            for size in sizes:
+                call_command("flush", interactive=False, verbosity=0)
+                benchmark.seed(
+                    random_seed=options["seed"], **benchmark.volumes_for(size)
+                )
+                report["sizes"][str(size)] = benchmark.measure(
+                    repeat=options["repeat"], warm=options["warm"]
+                )
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+            media_override.disable()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(output)
+        else:
+            self.stdout.write(output)
+
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline_file:
+                baseline = json.load(baseline_file)
+            regressions = compare(baseline, report, options["tolerance"])
+            if regressions:
+                raise CommandError("\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS("Регрессий нет."))
+
+
+def compare(baseline, report, tolerance) -> list:
+    """Страницы, где выросло число запросов или p95 вышел за допуск."""
+    regressions = []
+    for size, pages in report["sizes"].items():
+        for name, current in pages.items():
+            previous = baseline.get("sizes", {}).get(size, {}).get(name)
+            if previous is None:
+                continue
+            if current["queries"] > previous["queries"]:
+                regressions.append(
+                    f"{size}/{name}: запросов {previous['queries']} -> "
+                    f"{current['queries']}"
+                )
+            if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{size}/{name}: p95 {previous['p95_ms']} -> "
+                    f"{current['p95_ms']} мс"
+                )
+    return regressions
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = "Заполняет базу синтетическими пользователями и постами."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--posts",
+            type=int,
+            default=10_000,
+            help="Число постов; остальные объёмы считаются от него.",
+        )
+        parser.add_argument("--users", type=int, help="Число пользователей.")
+        parser.add_argument("--groups", type=int, help="Число групп.")
+        parser.add_argument("--comments", type=int, help="Число комментариев.")
+        parser.add_argument(
+            "--follows-per-user",
+            type=int,
+            help="Сколько авторов читает каждый пользователь.",
+        )
+        parser.add_argument(
+            "--image-ratio",
+            type=float,
+            help="Доля постов с картинкой, от 0 до 1.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=benchmark.BATCH_SIZE,
+            help="Сколько строк вставлять одним запросом.",
+        )
+        parser.add_argument(
+            "--seed", type=int, help="Начальное значение генератора."
+        )
+
+    def handle(self, *args, **options):
+        volumes = benchmark.volumes_for(options["posts"])
+        for name in volumes:
+            if options.get(name) is not None:
+                volumes[name] = options[name]
+        benchmark.seed(
+            batch_size=options["batch_size"],
+            random_seed=options["seed"],
+            **volumes,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Добавлено: пользователей {users}, групп {groups}, "
+                "постов {posts}, комментариев {comments}.".format(**volumes)
+            )
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Добавляет к весам обсуждаемости новые комментарии и посты "
+        "и переписывает топы сайта и групп. Запускается по расписанию, "
+        "например раз в пять минут."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=trending.TOP_N,
+            help="Сколько постов хранить в каждом топе.",
+        )
+
+    def handle(self, *args, **options):
+        stats = trending.update(limit=options["limit"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Весов обновлено: {stats['updated']}, новых: "
+                f"{stats['created']}, удалено: {stats['pruned']}; "
+                f"мест в топах: {stats['ranked']}."
+            )
+        )
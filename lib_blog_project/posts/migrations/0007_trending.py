@@ -0,0 +1,45 @@
+# Generated by Django 2.2.16 on 2026-10-18 15:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_recommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending_score', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('score', models.FloatField(verbose_name='Вес')),
+                ('scored_at', models.DateTimeField(verbose_name='Вес посчитан')),
+            ],
+            options={
+                'verbose_name': 'вес обсуждаемости',
+                'verbose_name_plural': 'веса обсуждаемости',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingPost',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Место')),
+                ('score', models.FloatField(verbose_name='Вес')),
+                ('group', models.ForeignKey(blank=True, help_text='Пусто - топ по всему сайту', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Group', verbose_name='Группа')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'обсуждаемый пост',
+                'verbose_name_plural': 'обсуждаемые посты',
+                'ordering': ['rank'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trendingpost',
+            index=models.Index(fields=['group', 'rank'], name='trending_group_rank_idx'),
+        ),
+    ]
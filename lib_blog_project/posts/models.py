@@ -9,7 +9,31 @@ User = get_user_model()
 CHARS_IN_STR = 15
 
 
-class Group(models.Model):
+class CounterFieldsMixin:
+    """Не даёт полному save() записать устаревшие счётчики из памяти.
+
+    Счётчики меняются только через F() в posts.counters; при обновлении
+    без update_fields они исключаются из списка полей.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and not kwargs.get("force_insert")
+            and kwargs.get("update_fields") is None
+        ):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class Group(CounterFieldsMixin, models.Model):
     title = models.CharField(
         max_length=200, verbose_name="Имя", help_text="Имя группы"
     )
@@ -21,6 +45,11 @@ class Group(models.Model):
     description = models.TextField(
         verbose_name="Описание", help_text="Описание группы"
     )
+    post_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Число постов"
+    )
+
+    counter_fields = ("post_count",)
 
     class Meta:
         verbose_name = "сообщество"
@@ -30,7 +59,7 @@ class Group(models.Model):
         return self.title
 
 
-class Post(CreatedModel):
+class Post(CounterFieldsMixin, CreatedModel):
     text = models.TextField(
         verbose_name="Текст",
         help_text="Введите текст поста",
@@ -54,11 +83,25 @@ class Post(CreatedModel):
     image = models.ImageField(
         verbose_name="Картинка", upload_to="posts/", blank=True
     )
+    comment_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Число комментариев"
+    )
+
+    counter_fields = ("comment_count",)
 
     class Meta:
         verbose_name = "запись"
         verbose_name_plural = "записи"
         ordering = ["-pub_date"]
+        # Ленты автора и группы фильтруют по ним и сортируют по дате.
+        indexes = [
+            models.Index(
+                fields=["author", "pub_date"], name="post_author_date_idx"
+            ),
+            models.Index(
+                fields=["group", "pub_date"], name="post_group_date_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.text[:CHARS_IN_STR]
@@ -85,6 +128,11 @@ class Comment(CreatedModel):
         verbose_name = "комментарий"
         verbose_name_plural = "комментарии"
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(
+                fields=["post", "pub_date"], name="comment_post_date_idx"
+            )
+        ]
 
     def __str__(self) -> str:
         return self.text
@@ -114,6 +162,180 @@ class Follow(models.Model):
                 fields=["user", "author"], name="uq_user_author"
             )
         ]
+        # Обратный поиск: подписчики автора.
+        indexes = [
+            models.Index(
+                fields=["author", "user"], name="follow_author_user_idx"
+            )
+        ]
 
     def __str__(self) -> str:
         return self.author.username
+
+
+class UserCounter(models.Model):
+    """Счётчики пользователя, обновляемые при каждой записи."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="counters",
+        verbose_name="Пользователь",
+    )
+    post_count = models.PositiveIntegerField(
+        default=0, verbose_name="Число постов"
+    )
+    follower_count = models.PositiveIntegerField(
+        default=0, verbose_name="Число подписчиков"
+    )
+    following_count = models.PositiveIntegerField(
+        default=0, verbose_name="Число подписок"
+    )
+
+    class Meta:
+        verbose_name = "счётчики пользователя"
+        verbose_name_plural = "счётчики пользователей"
+        # По нему выбираются популярные авторы для ленты подписок.
+        indexes = [
+            models.Index(
+                fields=["follower_count"], name="counter_followers_idx"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return str(self.user)
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="timeline",
+        verbose_name="Читатель",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+        verbose_name="Пост",
+    )
+    pub_date = models.DateTimeField(verbose_name="Дата публикации")
+
+    class Meta:
+        verbose_name = "запись ленты"
+        verbose_name_plural = "ленты подписок"
+        ordering = ["-pub_date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"], name="uq_timeline_user_post"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "pub_date", "post"],
+                name="timeline_user_date_idx",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user} <- {self.post}"
+
+
+class Recommendation(models.Model):
+    """Кандидат в подписки, посчитанный build_recommendations."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="recommendations",
+        verbose_name="Пользователь",
+    )
+    candidate = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Кого почитать",
+    )
+    score = models.PositiveIntegerField(verbose_name="Вес")
+
+    class Meta:
+        verbose_name = "рекомендация"
+        verbose_name_plural = "рекомендации"
+        ordering = ["-score"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "candidate"],
+                name="uq_recommendation_user_candidate",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-score"], name="recommendation_user_idx"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user} -> {self.candidate}"
+
+
+class TrendingScore(models.Model):
+    """Накопленный вес обсуждаемости поста на момент scored_at.
+
+    Текущий вес - score, затухший по экспоненте с момента scored_at.
+    Строка обновляется, только когда у поста появились комментарии.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="trending_score",
+        verbose_name="Пост",
+    )
+    score = models.FloatField(verbose_name="Вес")
+    scored_at = models.DateTimeField(verbose_name="Вес посчитан")
+
+    class Meta:
+        verbose_name = "вес обсуждаемости"
+        verbose_name_plural = "веса обсуждаемости"
+
+    def __str__(self) -> str:
+        return f"{self.post_id}: {self.score:.2f}"
+
+
+class TrendingPost(models.Model):
+    """Место поста в топе обсуждаемых: по сайту или по группе."""
+
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Группа",
+        help_text="Пусто - топ по всему сайту",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Пост",
+    )
+    rank = models.PositiveSmallIntegerField(verbose_name="Место")
+    score = models.FloatField(verbose_name="Вес")
+
+    class Meta:
+        verbose_name = "обсуждаемый пост"
+        verbose_name_plural = "обсуждаемые посты"
+        ordering = ["rank"]
+        indexes = [
+            models.Index(
+                fields=["group", "rank"], name="trending_group_rank_idx"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.rank}. {self.post_id}"
@@ -0,0 +1,138 @@
+import re
+from contextlib import ExitStack
+
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import Client
+from django.urls import resolve, reverse
+
+from . import benchmark
+from .models import Post
+
+# Полный проход по таблице: в плане нет ни индекса, ни виртуальной
+# таблицы (FTS ищет по своему индексу).
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+TEMP_SORT = "USE TEMP B-TREE"
+
+
+def audit_targets():
+    """Адреса всех страниц, лент и API для самых нагруженных объектов."""
+    targets = benchmark.bench_targets()
+    pages = {
+        "index": ("api_index", "index_feed"),
+        "group_posts": ("api_group_list", "group_feed"),
+        "profile": ("api_profile", "author_feed"),
+        "post_detail": ("api_post_detail", None),
+        "follow_index": ("api_follow_index", None),
+    }
+    for name, (api_name, feed_name) in pages.items():
+        if name not in targets:
+            continue
+        url, user = targets[name]
+        args = _url_args(url)
+        targets[f"api_{name}"] = (
+            reverse(f"posts:{api_name}", args=args),
+            user,
+        )
+        if feed_name is not None:
+            targets[f"{name}_feed"] = (
+                reverse(f"posts:{feed_name}", args=(*args, "atom")),
+                None,
+            )
+    if "post_detail" in targets:
+        args = _url_args(targets["post_detail"][0])
+        targets["post_comments"] = (
+            reverse("posts:post_comments", args=args),
+            None,
+        )
+        targets["api_post_comments"] = (
+            reverse("posts:api_post_comments", args=args),
+            None,
+        )
+    targets["trending"] = (reverse("posts:trending"), None)
+    targets["api_trending"] = (reverse("posts:api_trending"), None)
+    post = Post.objects.order_by("-pub_date").first()
+    if post is not None:
+        word = post.text.split()[0].strip(".,!?")
+        targets["search"] = (f"{reverse('posts:search')}?q={word}", None)
+    return targets
+
+
+def _url_args(url):
+    return tuple(resolve(url).kwargs.values())
+
+
+def explain(sql, params) -> list:
+    """Строки EXPLAIN QUERY PLAN для запроса SQLite.
+
+    План строится на основной базе: схема у реплик та же.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(plan) -> list:
+    """Шаги плана с полным проходом по таблице или сортировкой в памяти.
+
+    Поиск по FTS сортирует найденное по релевантности, индексом это
+    не заменить, поэтому такая сортировка не считается ошибкой.
+    """
+    full_text = any("VIRTUAL TABLE" in step for step in plan)
+    return [
+        step
+        for step in plan
+        if FULL_SCAN.match(step)
+        or (step.startswith(TEMP_SORT) and not full_text)
+    ]
+
+
+class QueryRecorder:
+    """Обёртка execute_wrapper, запоминающая выполненные SELECT."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith("SELECT"):
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def audit():
+    """Запрашивает каждую страницу с пустым кэшем и разбирает её запросы.
+
+    Запросы собираются со всех подключений, так что чтения с реплик
+    тоже попадают в отчёт. Возвращает словарь
+    имя -> (адрес, код ответа, список запросов), где запрос - словарь
+    sql, params, plan и problems.
+    """
+    results = {}
+    for name, (url, user) in audit_targets().items():
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        cache.clear()
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for alias_connection in connections.all():
+                stack.enter_context(
+                    alias_connection.execute_wrapper(recorder)
+                )
+            response = client.get(url)
+            # Потоковые ответы читают базу, пока отдают тело.
+            if response.streaming:
+                b"".join(response.streaming_content)
+        queries = []
+        for sql, params in recorder.queries:
+            plan = explain(sql, params)
+            queries.append(
+                {
+                    "sql": sql,
+                    "params": params,
+                    "plan": plan,
+                    "problems": plan_problems(plan),
+                }
+            )
+        results[name] = (url, response.status_code, queries)
+    return results
@@ -0,0 +1,127 @@
+import heapq
+from array import array
+from collections import Counter
+from itertools import islice
+
+from django.db import transaction
+
+from . import feed_cache, follow_graph
+from .models import Follow, Recommendation
+
+TOP_K = 10
+SHOWN = 5
+# Совпадение с подписками того, кого читаешь, весит больше, чем общая
+# подписка с незнакомым читателем.
+FRIEND_OF_FRIEND_WEIGHT = 2
+CO_FOLLOW_WEIGHT = 1
+# Подписчики популярного автора мало говорят о сходстве вкусов, а
+# перебирать их дорого.
+CO_FOLLOW_MAX_FOLLOWERS = 500
+BATCH_SIZE = 500
+EDGE_CHUNK_SIZE = 10000
+
+
+def load_graph():
+    """Рёбра Follow в виде списков смежности в обе стороны.
+
+    id хранятся в array, а не в списках объектов int: так миллионы
+    рёбер занимают десятки мегабайт.
+    """
+    following, followers = {}, {}
+    edges = (
+        Follow.objects.order_by()
+        .values_list("user", "author")
+        .iterator(EDGE_CHUNK_SIZE)
+    )
+    for user_id, author_id in edges:
+        following.setdefault(user_id, array("l")).append(author_id)
+        followers.setdefault(author_id, array("l")).append(user_id)
+    return following, followers
+
+
+def candidates(user_id, following, followers, limit=TOP_K) -> list:
+    """До limit пар (кандидат, вес) для пользователя.
+
+    Вес складывается из числа авторов в подписках, которые читают
+    кандидата, и числа общих с кандидатом подписок. Подсчёт идёт через
+    Counter.update по массивам id, без цикла Python на каждое ребро.
+    """
+    followed = following.get(user_id, ())
+    friends_of_friends = Counter()
+    co_followers = Counter()
+    for author_id in followed:
+        friends_of_friends.update(following.get(author_id, ()))
+        readers = followers.get(author_id, ())
+        if len(readers) <= CO_FOLLOW_MAX_FOLLOWERS:
+            co_followers.update(readers)
+    scores = Counter(
+        {
+            candidate: count * FRIEND_OF_FRIEND_WEIGHT
+            for candidate, count in friends_of_friends.items()
+        }
+    )
+    for candidate, count in co_followers.items():
+        scores[candidate] += count * CO_FOLLOW_WEIGHT
+    excluded = {user_id, *followed}
+    # При равном весе выше тот, у кого меньше id: результат не зависит
+    # от порядка загрузки рёбер.
+    best = heapq.nlargest(
+        limit,
+        (
+            (score, -candidate)
+            for candidate, score in scores.items()
+            if candidate not in excluded
+        ),
+    )
+    return [(-candidate, score) for score, candidate in best]
+
+
+def build(limit=TOP_K) -> Counter:
+    """Пересчитывает таблицу рекомендаций целиком.
+
+    Кандидаты считаются до транзакции: SQLite держит блокировку записи
+    всю транзакцию, и долгий расчёт внутри неё останавливал бы записи
+    сайта. Старые рекомендации заменяются новыми в одной короткой
+    транзакции, поэтому страницы всё время видят полный набор.
+    """
+    following, followers = load_graph()
+    rows = [
+        (user_id, candidate, score)
+        for user_id in following
+        for candidate, score in candidates(
+            user_id, following, followers, limit
+        )
+    ]
+    stats = Counter(users=len(following), recommendations=len(rows))
+    with transaction.atomic():
+        Recommendation.objects.all().delete()
+        # bulk_create сам превращает вход в список, поэтому модели
+        # создаются пачками, а не все сразу.
+        remaining = iter(rows)
+        while True:
+            batch = [
+                Recommendation(
+                    user_id=user_id, candidate_id=candidate, score=score
+                )
+                for user_id, candidate, score in islice(remaining, BATCH_SIZE)
+            ]
+            if not batch:
+                break
+            Recommendation.objects.bulk_create(batch)
+    feed_cache.bump(feed_cache.RECOMMENDATIONS_SCOPE)
+    return stats
+
+
+def for_user(user, limit=SHOWN) -> list:
+    """Рекомендации пользователю одним запросом, без уже прочитанных."""
+    if not user.is_authenticated:
+        return []
+    followed = follow_graph.following_ids(user.pk)
+    recommendations = Recommendation.objects.filter(
+        user=user
+    ).select_related("candidate")
+    return [
+        recommendation
+        for recommendation in recommendations
+        if recommendation.candidate_id not in followed
+    ][:limit]
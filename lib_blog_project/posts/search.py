@@ -0,0 +1,201 @@
+import base64
+import binascii
+import json
+
+from django.db import connection
+from django.utils.html import escape
+
+from .models import Post
+
+SEARCH_TABLE = "posts_post_fts"
+SNIPPET_TOKENS = 16
+# Служебные символы вокруг совпадений: текст сниппета экранируется,
+# и только потом они заменяются на <mark>.
+MARK_START, MARK_END = "\x02", "\x03"
+
+CREATE_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+    text, content='posts_post', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)
+"""
+# Таблица внешнего содержимого синхронизируется триггерами, поэтому
+# индекс видит и вставки через bulk_create, и правки через update().
+CREATE_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_ai
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_ad
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_au
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {SEARCH_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+)
+DROP_STATEMENTS = (
+    "DROP TRIGGER IF EXISTS posts_post_fts_ai",
+    "DROP TRIGGER IF EXISTS posts_post_fts_ad",
+    "DROP TRIGGER IF EXISTS posts_post_fts_au",
+    f"DROP TABLE IF EXISTS {SEARCH_TABLE}",
+)
+SEARCH_QUERY = f"""
+SELECT rowid, rank, snippet({SEARCH_TABLE}, 0, %s, %s, '…', %s)
+FROM {SEARCH_TABLE}
+WHERE {SEARCH_TABLE} MATCH %s {{after}}
+ORDER BY rank, rowid
+LIMIT %s
+"""
+AFTER_CONDITION = "AND (rank > %s OR (rank = %s AND rowid > %s))"
+
+
+def is_supported(using=connection) -> bool:
+    return using.vendor == "sqlite"
+
+
+def install(using=connection):
+    """Создаёт индекс и триггеры, если их ещё нет."""
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        cursor.execute(CREATE_TABLE)
+        for statement in CREATE_TRIGGERS:
+            cursor.execute(statement)
+
+
+def uninstall(using=connection):
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        for statement in DROP_STATEMENTS:
+            cursor.execute(statement)
+
+
+def rebuild(using=connection):
+    """Восстанавливает триггеры и заново строит индекс по posts_post.
+
+    Миграции, пересоздающие таблицу posts_post, удаляют её триггеры,
+    поэтому после них нужно запускать эту функцию.
+    """
+    install(using)
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"
+        )
+
+
+def to_match_expression(query) -> str:
+    """Превращает ввод пользователя в запрос FTS5 из слов в кавычках."""
+    terms = query.split()
+    return " ".join('"%s"' % term.replace('"', '""') for term in terms)
+
+
+def encode_cursor(rank, pk) -> str:
+    raw = json.dumps([rank, pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        rank, pk = json.loads(raw.decode())
+        return float(rank), int(pk)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        return None
+
+
+class SearchPage:
+    """Страница результатов поиска, упорядоченных по релевантности."""
+
+    def __init__(self, object_list, next_cursor=None, cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return bool(self.cursor)
+
+
+def _highlight(snippet) -> str:
+    return (
+        escape(snippet)
+        .replace(MARK_START, "<mark>")
+        .replace(MARK_END, "</mark>")
+    )
+
+
+def _search_fallback(query, position, limit) -> list:
+    """Поиск подстрокой для баз без FTS5, без ранжирования."""
+    posts = Post.objects.filter(text__icontains=query).order_by("pk")
+    if position is not None:
+        posts = posts.filter(pk__gt=position[1])
+    return [
+        (pk, 0.0, escape(text[:200]))
+        for pk, text in posts.values_list("pk", "text")[:limit]
+    ]
+
+
+def search(query, cursor=None, per_page=10) -> SearchPage:
+    """Ищет посты по тексту; курсор - пара (rank, id) последней записи."""
+    expression = to_match_expression(query)
+    if not expression:
+        return SearchPage([])
+    position = decode_cursor(cursor)
+    if is_supported():
+        sql = SEARCH_QUERY.format(
+            after=AFTER_CONDITION if position is not None else ""
+        )
+        params = [MARK_START, MARK_END, SNIPPET_TOKENS, expression]
+        if position is not None:
+            rank, pk = position
+            params += [rank, rank, pk]
+        params.append(per_page + 1)
+        with connection.cursor() as db_cursor:
+            db_cursor.execute(sql, params)
+            rows = [
+                (pk, rank, _highlight(snippet))
+                for pk, rank, snippet in db_cursor.fetchall()
+            ]
+    else:
+        rows = _search_fallback(query, position, per_page + 1)
+
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    posts = Post.objects.select_related("author", "group").in_bulk(
+        [pk for pk, _, _ in rows]
+    )
+    results = []
+    for pk, rank, snippet in rows:
+        post = posts.get(pk)
+        if post is not None:
+            post.rank = rank
+            post.snippet = snippet
+            results.append(post)
+    next_cursor = None
+    if has_next and rows:
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+    return SearchPage(results, next_cursor, cursor)
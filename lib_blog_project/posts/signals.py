@@ -0,0 +1,187 @@
+import contextvars
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from . import counters, feed_cache, follow_graph, tasks, timeline
+from .models import Comment, Follow, Group, Post, UserCounter
+
+User = get_user_model()
+
+# id постов, которые удаляются сейчас вместе с комментариями: их
+# комментариям не нужно ни сбрасывать кэш, ни уменьшать счётчик, всё
+# это сделают обработчики удаления самого поста.
+deleting_posts = contextvars.ContextVar("deleting_posts", default=frozenset())
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    if created:
+        tasks.fan_out_post.enqueue(
+            post_id=instance.pk, idempotency_key=f"fan_out:{instance.pk}"
+        )
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        user_id, author_id = instance.user_id, instance.author_id
+        tasks.backfill_timeline.enqueue(
+            user_id=user_id,
+            author_id=author_id,
+            idempotency_key=f"backfill:{user_id}:{author_id}",
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    # Отписка убирает посты сразу: лента не должна их показывать
+    # даже до того, как обработчик дойдёт до очереди.
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    # Пост, перенесённый в другую группу, должен пропасть и из старой.
+    if instance.pk is None:
+        return
+    instance._previous_group_ids = tuple(
+        Post.objects.filter(pk=instance.pk).values_list("group", flat=True)
+    )
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleting_post(sender, instance, **kwargs):
+    # Комментарии удаляются каскадом после этого сигнала, но до post_delete
+    # самого поста.
+    deleting_posts.set(deleting_posts.get() | {instance.pk})
+
+
+@receiver(post_delete, sender=Post)
+def forget_deleting_post(sender, instance, **kwargs):
+    deleting_posts.set(deleting_posts.get() - {instance.pk})
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_group_ids", ())
+    feed_cache.bump(*feed_cache.post_scopes(instance, previous))
+
+
+def deleted_with_post(comment) -> bool:
+    return comment.post_id in deleting_posts.get()
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_post(sender, instance, **kwargs):
+    if deleted_with_post(instance):
+        return
+    # Число комментариев выводится в лентах, поэтому сбрасываются
+    # все области поста, а не только его страница.
+    post = (
+        Post.objects.filter(pk=instance.post_id)
+        .only("author", "group")
+        .first()
+    )
+    if post is None:
+        feed_cache.bump(feed_cache.post_scope(instance.post_id))
+    else:
+        feed_cache.bump(*feed_cache.post_scopes(post))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_profiles(sender, instance, **kwargs):
+    # Подписка меняет счётчики обоих профилей и кнопку «Подписаться».
+    follow_graph.refresh(instance.user_id, instance.author_id)
+    feed_cache.bump(
+        feed_cache.profile_scope(instance.user_id),
+        feed_cache.profile_scope(instance.author_id),
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_profile(sender, instance, update_fields, **kwargs):
+    # Вход обновляет только last_login, которого на страницах нет.
+    if update_fields == {"last_login"}:
+        return
+    feed_cache.bump(feed_cache.profile_scope(instance.pk))
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_feed(sender, instance, **kwargs):
+    feed_cache.bump(feed_cache.group_scope(instance.pk))
+
+
+@receiver(post_save, sender=User)
+def create_user_counter(sender, instance, created, **kwargs):
+    if created:
+        UserCounter.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    if created:
+        counters.change_user(instance.author_id, post_count=1)
+        counters.change_group(instance.group_id, 1)
+        return
+    for group_id in getattr(instance, "_previous_group_ids", ()):
+        if group_id != instance.group_id:
+            counters.change_group(group_id, -1)
+            counters.change_group(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, post_count=-1)
+    counters.change_group(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.change_post(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    if not deleted_with_post(instance):
+        counters.change_post(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_saved_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.change_user(instance.user_id, following_count=1)
+        counters.change_user(instance.author_id, follower_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.change_user(instance.user_id, following_count=-1)
+    counters.change_user(instance.author_id, follower_count=-1)
+    # Посты, написанные, пока автор был тяжёлым, не лежат в лентах.
+    if timeline.left_heavy(instance.author_id):
+        tasks.backfill_followers.enqueue(
+            author_id=instance.author_id,
+            idempotency_key=f"backfill_followers:{instance.author_id}",
+        )
+
+
+@receiver(post_save, sender=Post)
+def generate_thumbnails(sender, instance, **kwargs):
+    # Миниатюры готовятся обработчиком очереди, чтобы ни сохранение
+    # поста, ни страницы лент не декодировали оригинал во время запроса.
+    if instance.image:
+        tasks.generate_thumbnails.enqueue(
+            post_id=instance.pk,
+            idempotency_key=f"thumbnails:{instance.pk}:{instance.image.name}",
+        )
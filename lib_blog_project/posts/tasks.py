@@ -0,0 +1,38 @@
+from core.tasks import task
+from . import feed_cache, thumbnails, timeline
+from .models import Follow, Post
+
+
+@task(priority=10)
+def fan_out_post(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    # Удалённый пост уже пропал из лент вместе со своими записями.
+    if post is not None:
+        timeline.fan_out_post(post)
+
+
+@task(priority=10)
+def backfill_timeline(user_id, author_id):
+    # Если пользователь успел отписаться, prune уже отработал
+    # и посты автора в ленту возвращать нельзя.
+    if Follow.objects.filter(user=user_id, author=author_id).exists():
+        timeline.backfill(user_id, author_id)
+
+
+@task(priority=10)
+def backfill_followers(author_id):
+    timeline.backfill_followers(author_id)
+
+
+@task(priority=5)
+def generate_thumbnails(post_id):
+    post = (
+        Post.objects.filter(pk=post_id)
+        .only("image", "author", "group")
+        .first()
+    )
+    if post is not None:
+        thumbnails.generate(post.image)
+        # Пока миниатюры не было, страницы кэшировались со ссылкой на
+        # оригинал.
+        feed_cache.bump(*feed_cache.post_scopes(post))
@@ -0,0 +1,10 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail_url(image, geometry):
+    return thumbnails.cached_url(image, geometry)
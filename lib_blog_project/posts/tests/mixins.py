@@ -0,0 +1,63 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core import auth
+
+
+class _AssertMaxQueriesContext(CaptureQueriesContext):
+    def __init__(self, test_case, num):
+        self.test_case = test_case
+        self.num = num
+        super().__init__(connection)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        executed = len(self)
+        self.test_case.assertLessEqual(
+            executed,
+            self.num,
+            "%d queries executed, at most %d expected\nCaptured queries "
+            "were:\n%s"
+            % (
+                executed,
+                self.num,
+                "\n".join(
+                    "%d. %s" % (i, query["sql"])
+                    for i, query in enumerate(self.captured_queries, start=1)
+                ),
+            ),
+        )
+
+
+class QueryBudgetMixin:
+    """Проверки бюджета SQL-запросов для тестов представлений."""
+
+    def assertMaxQueries(self, num):
+        """Контекстный менеджер: внутри блока не больше num запросов."""
+        return _AssertMaxQueriesContext(self, num)
+
+    def count_queries(self, client, url, data=None) -> int:
+        """Число запросов при запросе страницы без кэша фрагментов.
+
+        Сбрасывается и кэш пользователей, иначе первый запрос
+        дороже последующих.
+        """
+        cache.clear()
+        auth.clear()
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url, data)
+        return len(queries)
+
+    def assertQueriesDoNotGrow(self, client, url, add_objects, data=None):
+        """Число запросов не растёт, когда на странице больше записей."""
+        before = self.count_queries(client, url, data)
+        add_objects()
+        after = self.count_queries(client, url, data)
+        self.assertEqual(
+            before,
+            after,
+            f"{url}: {before} queries before, {after} after adding objects",
+        )
@@ -0,0 +1,136 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import tasks
+from posts.models import Comment, Follow, Group, Post
+from posts.tests.mixins import QueryBudgetMixin
+
+User = get_user_model()
+
+
+class ApiTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username="test_author", first_name="Лев", last_name="Толстой"
+        )
+        cls.reader = User.objects.create_user(username="test_reader")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Тестовое описание",
+        )
+        for i in range(25):
+            Post.objects.create(
+                text=f"Пост номер {i}", author=cls.author, group=cls.group
+            )
+        cls.post = Post.objects.latest("pk")
+        for i in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f"Комментарий {i}"
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        tasks.run_pending()
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_feeds(self):
+        """Ленты отдают JSON с постами и курсором следующей страницы."""
+        urls = (
+            reverse("posts:api_index"),
+            reverse("posts:api_group_list", args=(self.group.slug,)),
+            reverse("posts:api_profile", args=(self.author.username,)),
+            reverse("posts:api_follow_index"),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.reader_client.get(url)
+                self.assertEqual(response["Content-Type"], "application/json")
+                data = response.json()
+                self.assertEqual(len(data["results"]), 20)
+                self.assertEqual(
+                    data["results"][0],
+                    {
+                        "id": self.post.pk,
+                        "pub_date": self.post.pub_date.isoformat(),
+                        "text": self.post.text,
+                        "image": None,
+                        "comments": 3,
+                        "author": self.author.username,
+                        "group": self.group.slug,
+                    },
+                )
+                rest = self.reader_client.get(
+                    url, {"cursor": data["next"]}
+                ).json()
+                self.assertEqual(len(rest["results"]), 5)
+                self.assertIsNone(rest["next"])
+
+    def test_feed_queries(self):
+        """Страница ленты выбирается одним запросом."""
+        with self.assertMaxQueries(1):
+            self.guest_client.get(reverse("posts:api_index"))
+
+    def test_profile_and_group(self):
+        """Профиль и группа отдаются вместе с лентой."""
+        data = self.guest_client.get(
+            reverse("posts:api_profile", args=(self.author.username,))
+        ).json()
+        self.assertEqual(
+            data["author"],
+            {
+                "username": "test_author",
+                "name": "Лев Толстой",
+                "posts": 25,
+                "followers": 1,
+                "following": 0,
+            },
+        )
+        data = self.guest_client.get(
+            reverse("posts:api_group_list", args=(self.group.slug,))
+        ).json()
+        self.assertEqual(data["group"]["title"], self.group.title)
+
+    def test_post_and_comments(self):
+        """Пост и его комментарии, новые первыми."""
+        data = self.guest_client.get(
+            reverse("posts:api_post_detail", args=(self.post.pk,))
+        ).json()
+        self.assertEqual(data["text"], self.post.text)
+        data = self.guest_client.get(
+            reverse("posts:api_post_comments", args=(self.post.pk,))
+        ).json()
+        self.assertEqual(
+            [comment["text"] for comment in data["results"]],
+            ["Комментарий 2", "Комментарий 1", "Комментарий 0"],
+        )
+
+    def test_follow_requires_login(self):
+        """Лента подписок без входа отдаёт 401."""
+        response = self.guest_client.get(reverse("posts:api_follow_index"))
+        self.assertEqual(response.status_code, 401)
+
+    def test_not_modified(self):
+        """Повторный запрос с ETag получает 304."""
+        url = reverse("posts:api_index")
+        etag = self.guest_client.get(url)["ETag"]
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing(self):
+        """Несуществующие объекты дают 404."""
+        urls = (
+            reverse("posts:api_group_list", args=("missing",)),
+            reverse("posts:api_profile", args=("missing",)),
+            reverse("posts:api_post_detail", args=(self.post.pk + 100,)),
+            reverse("posts:api_post_comments", args=(self.post.pk + 100,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
@@ -0,0 +1,99 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from posts import benchmark
+from posts.management.commands.run_bench import compare
+from posts.models import Comment, Follow, Group, Post, TimelineEntry
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class BenchmarkTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_seed(self):
+        """seed создаёт заданные объёмы и пересчитывает счётчики и ленты."""
+        benchmark.seed(
+            users=10,
+            groups=2,
+            posts=50,
+            comments=30,
+            follows_per_user=3,
+            image_ratio=0.5,
+            batch_size=7,
+            random_seed=1,
+        )
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 50)
+        self.assertEqual(Comment.objects.count(), 30)
+        self.assertEqual(Follow.objects.count(), 30)
+        self.assertTrue(Post.objects.exclude(image="").exists())
+        self.assertTrue(TimelineEntry.objects.exists())
+        group = Group.objects.first()
+        self.assertEqual(group.post_count, group.posts.count())
+
+    def test_measure(self):
+        """measure отдаёт метрики по каждой основной странице."""
+        benchmark.seed(
+            users=5, groups=1, posts=20, comments=10, image_ratio=0
+        )
+        results = benchmark.measure(repeat=2)
+        self.assertEqual(
+            set(results),
+            {"index", "group_posts", "profile", "post_detail", "follow_index"},
+        )
+        for name, metrics in results.items():
+            with self.subTest(name=name):
+                self.assertEqual(metrics["status"], 200)
+                self.assertGreater(metrics["queries"], 0)
+                self.assertGreater(metrics["p95_ms"], 0)
+
+    def test_seed_bench_command(self):
+        """Команда seed_bench считает объёмы от числа постов."""
+        out = StringIO()
+        call_command(
+            "seed_bench", posts=40, comments=0, image_ratio=0, stdout=out
+        )
+        self.assertEqual(Post.objects.count(), 40)
+        self.assertFalse(Comment.objects.exists())
+        self.assertIn("постов 40", out.getvalue())
+
+    def test_compare(self):
+        """Сравнение с baseline находит рост запросов и задержки."""
+        baseline = {
+            "sizes": {"100": {"index": {"queries": 5, "p95_ms": 10.0}}}
+        }
+        report = {"sizes": {"100": {"index": {"queries": 6, "p95_ms": 11.0}}}}
+        self.assertEqual(len(compare(baseline, report, 0.2)), 1)
+        report["sizes"]["100"]["index"]["p95_ms"] = 13.0
+        self.assertEqual(len(compare(baseline, report, 0.2)), 2)
+
+
+class MeasureQueriesTest(SimpleTestCase):
+    databases = {"replica"}
+
+    def test_measure_counts_replica_queries(self):
+        """Запросы к реплике тоже входят в число запросов страницы."""
+
+        def get(client, url):
+            with connections["replica"].cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return HttpResponse()
+
+        targets = {"index": ("/", None)}
+        with mock.patch.object(benchmark, "bench_targets", lambda: targets):
+            with mock.patch.object(benchmark.Client, "get", get):
+                results = benchmark.measure(repeat=1)
+        self.assertEqual(results["index"]["queries"], 1)
@@ -1,9 +1,15 @@
-from django.test import Client, TestCase
+from unittest import mock
+
+from django.test import Client, RequestFactory, TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
 
-from posts.models import Post
+from core import db_router
+from posts import feed_cache
+from posts.models import Group, Post
 
 
 User = get_user_model()
@@ -32,3 +38,121 @@ class CommentWriteTest(TestCase):
         response = self.authorized_client.get(reverse("posts:index"))
         res = len(response.context["page_obj"])
         self.assertNotEqual(post_count, res)
+
+
+class FeedFragmentCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="test_author")
+        cls.group_1 = Group.objects.create(
+            title="Тестовая группа 1",
+            slug="test_slug_1",
+            description="Тестовое описание",
+        )
+        cls.group_2 = Group.objects.create(
+            title="Тестовая группа 2",
+            slug="test_slug_2",
+            description="Тестовое описание",
+        )
+        for i in range(13):
+            Post.objects.create(
+                text=f"Текст поста номер {i}",
+                author=cls.user,
+                group=cls.group_1,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.urls = [
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": self.group_1.slug}),
+            reverse("posts:profile", kwargs={"username": self.user.username}),
+        ]
+
+    def test_pages_cached_separately(self):
+        """Каждая страница ленты кэшируется под своим ключом."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                first_page = self.client.get(url)
+                cursor = first_page.context["page_obj"].next_cursor
+                second_page = self.client.get(url, {"cursor": cursor})
+                self.assertContains(second_page, "Текст поста номер 0")
+                self.assertNotContains(second_page, "Текст поста номер 12")
+
+    def test_new_post_invalidates_feeds(self):
+        """Новый пост сразу виден во всех своих лентах."""
+        for url in self.urls:
+            self.client.get(url)
+        Post.objects.create(
+            text="Свежий пост", author=self.user, group=self.group_1
+        )
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), "Свежий пост")
+
+    def test_moved_post_leaves_old_group(self):
+        """Пост, перенесённый в другую группу, пропадает из старой."""
+        post = Post.objects.filter(group=self.group_1).first()
+        url = reverse("posts:group_list", kwargs={"slug": self.group_1.slug})
+        self.assertContains(self.client.get(url), post.text)
+        post.group = self.group_2
+        post.save()
+        self.assertNotContains(self.client.get(url), post.text)
+
+    def test_cached_page_skips_feed_queries(self):
+        """Страница из кэша не выбирает посты из базы."""
+        url = reverse("posts:index")
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse(
+            any("posts_post" in query["sql"] for query in queries)
+        )
+
+
+class ProfileCacheTest(TestCase):
+    def test_login_keeps_profile_cache(self):
+        """Вход пользователя не сбрасывает кэш его профиля."""
+        user = User.objects.create_user(username="test_reader")
+        scope = feed_cache.profile_scope(user.pk)
+        version = feed_cache.get_version(scope)
+        Client().force_login(user)
+        self.assertEqual(feed_cache.get_version(scope), version)
+        user.first_name = "Читатель"
+        user.save()
+        self.assertNotEqual(feed_cache.get_version(scope), version)
+
+
+class ReplicaLagTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="test_reader")
+        # Тесты идут внутри транзакции, а в ней чтения всегда основные.
+        patcher = mock.patch.object(
+            connections["default"], "in_atomic_block", False
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        token = db_router.pinned.set(False)
+        self.addCleanup(db_router.pinned.reset, token)
+
+    def test_changed_scope_not_cached_from_replica(self):
+        """Пока реплика догоняет правку, её страницы не кэшируются."""
+        request = RequestFactory().get("/")
+        request.user = self.user
+        scope = feed_cache.INDEX_SCOPE
+        feed_cache.bump(scope)
+        context = feed_cache.feed_context(scope)
+        self.assertEqual(context["feed_cache_timeout"], 0)
+        self.assertIsNone(feed_cache.etag(request, scope))
+        # Другие области и читатели основной базы кэшируются как обычно.
+        other = feed_cache.group_scope(1)
+        self.assertTrue(feed_cache.feed_context(other)["feed_cache_timeout"])
+        db_router.pinned.set(True)
+        self.assertTrue(feed_cache.feed_context(scope)["feed_cache_timeout"])
+        db_router.pinned.set(False)
+        cache.delete(feed_cache.LAGGING_KEY.format(scope))
+        self.assertTrue(feed_cache.feed_context(scope)["feed_cache_timeout"])
+        self.assertIsNotNone(feed_cache.etag(request, scope))
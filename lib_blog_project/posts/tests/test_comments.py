@@ -1,8 +1,11 @@
+from http import HTTPStatus
+
 from django.test import Client, TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
 from posts.models import Post, Comment
+from posts.views import COMMENTS_PER_PAGE
 
 
 User = get_user_model()
@@ -53,3 +56,54 @@ class CommentWriteTest(TestCase):
             reverse("posts:post_detail", args=(self.test_post.id,))
         )
         self.assertIn("comments", response.context.keys())
+
+
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="test_user")
+        cls.post = Post.objects.create(text="Тестовый пост", author=cls.user)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f"Комментарий {i}")
+            for i in range(COMMENTS_PER_PAGE + 5)
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_post_detail_renders_first_chunk(self):
+        """На странице поста выводится только первая порция комментариев."""
+        response = self.client.get(
+            reverse("posts:post_detail", args=(self.post.id,))
+        )
+        comments = response.context["comments"]
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertTrue(comments.has_next())
+        self.assertContains(
+            response, reverse("posts:post_comments", args=(self.post.id,))
+        )
+
+    def test_comments_endpoint_returns_next_chunk(self):
+        """Фрагмент с курсором отдаёт оставшиеся комментарии."""
+        first = self.client.get(
+            reverse("posts:post_detail", args=(self.post.id,))
+        ).context["comments"]
+        response = self.client.get(
+            reverse("posts:post_comments", args=(self.post.id,)),
+            {"cursor": first.next_cursor},
+        )
+        self.assertTemplateUsed(response, "includes/comments.html")
+        self.assertTemplateNotUsed(response, "base.html")
+        comments = response.context["comments"]
+        self.assertEqual(len(comments), 5)
+        self.assertFalse(comments.has_next())
+        shown = set(first.object_list) | set(comments.object_list)
+        self.assertEqual(len(shown), COMMENTS_PER_PAGE + 5)
+
+    def test_comments_endpoint_unknown_post(self):
+        """Фрагмент комментариев несуществующего поста - 404."""
+        response = self.client.get(
+            reverse("posts:post_comments", args=(self.post.id + 100,))
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -0,0 +1,88 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from posts.tests.mixins import QueryBudgetMixin
+
+User = get_user_model()
+
+
+class ConditionalGetTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="test_author")
+        cls.reader = User.objects.create_user(username="test_reader")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Тестовое описание",
+        )
+        cls.post = Post.objects.create(
+            text="Тестовый текст", author=cls.author, group=cls.group
+        )
+        cls.urls = (
+            reverse("posts:index"),
+            reverse("posts:group_list", args=(cls.group.slug,)),
+            reverse("posts:profile", args=(cls.author.username,)),
+            reverse("posts:post_detail", args=(cls.post.pk,)),
+        )
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_not_modified(self):
+        """Неизменившаяся страница отдаётся как 304 без выборки постов."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.reader_client.get(url)["ETag"]
+                with self.assertMaxQueries(3):
+                    response = self.reader_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b"")
+
+    def test_new_post_changes_etag(self):
+        """Новый пост автора меняет ETag лент и страницы поста."""
+        etags = {url: self.reader_client.get(url)["ETag"] for url in self.urls}
+        Post.objects.create(
+            text="Ещё пост", author=self.author, group=self.group
+        )
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_comment_and_follow_change_etag(self):
+        """Комментарий меняет страницу поста, подписка - профиль."""
+        url = reverse("posts:post_detail", args=(self.post.pk,))
+        etag = self.reader_client.get(url)["ETag"]
+        Comment.objects.create(
+            post=self.post, author=self.reader, text="Комментарий"
+        )
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        url = reverse("posts:profile", args=(self.author.username,))
+        etag = self.reader_client.get(url)["ETag"]
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        """Другой пользователь не получает 304 по чужому ETag."""
+        url = reverse("posts:index")
+        etag = self.reader_client.get(url)["ETag"]
+        response = Client().get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_object(self):
+        """Для несуществующих объектов по-прежнему отдаётся 404."""
+        response = self.reader_client.get(
+            reverse("posts:post_detail", args=(self.post.pk + 100,))
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("ETag"))
@@ -0,0 +1,170 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, UserCounter
+
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="test_author")
+        cls.reader = User.objects.create_user(username="test_reader")
+        cls.group_1 = Group.objects.create(
+            title="Тестовая группа 1",
+            slug="test_slug_1",
+            description="Тестовое описание",
+        )
+        cls.group_2 = Group.objects.create(
+            title="Тестовая группа 2",
+            slug="test_slug_2",
+            description="Тестовое описание",
+        )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def counter(self, user):
+        return UserCounter.objects.get(user=user)
+
+    def test_post_counters(self):
+        """Создание, перенос и удаление поста меняют счётчики."""
+        self.author_client.post(
+            reverse("posts:post_create"),
+            {"text": "Новый пост", "group": self.group_1.pk},
+        )
+        post = Post.objects.get(text="Новый пост")
+        self.assertEqual(self.counter(self.author).post_count, 1)
+        self.group_1.refresh_from_db()
+        self.assertEqual(self.group_1.post_count, 1)
+
+        post.group = self.group_2
+        post.save()
+        self.group_1.refresh_from_db()
+        self.group_2.refresh_from_db()
+        self.assertEqual(self.group_1.post_count, 0)
+        self.assertEqual(self.group_2.post_count, 1)
+
+        post.delete()
+        self.group_2.refresh_from_db()
+        self.assertEqual(self.counter(self.author).post_count, 0)
+        self.assertEqual(self.group_2.post_count, 0)
+
+    def test_comment_counter(self):
+        """Комментарий увеличивает счётчик поста, удаление уменьшает."""
+        post = Post.objects.create(text="Пост", author=self.author)
+        self.reader_client.post(
+            reverse("posts:add_comment", kwargs={"post_id": post.pk}),
+            {"text": "Комментарий"},
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        Comment.objects.filter(post=post).delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+
+    def test_post_delete_queries_do_not_grow(self):
+        """Удаление поста не делает запросов на каждый комментарий."""
+
+        def delete_queries(comments):
+            post = Post.objects.create(text="Пост", author=self.author)
+            Comment.objects.bulk_create(
+                Comment(post=post, author=self.reader, text="Комментарий")
+                for _ in range(comments)
+            )
+            with CaptureQueriesContext(connection) as queries:
+                post.delete()
+            return len(queries)
+
+        self.assertEqual(delete_queries(10), delete_queries(100))
+        # Отдельно удалённый комментарий по-прежнему уменьшает счётчик.
+        post = Post.objects.create(text="Пост", author=self.author)
+        Comment.objects.create(post=post, author=self.reader, text="Текст")
+        Comment.objects.filter(post=post).delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+
+    def test_follow_counters(self):
+        """Подписка и отписка меняют счётчики обеих сторон."""
+        kwargs = {"username": self.author.username}
+        self.reader_client.get(reverse("posts:profile_follow", kwargs=kwargs))
+        self.assertEqual(self.counter(self.author).follower_count, 1)
+        self.assertEqual(self.counter(self.reader).following_count, 1)
+        self.reader_client.get(
+            reverse("posts:profile_unfollow", kwargs=kwargs)
+        )
+        self.assertEqual(self.counter(self.author).follower_count, 0)
+        self.assertEqual(self.counter(self.reader).following_count, 0)
+
+    def test_rebuild_counters(self):
+        """Команда rebuild_counters восстанавливает счётчики по данным."""
+        post = Post.objects.create(
+            text="Пост", author=self.author, group=self.group_1
+        )
+        Comment.objects.create(post=post, author=self.reader, text="Текст")
+        Follow.objects.create(user=self.reader, author=self.author)
+        UserCounter.objects.all().delete()
+        Post.objects.update(comment_count=0)
+        Group.objects.update(post_count=0)
+
+        call_command("rebuild_counters", stdout=StringIO())
+
+        post.refresh_from_db()
+        self.group_1.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(self.group_1.post_count, 1)
+        self.assertEqual(self.counter(self.author).post_count, 1)
+        self.assertEqual(self.counter(self.author).follower_count, 1)
+        self.assertEqual(self.counter(self.reader).following_count, 1)
+
+    def test_full_save_keeps_counters(self):
+        """Полный save() не затирает счётчики, изменённые параллельно."""
+        post = Post.objects.create(
+            text="Пост", author=self.author, group=self.group_1
+        )
+        group = Group.objects.get(pk=self.group_1.pk)
+        Comment.objects.create(post=post, author=self.reader, text="Текст")
+        Post.objects.create(text="Ещё", author=self.author, group=group)
+        post.text = "Исправленный пост"
+        post.save()
+        group.description = "Новое описание"
+        group.save()
+        post.refresh_from_db()
+        group.refresh_from_db()
+        self.assertEqual(post.text, "Исправленный пост")
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(group.description, "Новое описание")
+        self.assertEqual(group.post_count, 2)
+
+    def test_counters_do_not_go_negative(self):
+        """Разошедшийся счётчик при уменьшении остаётся нулём."""
+        post = Post.objects.create(text="Пост", author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text="Текст"
+        )
+        Post.objects.filter(pk=post.pk).update(comment_count=0)
+        UserCounter.objects.filter(user=self.author).update(post_count=0)
+        comment.delete()
+        post.delete()
+        self.assertEqual(self.counter(self.author).post_count, 0)
+
+    def test_post_detail_reads_counter(self):
+        """Страница поста берёт число постов автора из счётчика."""
+        post = Post.objects.create(text="Пост", author=self.author)
+        UserCounter.objects.filter(user=self.author).update(post_count=42)
+        response = self.reader_client.get(
+            reverse("posts:post_detail", kwargs={"post_id": post.pk})
+        )
+        self.assertEqual(response.context["count"], 42)
@@ -0,0 +1,139 @@
+import gzip
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+
+
+@override_settings(MEDIA_ROOT=os.path.join(TEMP_DIR, "media"))
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="test_author")
+        cls.reader = User.objects.create_user(username="test_reader")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Тестовое описание",
+        )
+        cls.post = Post.objects.create(
+            text="Тестовый пост", author=cls.author, group=cls.group
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text="Комментарий"
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        # Ключи миниатюр sorl лежат в кэше и переживают откат транзакции.
+        cache.clear()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def export(self, *args, **options):
+        out, err = StringIO(), StringIO()
+        call_command("export_posts", *args, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def read(self, content):
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_jsonl(self):
+        """Выгрузка в консоль содержит записи всех типов по порядку."""
+        out, _ = self.export("-")
+        records = self.read(out)
+        self.assertEqual(
+            [record["type"] for record in records],
+            ["group", "post", "comment", "follow"],
+        )
+        self.assertEqual(records[1]["id"], self.post.pk)
+        self.assertEqual(records[1]["author"], "test_author")
+        self.assertEqual(records[1]["group"], "test_slug")
+        self.assertEqual(
+            records[1]["pub_date"], self.post.pub_date.isoformat()
+        )
+
+    def test_round_trip(self):
+        """Выгрузку можно загрузить обратно через import_posts."""
+        path = os.path.join(TEMP_DIR, "backup.jsonl.gz")
+        self.export(path)
+        with gzip.open(path, "rt", encoding="utf-8") as backup:
+            self.assertEqual(len(self.read(backup.read())), 4)
+        Post.objects.all().delete()
+        call_command("import_posts", path, stdout=StringIO())
+        post = Post.objects.get()
+        self.assertEqual(post.pk, self.post.pk)
+        self.assertEqual(post.pub_date, self.post.pub_date)
+        self.assertEqual(post.comments.get().text, "Комментарий")
+
+    def test_watermark(self):
+        """Следующая выгрузка с водяным знаком берёт только новое."""
+        watermark = os.path.join(TEMP_DIR, "watermark")
+        self.export("-", watermark_file=watermark)
+        with open(watermark) as watermark_file:
+            self.assertEqual(
+                watermark_file.read(),
+                Comment.objects.get().pub_date.isoformat(),
+            )
+        new_post = Post.objects.create(text="Новый пост", author=self.author)
+        Post.objects.filter(pk=self.post.pk).update(
+            pub_date=self.post.pub_date - timedelta(days=1)
+        )
+        Comment.objects.update(pub_date=self.post.pub_date - timedelta(days=1))
+        out, _ = self.export("-", watermark_file=watermark)
+        posts = [
+            record["id"]
+            for record in self.read(out)
+            if record["type"] == "post"
+        ]
+        self.assertEqual(posts, [new_post.pk])
+        self.assertNotIn('"comment"', out)
+
+    def test_with_media(self):
+        """Архив содержит JSONL и файлы картинок."""
+        Post.objects.create(
+            text="Пост с картинкой",
+            author=self.author,
+            image=SimpleUploadedFile("export.gif", SMALL_GIF, "image/gif"),
+        )
+        path = os.path.join(TEMP_DIR, "backup.tar.gz")
+        _, err = self.export(path, with_media=True)
+        self.assertIn("media: 1", err)
+        with tarfile.open(path) as archive:
+            names = archive.getnames()
+            self.assertEqual(
+                names, ["content.jsonl", "media/posts/export.gif"]
+            )
+            content = archive.extractfile("content.jsonl").read().decode()
+        self.assertEqual(len(self.read(content)), 5)
+
+    def test_with_media_needs_archive(self):
+        """--with-media без архива - ошибка."""
+        with self.assertRaises(CommandError):
+            self.export("backup.jsonl", with_media=True)
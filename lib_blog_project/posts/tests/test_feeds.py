@@ -0,0 +1,121 @@
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import feeds
+from posts.models import Group, Post
+
+User = get_user_model()
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+class FeedsTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username="test_author", first_name="Лев", last_name="Толстой"
+        )
+        cls.other = User.objects.create_user(username="test_other")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Тестовое описание",
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f"Пост номер {i}", author=cls.author, group=cls.group
+            )
+            for i in range(3)
+        ]
+        Post.objects.create(text="Чужой пост", author=cls.other)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def get_feed(self, url):
+        response = self.guest_client.get(url)
+        self.assertTrue(response.streaming)
+        return response, ElementTree.fromstring(
+            b"".join(response.streaming_content)
+        )
+
+    def test_atom(self):
+        """Atom-лента группы содержит её посты, новые первыми."""
+        response, root = self.get_feed(
+            reverse("posts:group_feed", args=(self.group.slug, "atom"))
+        )
+        self.assertEqual(
+            response["Content-Type"], "application/atom+xml; charset=utf-8"
+        )
+        entries = root.findall(f"{ATOM}entry")
+        self.assertEqual(
+            [entry.find(f"{ATOM}title").text for entry in entries],
+            ["Пост номер 2", "Пост номер 1", "Пост номер 0"],
+        )
+        self.assertEqual(
+            entries[0].find(f"{ATOM}author/{ATOM}name").text, "Лев Толстой"
+        )
+        self.assertEqual(
+            root.find(f"{ATOM}updated").text,
+            self.posts[-1].pub_date.isoformat(),
+        )
+
+    def test_rss(self):
+        """RSS-ленты сайта и автора."""
+        _, root = self.get_feed(reverse("posts:index_feed", args=("rss",)))
+        self.assertEqual(len(root.findall("channel/item")), 4)
+        _, root = self.get_feed(
+            reverse("posts:author_feed", args=(self.other.username, "rss"))
+        )
+        items = root.findall("channel/item")
+        self.assertEqual(
+            [item.find("title").text for item in items], ["Чужой пост"]
+        )
+
+    def test_chunks(self):
+        """Длинная лента отдаётся несколькими частями."""
+        Post.objects.bulk_create(
+            Post(text="Текст " * 200, author=self.author) for _ in range(30)
+        )
+        response = self.guest_client.get(
+            reverse("posts:index_feed", args=("atom",))
+        )
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 1)
+        root = ElementTree.fromstring(b"".join(chunks))
+        self.assertEqual(len(root.findall(f"{ATOM}entry")), 34)
+
+    def test_cache_headers(self):
+        """Лента кэшируется клиентом и проверяется по ETag."""
+        url = reverse("posts:index_feed", args=("atom",))
+        response = self.guest_client.get(url)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn(
+            f"max-age={feeds.FEED_MAX_AGE}", response["Cache-Control"]
+        )
+        self.assertFalse(response.has_header("Vary"))
+        response = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text="Новый пост", author=self.author)
+        response = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_unknown(self):
+        """Неизвестный формат или объект дают 404."""
+        urls = (
+            reverse("posts:index_feed", args=("json",)),
+            reverse("posts:group_feed", args=("missing", "rss")),
+            reverse("posts:author_feed", args=("missing", "atom")),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import follow_graph
+from posts.models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username="graph_author", first_name="Анна", last_name="Ахматова"
+        )
+        cls.reader = User.objects.create_user(username="graph_reader")
+        cls.others = [
+            User.objects.create_user(username=f"graph_other_{i}")
+            for i in range(3)
+        ]
+        for user in cls.others:
+            Follow.objects.create(user=user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_sets_are_cached(self):
+        """Множества читаются из базы один раз."""
+        with self.assertNumQueries(3):
+            follow_graph.follower_ids(self.author.pk)
+            follow_graph.following_ids(self.reader.pk)
+            follow_graph.following_ids(self.others[0].pk)
+        with self.assertNumQueries(0):
+            followers = follow_graph.follower_ids(self.author.pk)
+            self.assertFalse(
+                follow_graph.is_following(self.reader, self.author.pk)
+            )
+            self.assertTrue(
+                follow_graph.is_following(self.others[0], self.author.pk)
+            )
+        self.assertEqual(followers, {user.pk for user in self.others})
+
+    def test_follow_and_unfollow_update_sets(self):
+        """Подписка и отписка сразу видны в множествах."""
+        follow_graph.follower_ids(self.author.pk)
+        self.assertFalse(
+            follow_graph.is_following(self.reader, self.author.pk)
+        )
+        self.reader_client.get(
+            reverse("posts:profile_follow", args=(self.author.username,))
+        )
+        self.assertTrue(
+            follow_graph.is_following(self.reader, self.author.pk)
+        )
+        self.assertIn(
+            self.reader.pk, follow_graph.follower_ids(self.author.pk)
+        )
+        self.reader_client.get(
+            reverse("posts:profile_unfollow", args=(self.author.username,))
+        )
+        self.assertFalse(
+            follow_graph.is_following(self.reader, self.author.pk)
+        )
+        self.assertNotIn(
+            self.reader.pk, follow_graph.follower_ids(self.author.pk)
+        )
+
+    def test_followed_among(self):
+        """Подписки для целой страницы авторов без запросов к базе."""
+        user = self.others[0]
+        follow_graph.following_ids(user.pk)
+        with self.assertNumQueries(0):
+            followed = follow_graph.followed_among(
+                user, [self.author.pk, self.reader.pk]
+            )
+        self.assertEqual(followed, {self.author.pk})
+        self.assertEqual(
+            follow_graph.followed_among(AnonymousUser(), [self.author.pk]),
+            set(),
+        )
+
+    def test_api_lists(self):
+        """API отдаёт подписчиков и подписки одним запросом к пользователям."""
+        url = reverse("posts:api_followers", args=(self.author.username,))
+        response = self.reader_client.get(url)
+        data = response.json()
+        self.assertEqual(data["count"], 3)
+        self.assertEqual(
+            [row["username"] for row in data["results"]],
+            [user.username for user in self.others],
+        )
+        url = reverse("posts:api_following", args=(self.others[0].username,))
+        data = self.reader_client.get(url).json()
+        self.assertEqual(
+            data["results"],
+            [{"username": "graph_author", "name": "Анна Ахматова"}],
+        )
+        self.assertIsNone(data["next"])
@@ -1,12 +1,21 @@
+import os
 import shutil
 import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
 
 from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from PIL import Image
 
+from core import tasks
+from posts import images
 from posts.models import Post, Group
 
 
@@ -45,6 +54,7 @@ class ImageViewsTest(TestCase):
             image=cls.image,
             group=cls.group,
         )
+        tasks.run_pending()
 
     @classmethod
     def tearDownClass(cls):
@@ -91,9 +101,121 @@ class ImageViewsTest(TestCase):
         form_data = {
             "author": self.user.username,
             "text": "Тестовый текст",
-            "image": self.image,
+            "image": SimpleUploadedFile(
+                name="new.gif", content=self.byte_gif, content_type="image/gif"
+            ),
         }
         self.authorized_client.post(
             reverse("posts:post_create"), data=form_data, follow=True
         )
         self.assertEqual(Post.objects.count(), post_count + 1)
+        self.assertTrue(
+            Post.objects.get(text="Тестовый текст").image.name.endswith(".gif")
+        )
+
+    def test_feeds_do_not_create_thumbnails(self):
+        """Ленты не создают миниатюры: их готовит обработчик очереди."""
+        cache.clear()
+        with mock.patch(
+            "sorl.thumbnail.base.ThumbnailBackend._create_thumbnail"
+        ) as create_thumbnail:
+            self.authorized_client.get(reverse("posts:index"))
+            self.authorized_client.get(
+                reverse("posts:post_detail", kwargs={"post_id": self.post.id})
+            )
+        create_thumbnail.assert_not_called()
+
+    def test_missing_thumbnail_falls_back_to_original(self):
+        """Без готовой миниатюры страница ссылается на оригинал."""
+        post = Post.objects.create(
+            author=self.user,
+            text="Пост без миниатюры",
+            image=SimpleUploadedFile(
+                name="pending.gif",
+                content=self.byte_gif,
+                content_type="image/gif",
+            ),
+        )
+        url = reverse("posts:post_detail", kwargs={"post_id": post.id})
+        cache.clear()
+        with mock.patch("PIL.Image.open") as image_open:
+            response = self.authorized_client.get(url)
+        image_open.assert_not_called()
+        self.assertContains(response, f'src="{post.image.url}"')
+
+        tasks.run_pending()
+        response = self.authorized_client.get(url)
+        self.assertNotContains(response, f'src="{post.image.url}"')
+        self.assertContains(response, f"{settings.MEDIA_URL}cache/")
+
+    def test_generate_thumbnails_command(self):
+        """Команда generate_thumbnails пересоздаёт миниатюры."""
+        out = StringIO()
+        call_command(
+            "generate_thumbnails", "--workers", "1", "--force", stdout=out
+        )
+        self.assertIn("с ошибками: 0", out.getvalue())
+        thumbnail_dir = os.path.join(TEMP_MEDIA_ROOT, "cache")
+        self.assertTrue(
+            any(files for _, _, files in os.walk(thumbnail_dir))
+        )
+
+
+class ImageIngestTest(TestCase):
+    def make_upload(self, size, image_format="JPEG", exif=None):
+        buffer = BytesIO()
+        options = {"exif": exif.tobytes()} if exif is not None else {}
+        Image.new("RGB", size, "green").save(buffer, image_format, **options)
+        return SimpleUploadedFile(
+            name=f"upload.{image_format.lower()}", content=buffer.getvalue()
+        )
+
+    def test_large_image_downscaled(self):
+        """Крупный оригинал уменьшается до MAX_DIMENSION."""
+        result = images.ingest(self.make_upload((4000, 3000)))
+        with Image.open(result) as image:
+            self.assertEqual(max(image.size), images.MAX_DIMENSION)
+            self.assertEqual(image.format, "JPEG")
+
+    def test_metadata_stripped_and_orientation_applied(self):
+        """EXIF удаляется, а поворот из него применяется к растру."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010F] = "Camera"
+        result = images.ingest(self.make_upload((300, 200), exif=exif))
+        with Image.open(result) as image:
+            self.assertEqual(image.size, (200, 300))
+            self.assertNotIn("exif", image.info)
+
+    def test_png_metadata_stripped(self):
+        """Из PNG EXIF тоже удаляется."""
+        exif = Image.Exif()
+        exif[0x010F] = "SecretCamera"
+        upload = self.make_upload((300, 200), image_format="PNG", exif=exif)
+        result = images.ingest(upload)
+        self.assertNotIn(b"SecretCamera", result.read())
+        result.seek(0)
+        with Image.open(result) as image:
+            self.assertNotIn("exif", image.info)
+
+    def test_png_limit_lower_than_jpeg(self):
+        """PNG декодируется целиком, поэтому его порог ниже."""
+        with mock.patch("posts.images.MAX_DECODED_PIXELS", 5000):
+            with self.assertRaises(ValidationError):
+                images.ingest(self.make_upload((100, 100), image_format="PNG"))
+            images.ingest(self.make_upload((100, 100)))
+
+    def test_unsupported_format_rejected(self):
+        """Форматы вне ALLOWED_FORMATS отклоняются."""
+        with self.assertRaises(ValidationError):
+            images.ingest(self.make_upload((10, 10), image_format="BMP"))
+
+    def test_too_many_pixels_rejected_before_decoding(self):
+        """Слишком большой растр отклоняется по заголовку."""
+        upload = self.make_upload((100, 100), image_format="PNG")
+        with mock.patch("posts.images.MAX_PIXELS", 5000), mock.patch(
+            "PIL.ImageFile.ImageFile.load"
+        ) as load:
+            with self.assertRaises(ValidationError):
+                images.ingest(upload)
+        load.assert_not_called()
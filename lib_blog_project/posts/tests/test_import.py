@@ -0,0 +1,251 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from core import tasks
+from posts import importer, search
+from posts.models import (
+    Comment,
+    Follow,
+    Group,
+    Post,
+    TimelineEntry,
+    UserCounter,
+)
+
+User = get_user_model()
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="test_user")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(TEMP_DIR, name)
+        with open(path, "w", encoding="utf-8") as source:
+            source.write(content)
+        return path
+
+    def write_jsonl(self, name, records):
+        return self.write(
+            name, "\n".join(json.dumps(record) for record in records)
+        )
+
+    def run_import(self, *args, **options):
+        out, err = StringIO(), StringIO()
+        call_command("import_posts", *args, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_jsonl(self):
+        """JSONL с записями всех типов загружается с сохранением дат."""
+        path = self.write_jsonl(
+            "content.jsonl",
+            [
+                {"type": "group", "slug": "g", "title": "Группа"},
+                {
+                    "type": "post",
+                    "id": 100,
+                    "author": "new_author",
+                    "group": "g",
+                    "text": "Импортированный пост",
+                    "pub_date": "2020-01-02T03:04:05+00:00",
+                },
+                {
+                    "type": "comment",
+                    "post": 100,
+                    "author": "test_user",
+                    "text": "Комментарий",
+                },
+                {
+                    "type": "follow",
+                    "user": "test_user",
+                    "author": "new_author",
+                },
+            ],
+        )
+        out, err = self.run_import(path, chunk_size=2)
+        self.assertEqual(err, "")
+        post = Post.objects.get(pk=100)
+        self.assertEqual(post.author.username, "new_author")
+        self.assertEqual(post.group.title, "Группа")
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(Comment.objects.get().post, post)
+        self.assertTrue(
+            Follow.objects.filter(user=self.user, author=post.author).exists()
+        )
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        self.assertEqual(post.group.post_count, 1)
+
+        # Повторная загрузка того же файла ничего не дублирует.
+        self.run_import(path)
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(Group.objects.count(), 1)
+
+    def test_finish_touches_only_imported(self):
+        """Загрузка не трогает счётчики и ленты посторонних."""
+        reader = User.objects.create_user(username="test_reader")
+        other = User.objects.create_user(username="test_other")
+        Post.objects.create(text="Пост", author=other)
+        Follow.objects.create(user=reader, author=other)
+        tasks.run_pending()
+        UserCounter.objects.filter(user=other).update(post_count=42)
+        path = self.write_jsonl(
+            "scoped.jsonl",
+            [{"type": "post", "author": "test_user", "text": "Новый"}],
+        )
+        self.run_import(path)
+        self.assertEqual(
+            UserCounter.objects.get(user=other).post_count, 42
+        )
+        self.assertEqual(
+            UserCounter.objects.get(user=self.user).post_count, 1
+        )
+        self.assertTrue(TimelineEntry.objects.filter(user=reader).exists())
+
+    def test_defer_search_index(self):
+        """После загрузки без триггеров поисковый индекс перестроен."""
+        path = self.write_jsonl(
+            "search.jsonl",
+            [{"type": "post", "author": "test_user", "text": "Уникальное"}],
+        )
+        self.run_import(path, defer_search_index=True)
+        page = search.search("уникальное")
+        self.assertEqual([post.text for post in page], ["Уникальное"])
+
+    def test_search_index_restored_after_error(self):
+        """Ошибка загрузки не оставляет сайт без поискового индекса."""
+        Post.objects.create(text="Уцелевший", author=self.user)
+        with self.assertRaises(CommandError):
+            self.run_import(
+                os.path.join(TEMP_DIR, "missing.jsonl"),
+                defer_search_index=True,
+            )
+        path = self.write_jsonl(
+            "broken.jsonl",
+            [{"type": "post", "author": "test_user", "text": "Текст"}],
+        )
+        with mock.patch.object(
+            importer.Importer, "load", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                self.run_import(path, defer_search_index=True)
+        page = search.search("уцелевший")
+        self.assertEqual([post.text for post in page], ["Уцелевший"])
+
+    def test_csv(self):
+        """CSV одного типа записей загружается с --type."""
+        path = self.write(
+            "posts.csv",
+            "author,group,text\n"
+            "test_user,,Первый пост\n"
+            "test_user,news,Второй пост\n",
+        )
+        self.run_import(path, type="post")
+        self.assertEqual(
+            set(Post.objects.values_list("text", flat=True)),
+            {"Первый пост", "Второй пост"},
+        )
+        self.assertEqual(Group.objects.get().slug, "news")
+
+    def test_invalid_rows_skipped(self):
+        """Битые строки пропускаются с сообщением, остальные загружаются."""
+        path = self.write(
+            "broken.jsonl",
+            "{не json}\n"
+            + json.dumps({"type": "post", "author": "test_user"})
+            + "\n"
+            + json.dumps(
+                {
+                    "type": "comment",
+                    "post": 999,
+                    "author": "test_user",
+                    "text": "Комментарий",
+                }
+            )
+            + "\n"
+            + json.dumps(
+                {"type": "post", "author": "test_user", "text": "Пост"}
+            ),
+        )
+        out, err = self.run_import(path)
+        self.assertIn("Строка 1", err)
+        self.assertIn("Строка 2", err)
+        self.assertIn("Строка 3", err)
+        self.assertEqual(Post.objects.get().text, "Пост")
+        self.assertIn("skipped: 3", out)
+
+    def test_checkpoint(self):
+        """Загрузка продолжается со строки из контрольной точки."""
+        path = self.write_jsonl(
+            "posts.jsonl",
+            [
+                {"type": "post", "author": "test_user", "text": f"Пост {i}"}
+                for i in range(5)
+            ],
+        )
+        checkpoint = os.path.join(TEMP_DIR, "checkpoint.json")
+        with open(checkpoint, "w") as checkpoint_file:
+            json.dump({"source": path, "line": 3}, checkpoint_file)
+        self.run_import(path, checkpoint=checkpoint, chunk_size=1)
+        self.assertEqual(
+            sorted(Post.objects.values_list("text", flat=True)),
+            ["Пост 3", "Пост 4"],
+        )
+        self.assertFalse(os.path.exists(checkpoint))
+
+    def test_resume_recounts_loaded_before_crash(self):
+        """После обрыва и продолжения пересчитаны и первые пачки."""
+        path = self.write_jsonl(
+            "resume.jsonl",
+            [
+                {
+                    "type": "post",
+                    "author": "test_first",
+                    "group": "news",
+                    "text": "До обрыва",
+                },
+                {"type": "post", "author": "test_user", "text": "После"},
+            ],
+        )
+        checkpoint = os.path.join(TEMP_DIR, "resume.json")
+        load = importer.Importer.load
+        calls = []
+
+        def crash_on_second(loader, records):
+            calls.append(records)
+            if len(calls) == 2:
+                raise RuntimeError("обрыв")
+            return load(loader, records)
+
+        with mock.patch.object(
+            importer.Importer, "load", crash_on_second
+        ):
+            with self.assertRaises(RuntimeError):
+                self.run_import(path, checkpoint=checkpoint, chunk_size=1)
+        self.run_import(path, checkpoint=checkpoint, chunk_size=1)
+        first = User.objects.get(username="test_first")
+        self.assertEqual(UserCounter.objects.get(user=first).post_count, 1)
+        self.assertEqual(Group.objects.get(slug="news").post_count, 1)
+        self.assertEqual(Post.objects.count(), 2)
@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import tasks
+from posts.models import Comment, Follow, Group, Post
+from posts.tests.mixins import QueryBudgetMixin
+
+
+User = get_user_model()
+
+FEED_QUERY_BUDGET = 8
+DETAIL_QUERY_BUDGET = 6
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username="test_reader")
+        cls.author = User.objects.create_user(username="test_author")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Тестовое описание",
+        )
+        cls.post = Post.objects.create(
+            text="Текст поста", author=cls.author, group=cls.group
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        # Подписка заполняет ленту фоновой задачей.
+        tasks.run_pending()
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def create_group(self):
+        number = Group.objects.count()
+        return Group.objects.create(
+            title=f"Группа {number}",
+            slug=f"group_{number}",
+            description="Тестовое описание",
+        )
+
+    def add_posts_by_new_authors(self):
+        for i in range(9):
+            author = User.objects.create_user(username=f"test_author_{i}")
+            Follow.objects.create(user=self.reader, author=author)
+            Post.objects.create(
+                text="Текст поста", author=author, group=self.group
+            )
+            Post.objects.create(
+                text="Текст поста", author=author, group=self.create_group()
+            )
+        tasks.run_pending()
+
+    def test_feed_queries_do_not_grow(self):
+        """Ленты делают одинаковое число запросов для 1 и 10 авторов."""
+        urls = [
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": self.group.slug}),
+            reverse("posts:follow_index"),
+        ]
+        before = {url: self.count_queries(self.client, url) for url in urls}
+        self.add_posts_by_new_authors()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.count_queries(self.client, url), before[url]
+                )
+                with self.assertMaxQueries(FEED_QUERY_BUDGET):
+                    response = self.client.get(url)
+                # Пустая лента не проверяет запросы постов.
+                self.assertTrue(response.context["page_obj"].object_list)
+
+    def test_profile_queries_do_not_grow(self):
+        """Число запросов профиля не зависит от числа постов."""
+        url = reverse(
+            "posts:profile", kwargs={"username": self.author.username}
+        )
+
+        def add_posts():
+            for _ in range(9):
+                Post.objects.create(
+                    text="Текст поста",
+                    author=self.author,
+                    group=self.create_group(),
+                )
+
+        self.assertQueriesDoNotGrow(self.client, url, add_posts)
+        with self.assertMaxQueries(FEED_QUERY_BUDGET):
+            self.client.get(url)
+
+    def test_post_detail_queries_do_not_grow(self):
+        """Число запросов поста не зависит от числа комментариев."""
+        url = reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+
+        def add_comments():
+            for i in range(9):
+                Comment.objects.create(
+                    post=self.post,
+                    author=User.objects.create_user(username=f"reader_{i}"),
+                    text="Комментарий",
+                )
+
+        self.assertQueriesDoNotGrow(self.client, url, add_comments)
+        with self.assertMaxQueries(DETAIL_QUERY_BUDGET):
+            self.client.get(url)
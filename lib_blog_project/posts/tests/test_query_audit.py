@@ -0,0 +1,60 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from posts import benchmark, query_audit, trending
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class QueryAuditTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        cache.clear()
+
+    def test_plan_problems(self):
+        """Полный проход и сортировка в памяти считаются ошибками."""
+        cases = (
+            (["SCAN posts_post"], 1),
+            (["SCAN TABLE posts_post AS T3"], 1),
+            (["SCAN posts_post USING INDEX posts_post_pub_date"], 0),
+            (["SEARCH posts_post USING INDEX post_author_date_idx"], 0),
+            (["SEARCH posts_post", "USE TEMP B-TREE FOR ORDER BY"], 1),
+            (
+                [
+                    "SCAN posts_post_fts VIRTUAL TABLE INDEX 0:M1",
+                    "USE TEMP B-TREE FOR ORDER BY",
+                ],
+                0,
+            ),
+        )
+        for plan, expected in cases:
+            with self.subTest(plan=plan):
+                self.assertEqual(
+                    len(query_audit.plan_problems(plan)), expected
+                )
+
+    def test_hot_queries_use_indexes(self):
+        """Все страницы отвечают, их запросы идут по индексам."""
+        benchmark.seed(
+            users=10, groups=2, posts=60, comments=40, image_ratio=0
+        )
+        trending.update()
+        results = query_audit.audit()
+        self.assertIn("search", results)
+        for name, (url, status, queries) in results.items():
+            with self.subTest(name=name):
+                self.assertEqual(status, 200)
+                self.assertTrue(queries)
+                problems = [
+                    (query["sql"], query["problems"])
+                    for query in queries
+                    if query["problems"]
+                ]
+                self.assertEqual(problems, [])
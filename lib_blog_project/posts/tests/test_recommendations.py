@@ -0,0 +1,100 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import follow_graph, recommendations
+from posts.models import Follow, Recommendation
+
+User = get_user_model()
+
+
+class RecommendationsTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.users = {
+            name: User.objects.create_user(username=f"rec_{name}")
+            for name in ("reader", "a", "b", "c", "d", "x", "e")
+        }
+        edges = (
+            ("reader", "a"),
+            ("reader", "b"),
+            ("a", "c"),
+            ("b", "c"),
+            ("b", "d"),
+            ("x", "a"),
+            ("x", "e"),
+        )
+        for user, author in edges:
+            Follow.objects.create(
+                user=cls.users[user], author=cls.users[author]
+            )
+        cls.reader = cls.users["reader"]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_candidates(self):
+        """Друзья друзей весят вдвое больше общих подписок."""
+        following, followers = recommendations.load_graph()
+        result = recommendations.candidates(
+            self.reader.pk, following, followers
+        )
+        expected = [
+            (self.users["c"].pk, 4),
+            (self.users["d"].pk, 2),
+            (self.users["x"].pk, 1),
+        ]
+        self.assertEqual(result, expected)
+
+    def test_build_and_read(self):
+        """Рекомендации читаются одним запросом, без уже прочитанных."""
+        out = StringIO()
+        call_command("build_recommendations", stdout=out)
+        self.assertIn("Рекомендаций:", out.getvalue())
+        self.assertEqual(
+            Recommendation.objects.filter(user=self.reader).count(), 3
+        )
+        follow_graph.following_ids(self.reader.pk)
+        with self.assertNumQueries(1):
+            suggestions = recommendations.for_user(self.reader)
+            names = [item.candidate.username for item in suggestions]
+        self.assertEqual(names, ["rec_c", "rec_d", "rec_x"])
+
+        Follow.objects.create(user=self.reader, author=self.users["c"])
+        names = [
+            item.candidate.username
+            for item in recommendations.for_user(self.reader)
+        ]
+        self.assertEqual(names, ["rec_d", "rec_x"])
+
+    def test_pages_show_suggestions(self):
+        """Лента подписок и свой профиль показывают рекомендации."""
+        recommendations.build()
+        client = Client()
+        client.force_login(self.reader)
+        urls = (
+            reverse("posts:follow_index"),
+            reverse("posts:profile", args=(self.reader.username,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(len(response.context["suggestions"]), 3)
+                self.assertContains(response, "Кого почитать")
+        response = client.get(
+            reverse("posts:profile", args=(self.users["a"].username,))
+        )
+        self.assertEqual(response.context["suggestions"], [])
+
+    def test_rebuild_replaces(self):
+        """Повторный расчёт заменяет таблицу, а не дополняет её."""
+        recommendations.build()
+        recommendations.build()
+        self.assertEqual(
+            Recommendation.objects.filter(user=self.reader).count(), 3
+        )
@@ -0,0 +1,89 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+
+
+User = get_user_model()
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="test_user")
+        cls.tolstoy = Post.objects.create(
+            text="Толстой пишет о войне и мире", author=cls.user
+        )
+        cls.chekhov = Post.objects.create(
+            text="Чехов и вишнёвый сад <script>", author=cls.user
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def find(self, query, cursor=None):
+        response = self.client.get(
+            reverse("posts:search"), {"q": query, "cursor": cursor or ""}
+        )
+        return response.context["page_obj"]
+
+    def test_search_finds_post(self):
+        """Поиск находит пост по слову и подсвечивает совпадение."""
+        page_obj = self.find("войне")
+        self.assertEqual(page_obj.object_list, [self.tolstoy])
+        self.assertIn("<mark>войне</mark>", page_obj.object_list[0].snippet)
+
+    def test_snippet_is_escaped(self):
+        """HTML из текста поста в сниппете экранируется."""
+        snippet = self.find("вишнёвый").object_list[0].snippet
+        self.assertNotIn("<script>", snippet)
+        self.assertIn("&lt;script&gt;", snippet)
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при правке и удалении поста."""
+        post = Post.objects.create(text="Гоголь и шинель", author=self.user)
+        self.assertEqual(self.find("шинель").object_list, [post])
+        Post.objects.filter(pk=post.pk).update(text="Гоголь и нос")
+        self.assertEqual(len(self.find("шинель")), 0)
+        self.assertEqual(self.find("нос").object_list, [post])
+        post.delete()
+        self.assertEqual(len(self.find("нос")), 0)
+
+    def test_search_pages_by_cursor(self):
+        """Результаты листаются курсором без повторов."""
+        posts = Post.objects.bulk_create(
+            Post(text=f"Пушкин стих {i}", author=self.user) for i in range(15)
+        )
+        first_page = self.find("Пушкин")
+        second_page = self.find("Пушкин", first_page.next_cursor)
+        self.assertEqual(len(first_page), 10)
+        self.assertEqual(len(second_page), 5)
+        self.assertFalse(second_page.has_next())
+        found = {post.pk for post in first_page} | {
+            post.pk for post in second_page
+        }
+        self.assertEqual(len(found), len(posts))
+
+    def test_query_syntax_is_not_interpreted(self):
+        """Операторы FTS5 во вводе пользователя не ломают поиск."""
+        for query in ['"', "войне OR", "NEAR(", "*", "-мире"]:
+            with self.subTest(query=query):
+                response = self.client.get(
+                    reverse("posts:search"), {"q": query}
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_rebuild_search_index(self):
+        """Команда восстанавливает удалённые триггеры и индекс."""
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER posts_post_fts_ai")
+        post = Post.objects.create(text="Лермонтов и парус", author=self.user)
+        self.assertEqual(len(self.find("парус")), 0)
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(self.find("парус").object_list, [post])
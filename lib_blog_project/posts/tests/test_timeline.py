@@ -0,0 +1,158 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import tasks
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry
+
+
+User = get_user_model()
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username="test_reader")
+        cls.author = User.objects.create_user(username="test_author")
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def follow(self, author):
+        self.client.get(
+            reverse("posts:profile_follow", kwargs={"username": author})
+        )
+
+    def feed(self, cursor=None):
+        response = self.client.get(
+            reverse("posts:follow_index"), {"cursor": cursor or ""}
+        )
+        return response.context["page_obj"]
+
+    def test_new_post_is_fanned_out(self):
+        """Новый пост автора попадает в ленту подписчика."""
+        self.follow(self.author.username)
+        post = Post.objects.create(text="Новый пост", author=self.author)
+        tasks.run_pending()
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(self.feed().object_list, [post])
+
+    def test_follow_backfills_timeline(self):
+        """При подписке в ленту попадают уже опубликованные посты."""
+        posts = [
+            Post.objects.create(text=f"Пост {i}", author=self.author)
+            for i in range(3)
+        ]
+        self.follow(self.author.username)
+        tasks.run_pending()
+        self.assertEqual(self.feed().object_list, posts[::-1])
+
+    def test_unfollow_prunes_timeline(self):
+        """После отписки посты автора пропадают из ленты."""
+        self.follow(self.author.username)
+        Post.objects.create(text="Пост автора", author=self.author)
+        self.client.get(
+            reverse(
+                "posts:profile_unfollow",
+                kwargs={"username": self.author.username},
+            )
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader).exists()
+        )
+        self.assertEqual(len(self.feed()), 0)
+
+    def test_heavy_author_merged_on_read(self):
+        """Посты популярного автора не раскладываются, а подмешиваются."""
+        self.follow(self.author.username)
+        fanned_out = Post.objects.create(text="Пост", author=self.author)
+        with mock.patch("posts.timeline.FANOUT_FOLLOWERS_LIMIT", 1):
+            cache.clear()
+            posts = [
+                Post.objects.create(text=f"Пост {i}", author=self.author)
+                for i in range(11)
+            ]
+            self.assertFalse(
+                TimelineEntry.objects.filter(post__in=posts).exists()
+            )
+            first_page = self.feed()
+            second_page = self.feed(first_page.next_cursor)
+        feed = first_page.object_list + second_page.object_list
+        self.assertEqual(feed, posts[::-1] + [fanned_out])
+
+    def test_author_leaving_heavy_set_is_backfilled(self):
+        """Посты тяжёлого периода попадают в ленты, когда он кончился."""
+        other = User.objects.create_user(username="test_other")
+        with mock.patch("posts.timeline.FANOUT_FOLLOWERS_LIMIT", 2):
+            self.follow(self.author.username)
+            other_client = Client()
+            other_client.force_login(other)
+            other_client.get(
+                reverse(
+                    "posts:profile_follow",
+                    kwargs={"username": self.author.username},
+                )
+            )
+            cache.clear()
+            post = Post.objects.create(text="Пост", author=self.author)
+            tasks.run_pending()
+            self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+            other_client.get(
+                reverse(
+                    "posts:profile_unfollow",
+                    kwargs={"username": self.author.username},
+                )
+            )
+            tasks.run_pending()
+            self.assertEqual(self.feed().object_list, [post])
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+
+    def test_rebuild(self):
+        """rebuild берёт не больше BACKFILL_POSTS постов автора и только
+        у заданных пользователей."""
+        other = User.objects.create_user(username="test_other")
+        posts = [
+            Post.objects.create(text=f"Пост {i}", author=self.author)
+            for i in range(3)
+        ]
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        TimelineEntry.objects.all().delete()
+        with mock.patch("posts.timeline.BACKFILL_POSTS", 2):
+            timeline.rebuild([self.reader.pk])
+        self.assertEqual(self.feed().object_list, posts[:0:-1])
+        self.assertFalse(TimelineEntry.objects.filter(user=other).exists())
+
+    def test_values_feed(self):
+        """С fields лента отдаёт словари, в том числе при слиянии."""
+        self.follow(self.author.username)
+        fanned_out = Post.objects.create(text="Пост", author=self.author)
+        with mock.patch("posts.timeline.FANOUT_FOLLOWERS_LIMIT", 1):
+            cache.clear()
+            merged = Post.objects.create(text="Пост 2", author=self.author)
+            page = timeline.follow_paginator(
+                self.reader, 10, fields=("text",)
+            ).get_page(None)
+            rows = page.object_list
+        self.assertEqual(
+            rows,
+            [
+                {
+                    "id": post.pk,
+                    "pub_date": post.pub_date,
+                    "text": post.text,
+                }
+                for post in (merged, fanned_out)
+            ],
+        )
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import Comment, Group, Post, TrendingPost, TrendingScore
+
+User = get_user_model()
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="trend_author")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="trend_slug",
+            description="Тестовое описание",
+        )
+        cls.quiet = Post.objects.create(text="Тихий пост", author=cls.author)
+        cls.hot = Post.objects.create(
+            text="Горячий пост", author=cls.author, group=cls.group
+        )
+        for i in range(3):
+            Comment.objects.create(
+                post=cls.hot, author=cls.author, text=f"Комментарий {i}"
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+
+    def score(self, post):
+        return TrendingScore.objects.get(post=post).score
+
+    def test_scores_and_ranks(self):
+        """Комментарии поднимают пост выше; у группы свой топ."""
+        stats = trending.update(self.now)
+        self.assertEqual(stats["created"], 2)
+        self.assertAlmostEqual(self.score(self.hot), 4, places=2)
+        self.assertAlmostEqual(self.score(self.quiet), 1, places=2)
+        site = list(trending.top().values_list("post", "rank"))
+        self.assertEqual(site, [(self.hot.pk, 1), (self.quiet.pk, 2)])
+        group = list(trending.top(self.group).values_list("post", flat=True))
+        self.assertEqual(group, [self.hot.pk])
+
+    def test_incremental_update(self):
+        """Повторный пересчёт не учитывает старые комментарии дважды."""
+        trending.update(self.now)
+        stats = trending.update(self.now + timedelta(minutes=5))
+        self.assertEqual(stats["updated"], 0)
+        self.assertAlmostEqual(self.score(self.hot), 4, places=2)
+
+        Comment.objects.create(
+            post=self.quiet, author=self.author, text="Новый комментарий"
+        )
+        later = timezone.now() + timedelta(seconds=1)
+        stats = trending.update(later)
+        self.assertEqual(stats["updated"], 1)
+        self.assertAlmostEqual(self.score(self.quiet), 2, places=2)
+
+    def test_decay_and_prune(self):
+        """Вес затухает вдвое за период полураспада, старое удаляется."""
+        trending.update(self.now)
+        trending.update(self.now + trending.HALF_LIFE)
+        entry = TrendingPost.objects.get(group=None, rank=1)
+        self.assertAlmostEqual(entry.score, 2, places=2)
+
+        stats = trending.update(
+            self.now + trending.WINDOW + timedelta(seconds=1)
+        )
+        self.assertEqual(stats["pruned"], 2)
+        self.assertFalse(TrendingPost.objects.exists())
+
+    def test_pages(self):
+        """Страница и API читают готовый топ за постоянное число запросов."""
+        trending.update(self.now)
+        client = Client()
+        response = client.get(reverse("posts:trending"))
+        self.assertEqual(response.context["page_obj"], [self.hot, self.quiet])
+        response = client.get(
+            reverse("posts:group_trending", args=(self.group.slug,))
+        )
+        self.assertEqual(response.context["page_obj"], [self.hot])
+
+        with self.assertNumQueries(1):
+            data = client.get(reverse("posts:api_trending")).json()
+        self.assertEqual(
+            [(row["rank"], row["id"]) for row in data["results"]],
+            [(1, self.hot.pk), (2, self.quiet.pk)],
+        )
+        self.assertEqual(data["results"][0]["group"], self.group.slug)
+        url = reverse("posts:api_group_trending", args=("missing",))
+        self.assertEqual(client.get(url).status_code, 404)
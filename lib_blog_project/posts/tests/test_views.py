@@ -3,6 +3,7 @@ from django.test import Client, TestCase
 from django.urls import reverse
 from django import forms
 
+from core import tasks
 from posts.models import Post, Group, Follow
 
 User = get_user_model()
@@ -179,8 +180,44 @@ class PaginatorViewsTest(TestCase):
         ]
         for url in urls_list:
             with self.subTest(url=url):
-                response = self.client.get(url + "?page=2")
+                first_page = self.client.get(url).context["page_obj"]
+                response = self.client.get(
+                    url, {"cursor": first_page.next_cursor}
+                )
                 self.assertEqual(len(response.context["page_obj"]), 3)
+                self.assertFalse(response.context["page_obj"].has_next())
+
+    def test_previous_cursor_returns_first_page(self):
+        """Курсор назад возвращает на первую страницу."""
+        url = reverse("posts:index")
+        first_page = self.client.get(url).context["page_obj"]
+        second_page = self.client.get(
+            url, {"cursor": first_page.next_cursor}
+        ).context["page_obj"]
+        response = self.client.get(
+            url, {"cursor": second_page.previous_cursor}
+        )
+        page_obj = response.context["page_obj"]
+        self.assertEqual(page_obj.object_list, first_page.object_list)
+        self.assertFalse(page_obj.has_previous())
+
+    def test_pages_do_not_overlap(self):
+        """Страницы ленты не пересекаются и идут по убыванию даты."""
+        url = reverse("posts:index")
+        first_page = self.client.get(url).context["page_obj"]
+        second_page = self.client.get(
+            url, {"cursor": first_page.next_cursor}
+        ).context["page_obj"]
+        feed = first_page.object_list + second_page.object_list
+        self.assertEqual(feed, list(Post.objects.order_by("-pub_date", "-pk")))
+
+    def test_broken_cursor_shows_first_page(self):
+        """Некорректный курсор открывает первую страницу."""
+        response = self.client.get(
+            reverse("posts:index"), {"cursor": "not-a-cursor"}
+        )
+        self.assertEqual(len(response.context["page_obj"]), 10)
+        self.assertFalse(response.context["page_obj"].has_previous())
 
 
 class FollowViewsTest(TestCase):
@@ -247,6 +284,7 @@ class FollowViewsTest(TestCase):
             )
         )
         Post.objects.create(text="Тестовый текст поста", author=self.author)
+        tasks.run_pending()
         subscriber_feed = self.client_1.get(reverse("posts:follow_index"))
         sub_feed_list = subscriber_feed.context["page_obj"].object_list
         not_subscriber_feed = self.client_2.get(reverse("posts:follow_index"))
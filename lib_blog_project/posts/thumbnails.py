@@ -0,0 +1,48 @@
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+# Миниатюры, которые готовит generate(); шаблоны берут их фильтром
+# thumbnail_url по размеру.
+RENDITIONS = (("960x339", {"crop": "center", "upscale": True}),)
+
+
+def generate(image, force=False):
+    """Создаёт все миниатюры изображения поста."""
+    if not image:
+        return
+    if force:
+        default.kvstore.delete_thumbnails(ImageFile(image))
+    for geometry, options in RENDITIONS:
+        get_thumbnail(image, geometry, **options)
+
+
+def _thumbnail_name(source, geometry, options):
+    """Имя файла миниатюры, как его вычисляет get_thumbnail в sorl."""
+    backend = default.backend
+    options = dict(options)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault("format", backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    return backend._get_thumbnail_filename(source, geometry, options)
+
+
+def cached_url(image, geometry) -> str:
+    """URL готовой миниатюры, а пока её нет - оригинала.
+
+    Читается только хранилище ключей sorl: в отличие от тега
+    {% thumbnail %}, оригинал не открывается и Pillow не вызывается,
+    даже если обработчик очереди ещё не создал миниатюру.
+    """
+    if not image:
+        return ""
+    source = ImageFile(image)
+    name = _thumbnail_name(source, geometry, dict(RENDITIONS)[geometry])
+    thumbnail = default.kvstore.get(ImageFile(name, default.storage))
+    return thumbnail.url if thumbnail else image.url
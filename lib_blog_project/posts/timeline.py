@@ -0,0 +1,210 @@
+from collections import defaultdict
+from itertools import islice
+
+from django.core.cache import cache
+from django.db import transaction
+
+from core.paginator import CursorPaginator, MergedCursorPaginator
+from . import follow_graph
+from .models import Follow, Post, TimelineEntry, UserCounter
+
+# Посты авторов с таким числом подписчиков не раскладываются по лентам,
+# а подмешиваются к ленте подписчика при чтении.
+FANOUT_FOLLOWERS_LIMIT = 1000
+# Сколько последних постов автора попадает в ленту при подписке.
+BACKFILL_POSTS = 200
+BATCH_SIZE = 500
+LOOKUP_BATCH_SIZE = 500
+HEAVY_AUTHORS_KEY = "timeline:heavy_authors"
+HEAVY_AUTHORS_TIMEOUT = 60 * 10
+
+
+def heavy_author_ids() -> frozenset:
+    """Авторы, чьи посты не раскладываются по лентам подписчиков."""
+    ids = cache.get(HEAVY_AUTHORS_KEY)
+    if ids is None:
+        ids = frozenset(
+            UserCounter.objects.filter(
+                follower_count__gte=FANOUT_FOLLOWERS_LIMIT
+            ).values_list("user", flat=True)
+        )
+        cache.set(HEAVY_AUTHORS_KEY, ids, HEAVY_AUTHORS_TIMEOUT)
+    return ids
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if post.author_id in heavy_author_ids():
+        return
+    follower_ids = Follow.objects.filter(author=post.author_id).values_list(
+        "user", flat=True
+    )
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in follower_ids.iterator()
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика последние посты автора."""
+    if author_id in heavy_author_ids():
+        return
+    posts = Post.objects.filter(author=author_id).values_list(
+        "pk", "pub_date"
+    )[:BACKFILL_POSTS]
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in posts
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def left_heavy(author_id) -> bool:
+    """Перестал ли автор только что быть тяжёлым после отписки."""
+    return UserCounter.objects.filter(
+        user=author_id, follower_count=FANOUT_FOLLOWERS_LIMIT - 1
+    ).exists()
+
+
+def backfill_followers(author_id):
+    """Раскладывает последние посты автора по лентам всех подписчиков.
+
+    Пока автор был тяжёлым, его посты и новые подписки на него не
+    попадали в ленты. Когда он перестаёт им быть, без этого шага
+    такие посты пропали бы из лент: подмешивание при чтении его уже
+    не касается. Кэш тяжёлых авторов сбрасывается до заполнения, чтобы
+    новые посты автора уже раскладывались обычным путём.
+    """
+    cache.delete(HEAVY_AUTHORS_KEY)
+    if author_id in heavy_author_ids():
+        return
+    posts = list(
+        Post.objects.filter(author=author_id).values_list("pk", "pub_date")[
+            :BACKFILL_POSTS
+        ]
+    )
+    follower_ids = Follow.objects.filter(author=author_id).values_list(
+        "user", flat=True
+    )
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for user_id in follower_ids.iterator()
+            for pk, pub_date in posts
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты посты автора, от которого пользователь отписался."""
+    TimelineEntry.objects.filter(
+        user=user_id, post__author=author_id
+    ).delete()
+
+
+def rebuild(user_ids=None):
+    """Заполняет ленты заново по подпискам.
+
+    Нужна после массовой загрузки, которая не вызывает сигналов. Как
+    и при подписке, каждый автор даёт ленте не больше BACKFILL_POSTS
+    последних постов. С user_ids перестраиваются только ленты этих
+    пользователей. Всё идёт одной транзакцией, так что до её конца
+    читатели видят прежние ленты, а не пустые.
+    """
+    cache.delete(HEAVY_AUTHORS_KEY)
+    heavy_ids = heavy_author_ids()
+    readers = defaultdict(list)
+    with transaction.atomic():
+        if user_ids is None:
+            TimelineEntry.objects.all().delete()
+            follows = [Follow.objects.values_list("user", "author")]
+        else:
+            user_ids = list(user_ids)
+            follows = []
+            # У SQLite есть предел на число параметров запроса.
+            for start in range(0, len(user_ids), LOOKUP_BATCH_SIZE):
+                batch = user_ids[start:start + LOOKUP_BATCH_SIZE]
+                TimelineEntry.objects.filter(user__in=batch).delete()
+                follows.append(
+                    Follow.objects.filter(user__in=batch).values_list(
+                        "user", "author"
+                    )
+                )
+        for queryset in follows:
+            for user_id, author_id in queryset.order_by().iterator():
+                if author_id not in heavy_ids:
+                    readers[author_id].append(user_id)
+
+        rows = (
+            TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for author_id, follower_ids in readers.items()
+            for pk, pub_date in Post.objects.filter(
+                author=author_id
+            ).values_list("pk", "pub_date")[:BACKFILL_POSTS]
+            for user_id in follower_ids
+        )
+        while True:
+            batch = list(islice(rows, BATCH_SIZE))
+            if not batch:
+                break
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class TimelinePaginator(CursorPaginator):
+    """Листает материализованную ленту и отдаёт посты, а не записи ленты.
+
+    С fields вместо моделей отдаются словари с этими полями поста
+    (как в Post.objects.values), плюс id и pub_date.
+    """
+
+    def __init__(self, user, per_page, fields=None):
+        self.fields = fields
+        entries = TimelineEntry.objects.filter(user=user)
+        if fields is None:
+            entries = entries.select_related("post__author", "post__group")
+        else:
+            entries = entries.values(
+                "post_id", "pub_date", *(f"post__{field}" for field in fields)
+            )
+        super().__init__(entries, per_page, keys=("pub_date", "post_id"))
+
+    def fetch(self, position, backwards, limit) -> list:
+        entries = super().fetch(position, backwards, limit)
+        if self.fields is None:
+            return [entry.post for entry in entries]
+        return [
+            {
+                "id": entry["post_id"],
+                "pub_date": entry["pub_date"],
+                **{field: entry[f"post__{field}"] for field in self.fields},
+            }
+            for entry in entries
+        ]
+
+
+def follow_paginator(user, per_page, fields=None) -> CursorPaginator:
+    """Лента подписок: материализованная часть плюс посты тяжёлых авторов."""
+    paginator = TimelinePaginator(user, per_page, fields)
+    heavy_ids = heavy_author_ids()
+    if not heavy_ids:
+        return paginator
+    followed_heavy_ids = list(follow_graph.followed_among(user, heavy_ids))
+    if not followed_heavy_ids:
+        return paginator
+    heavy_posts = Post.objects.filter(author__in=followed_heavy_ids)
+    if fields is None:
+        heavy_posts = heavy_posts.select_related("author", "group")
+    else:
+        heavy_posts = heavy_posts.values("id", "pub_date", *fields)
+    return MergedCursorPaginator(
+        [paginator, CursorPaginator(heavy_posts, per_page)], per_page
+    )
@@ -0,0 +1,122 @@
+import heapq
+import math
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import feed_cache
+from .models import Comment, Post, TrendingPost, TrendingScore
+
+TOP_N = 50
+# Вес убывает вдвое за HALF_LIFE: вчерашнее обсуждение уступает
+# сегодняшнему, даже если комментариев было больше.
+HALF_LIFE = timedelta(hours=6)
+DECAY_RATE = math.log(2) / HALF_LIFE.total_seconds()
+# Дальше окна комментарии не читаются: их вклад уже меньше 1/256.
+WINDOW = 8 * HALF_LIFE
+COMMENT_WEIGHT = 1.0
+# Свежий пост попадает в топ и без комментариев, пока не затухнет.
+POST_WEIGHT = 1.0
+MIN_SCORE = 0.05
+BATCH_SIZE = 500
+
+
+def decay(score, since, now) -> float:
+    return score * math.exp(-DECAY_RATE * (now - since).total_seconds())
+
+
+def update_scores(now) -> Counter:
+    """Добавляет к весам новые комментарии и посты.
+
+    У каждой строки TrendingScore свой водяной знак scored_at: учтены
+    все комментарии поста не новее него. Читаются только комментарии
+    и посты из окна WINDOW, а не вся таблица. Строки, не менявшиеся
+    дольше окна, удаляются: их комментарии уже никогда не перечитаются.
+    """
+    cutoff = now - WINDOW
+    states = {
+        post_id: (score, scored_at)
+        for post_id, score, scored_at in TrendingScore.objects.values_list(
+            "post", "score", "scored_at"
+        ).iterator()
+    }
+    added = defaultdict(float)
+    comments = Comment.objects.filter(
+        pub_date__gt=cutoff, pub_date__lte=now
+    ).values_list("post", "pub_date")
+    for post_id, pub_date in comments.iterator():
+        if post_id not in states or pub_date > states[post_id][1]:
+            added[post_id] += decay(COMMENT_WEIGHT, pub_date, now)
+    posts = Post.objects.filter(
+        pub_date__gt=cutoff, pub_date__lte=now
+    ).values_list("pk", "pub_date")
+    for post_id, pub_date in posts.iterator():
+        if post_id not in states:
+            added[post_id] += decay(POST_WEIGHT, pub_date, now)
+
+    changed, created = [], []
+    for post_id, score in added.items():
+        if post_id in states:
+            score += decay(*states[post_id], now)
+            changed.append(
+                TrendingScore(post_id=post_id, score=score, scored_at=now)
+            )
+        else:
+            created.append(
+                TrendingScore(post_id=post_id, score=score, scored_at=now)
+            )
+    with transaction.atomic():
+        TrendingScore.objects.bulk_update(
+            changed, ("score", "scored_at"), batch_size=BATCH_SIZE
+        )
+        TrendingScore.objects.bulk_create(created, batch_size=BATCH_SIZE)
+        pruned, _ = TrendingScore.objects.filter(
+            scored_at__lt=cutoff
+        ).delete()
+    return Counter(updated=len(changed), created=len(created), pruned=pruned)
+
+
+def materialize(now, limit=TOP_N) -> int:
+    """Переписывает топ по сайту и по каждой группе из текущих весов."""
+    site = []
+    by_group = defaultdict(list)
+    rows = TrendingScore.objects.values_list(
+        "post", "post__group", "score", "scored_at"
+    )
+    for post_id, group_id, score, scored_at in rows.iterator():
+        score = decay(score, scored_at, now)
+        if score < MIN_SCORE:
+            continue
+        site.append((score, post_id))
+        if group_id is not None:
+            by_group[group_id].append((score, post_id))
+
+    entries = [
+        TrendingPost(
+            group_id=group_id, post_id=post_id, rank=rank, score=score
+        )
+        for group_id, candidates in [(None, site), *by_group.items()]
+        for rank, (score, post_id) in enumerate(
+            heapq.nlargest(limit, candidates), start=1
+        )
+    ]
+    with transaction.atomic():
+        TrendingPost.objects.all().delete()
+        TrendingPost.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+    feed_cache.bump(feed_cache.TRENDING_SCOPE)
+    return len(entries)
+
+
+def update(now=None, limit=TOP_N) -> Counter:
+    """Один шаг периодического пересчёта: веса, затем топы."""
+    now = now or timezone.now()
+    stats = update_scores(now)
+    stats["ranked"] = materialize(now, limit)
+    return stats
+
+
+def top(group=None):
+    """Топ сайта или группы; строки уже отсортированы по месту."""
+    return TrendingPost.objects.filter(group=group)
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, feeds, views
 
 app_name = "posts"
 
@@ -8,6 +8,13 @@ urlpatterns = [
     path("", views.index, name="index"),
     path("group/<slug:slug>/", views.group_posts, name="group_list"),
     path("profile/<str:username>/", views.profile, name="profile"),
+    path("search/", views.post_search, name="search"),
+    path("trending/", views.trending_posts, name="trending"),
+    path(
+        "group/<slug:slug>/trending/",
+        views.group_trending,
+        name="group_trending",
+    ),
     path(
         "posts/<int:post_id>/",
         views.post_detail,
@@ -18,6 +25,11 @@ urlpatterns = [
     path(
         "posts/<int:post_id>/comment/", views.add_comment, name="add_comment"
     ),
+    path(
+        "posts/<int:post_id>/comments/",
+        views.post_comments,
+        name="post_comments",
+    ),
     path("follow/", views.follow_index, name="follow_index"),
     path(
         "profile/<str:username>/follow/",
@@ -29,4 +41,43 @@ urlpatterns = [
         views.profile_unfollow,
         name="profile_unfollow",
     ),
+    path("feed/<slug:feed_format>/", feeds.index_feed, name="index_feed"),
+    path(
+        "group/<slug:slug>/feed/<slug:feed_format>/",
+        feeds.group_feed,
+        name="group_feed",
+    ),
+    path(
+        "profile/<str:username>/feed/<slug:feed_format>/",
+        feeds.author_feed,
+        name="author_feed",
+    ),
+    path("api/posts/", api.index, name="api_index"),
+    path("api/group/<slug:slug>/", api.group_posts, name="api_group_list"),
+    path("api/profile/<str:username>/", api.profile, name="api_profile"),
+    path(
+        "api/profile/<str:username>/followers/",
+        api.followers,
+        name="api_followers",
+    ),
+    path(
+        "api/profile/<str:username>/following/",
+        api.following,
+        name="api_following",
+    ),
+    path("api/follow/", api.follow_index, name="api_follow_index"),
+    path("api/trending/", api.trending_posts, name="api_trending"),
+    path(
+        "api/group/<slug:slug>/trending/",
+        api.group_trending,
+        name="api_group_trending",
+    ),
+    path(
+        "api/posts/<int:post_id>/", api.post_detail, name="api_post_detail"
+    ),
+    path(
+        "api/posts/<int:post_id>/comments/",
+        api.post_comments,
+        name="api_post_comments",
+    ),
 ]
@@ -1,84 +1,166 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.contrib.auth import get_user_model
-
+from django.views.decorators.http import condition
+
+from core.paginator import CursorPaginator
+from core.throttle import throttle
+from . import (
+    counters,
+    etags,
+    feed_cache,
+    follow_graph,
+    recommendations,
+    search,
+    timeline,
+    trending,
+)
 from .models import Post, Group, Comment, Follow
 from .forms import PostForm, CommentForm
 
 User = get_user_model()
 
 POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
 
 
-def paginate_posts(query_set, page_number):
-    paginator = Paginator(query_set, POSTS_PER_PAGE)
-    page_obj = paginator.get_page(page_number)
+def paginate_posts(query_set, cursor):
+    paginator = CursorPaginator(query_set, POSTS_PER_PAGE)
+    page_obj = paginator.get_page(cursor)
     return page_obj
 
 
+def paginate_comments(post_id, cursor):
+    comments = Comment.objects.select_related("author").filter(post=post_id)
+    paginator = CursorPaginator(comments, COMMENTS_PER_PAGE)
+    return paginator.get_page(cursor)
+
+
+@condition(etag_func=etags.index)
 def index(request):
     template = "posts/index.html"
-    post_list = Post.objects.all()
-    page_number = request.GET.get("page")
-    context = {"page_obj": paginate_posts(post_list, page_number)}
+    post_list = Post.objects.select_related("author", "group")
+    cursor = request.GET.get("cursor")
+    context = {
+        "page_obj": paginate_posts(post_list, cursor),
+        **feed_cache.feed_context(feed_cache.INDEX_SCOPE),
+    }
     return render(request, template, context)
 
 
+@condition(etag_func=etags.group_posts)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     template = "posts/group_list.html"
-    post_list = group.posts.all()
-    page_number = request.GET.get("page")
+    post_list = group.posts.select_related("author", "group")
+    cursor = request.GET.get("cursor")
     context = {
         "group": group,
-        "page_obj": paginate_posts(post_list, page_number),
+        "page_obj": paginate_posts(post_list, cursor),
+        **feed_cache.feed_context(feed_cache.group_scope(group.pk)),
     }
     return render(request, template, context)
 
 
+@condition(etag_func=etags.profile)
 def profile(request, username):
     template = "posts/profile.html"
-    author = get_object_or_404(User, username=username)
-    post_list = Post.objects.filter(author__username=username)
-    page_number = request.GET.get("page")
-    following = False
-    if request.user.is_authenticated:
-        follow_list = Follow.objects.filter(
-            author=author, user=request.user
-        ).exists()
-        following = follow_list
+    author = get_object_or_404(
+        User.objects.select_related("counters"), username=username
+    )
+    post_list = Post.objects.select_related("author", "group").filter(
+        author=author
+    )
+    cursor = request.GET.get("cursor")
+    following = follow_graph.is_following(request.user, author.pk)
+    # Рекомендации видны только в собственном профиле.
+    suggestions = []
+    if author == request.user:
+        suggestions = recommendations.for_user(request.user)
 
     context = {
-        "page_obj": paginate_posts(post_list, page_number),
+        "page_obj": paginate_posts(post_list, cursor),
+        "counters": counters.for_user(author),
         "author": author,
         "following": following,
+        "suggestions": suggestions,
+        **feed_cache.feed_context(feed_cache.author_scope(author.pk)),
     }
     return render(request, template, context)
 
 
+def trending_response(request, group=None):
+    entries = trending.top(group).select_related(
+        "post__author", "post__group"
+    )
+    context = {
+        "group": group,
+        "page_obj": [entry.post for entry in entries],
+    }
+    return render(request, "posts/trending.html", context)
+
+
+@condition(etag_func=etags.trending)
+def trending_posts(request):
+    return trending_response(request)
+
+
+@condition(etag_func=etags.group_trending)
+def group_trending(request, slug):
+    return trending_response(request, get_object_or_404(Group, slug=slug))
+
+
+def post_search(request):
+    template = "posts/search.html"
+    query = request.GET.get("q", "").strip()
+    cursor = request.GET.get("cursor")
+    context = {
+        "query": query,
+        "page_obj": search.search(query, cursor, POSTS_PER_PAGE),
+    }
+    return render(request, template, context)
+
+
+@condition(etag_func=etags.post_detail)
 def post_detail(request, post_id):
     template = "posts/post_detail.html"
-    post = get_object_or_404(Post, pk=post_id)
-    count = Post.objects.filter(author=post.author).count()
+    post = get_object_or_404(
+        Post.objects.select_related("author__counters", "group"),
+        pk=post_id,
+    )
+    count = counters.for_user(post.author).post_count
     form = CommentForm()
-    comments = Comment.objects.select_related("author").filter(post=post)
     context = {
         "post": post,
         "count": count,
         "button": post.author.username == request.user.username,
         "form": form,
-        "comments": comments,
+        "comments": paginate_comments(post.pk, None),
+        **feed_cache.feed_context(feed_cache.post_scope(post.pk)),
+    }
+    return render(request, template, context)
+
+
+def post_comments(request, post_id):
+    """Следующая порция комментариев поста в виде HTML-фрагмента."""
+    template = "includes/comments.html"
+    post = get_object_or_404(Post.objects.only("pk"), pk=post_id)
+    cursor = request.GET.get("cursor")
+    context = {
+        "post": post,
+        "comments": paginate_comments(post.pk, cursor),
+        **feed_cache.feed_context(feed_cache.post_scope(post.pk)),
     }
     return render(request, template, context)
 
 
 @login_required
+@throttle("post", methods=("POST",))
 def post_create(request):
     template = "posts/create_post.html"
 
     if request.method == "POST":
-        form = PostForm(request.POST or None)
+        form = PostForm(request.POST or None, files=request.FILES or None)
         if form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
@@ -91,6 +173,7 @@ def post_create(request):
 
 
 @login_required
+@throttle("post", methods=("POST",))
 def post_edit(request, post_id):
     template = "posts/create_post.html"
     edit_post = get_object_or_404(Post, pk=post_id)
@@ -104,8 +187,11 @@ def post_edit(request, post_id):
             files=request.FILES or None,
             instance=edit_post,
         )
-        form.save()
-        return redirect("posts:post_detail", post_id)
+        if form.is_valid():
+            form.save()
+            return redirect("posts:post_detail", post_id)
+        context = {"form": form, "is_edit": True, "id": post_id}
+        return render(request, template, context)
 
     form = PostForm(instance=edit_post)
     context = {"form": form, "is_edit": True, "id": post_id}
@@ -113,6 +199,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@throttle("comment", methods=("POST",))
 def add_comment(request, post_id):
     template = "posts:post_detail"
     post = get_object_or_404(Post, pk=post_id)
@@ -128,22 +215,18 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     template = "posts/follow.html"
-    user = request.user
-
-    post_list = Post.objects.select_related("group").filter(
-        author__following__user=user
-    )
-    paginator = Paginator(post_list, POSTS_PER_PAGE)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    paginator = timeline.follow_paginator(request.user, POSTS_PER_PAGE)
+    cursor = request.GET.get("cursor")
 
     context = {
-        "page_obj": page_obj,
+        "page_obj": paginator.get_page(cursor),
+        "suggestions": recommendations.for_user(request.user),
     }
     return render(request, template, context)
 
 
 @login_required
+@throttle("follow")
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user.username != username:
@@ -154,6 +237,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@throttle("follow")
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     obj = Follow.objects.filter(user=request.user, author=author)